@@ -0,0 +1,109 @@
+"""
+Headless comparison of sweep outputs against a baseline run (no GUI import).
+
+Usage:
+    python batch_compare.py BASELINE_RUN SWEEP_ROOT [--rel-tol 1e-6] [--abs-tol 0]
+                            [--pattern "tape*"] [--workers N] [--summary compare_summary.json]
+
+Every sub-folder of SWEEP_ROOT holding files that match the pattern is a
+run; each of its tapes is compared section by section (MAT/MF/MT) with the
+tape of the same name in BASELINE_RUN, runs being spread over a process pool.
+
+The JSON summary lists, per run and per tape, the maximum relative and
+absolute deviation of every MAT/MF/MT section that is not identical.
+The exit code is 1 if any section differs beyond the tolerances (or a
+baseline tape is missing from a run), 2 on usage errors, 0 otherwise.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from tape_diff import diff_files, SAME, CLOSE, STATUS_NAMES, DEFAULT_REL_TOL, DEFAULT_ABS_TOL
+
+SUMMARY_NAME = "compare_summary.json"
+
+
+def _tapes(folder, pattern):
+    """Names of the regular files (or links) of a folder matching the pattern."""
+    try: names = os.listdir(folder)
+    except OSError: return []
+    return sorted(n for n in names if fnmatch.fnmatch(n, pattern) and os.path.isfile(os.path.join(folder, n)))
+
+
+def compare_run(baseline, run_dir, names, rel_tol, abs_tol):
+    """Compares the given tapes of one run folder with the baseline. Runs in a worker process."""
+    result = {"ok": True, "max_rel": 0.0, "tapes": {}, "missing": []}
+    for name in names:
+        base, other = os.path.join(baseline, name), os.path.join(run_dir, name)
+        if not os.path.isfile(other):
+            result["missing"].append(name)
+            result["ok"] = False
+            continue
+        if os.path.realpath(base) == os.path.realpath(other):
+            continue  # staged link to the very same tape
+
+        diff = diff_files(base, other, rel_tol, abs_tol)
+        sections = []
+        for sec in diff.sections:
+            if sec.status == SAME: continue
+            sections.append({"mat": sec.mat, "mf": sec.mf, "mt": sec.mt, "status": STATUS_NAMES[sec.status],
+                             "max_rel": sec.max_rel, "max_abs": sec.max_abs, "changed_lines": sec.changed})
+        ok = all(s["status"] == STATUS_NAMES[CLOSE] for s in sections)
+        max_rel = max((s["max_rel"] for s in sections), default=0.0)
+        result["tapes"][name] = {"ok": ok, "max_rel": max_rel, "sections": sections}
+        result["ok"] = result["ok"] and ok
+        result["max_rel"] = max(result["max_rel"], max_rel)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the tapes of every run of a sweep with a baseline run.")
+    parser.add_argument("baseline", help="Reference run folder")
+    parser.add_argument("root", help="Sweep output root (one sub-folder per run)")
+    parser.add_argument("--rel-tol", type=float, default=DEFAULT_REL_TOL, help="Relative tolerance (default %(default)g)")
+    parser.add_argument("--abs-tol", type=float, default=DEFAULT_ABS_TOL, help="Absolute tolerance (default %(default)g)")
+    parser.add_argument("--pattern", default="tape*", help="File names to compare (default %(default)s)")
+    parser.add_argument("--workers", type=int, help="Parallel comparisons (default: one per core)")
+    parser.add_argument("--summary", help=f"JSON summary path (default: <root>/{SUMMARY_NAME})")
+    args = parser.parse_args(argv)
+
+    baseline, root = os.path.abspath(args.baseline), os.path.abspath(args.root)
+    names = _tapes(baseline, args.pattern)
+    if not names:
+        print(f"No files matching '{args.pattern}' in {baseline}", file=sys.stderr)
+        return 2
+    runs = [d for d in sorted(os.listdir(root)) if os.path.isdir(os.path.join(root, d))
+            and os.path.join(root, d) != baseline and _tapes(os.path.join(root, d), args.pattern)] if os.path.isdir(root) else []
+    if not runs:
+        print(f"No run folders with '{args.pattern}' files in {root}", file=sys.stderr)
+        return 2
+
+    print(f"Comparing {len(names)} tapes of {len(runs)} runs with {baseline}")
+    results = {}
+    with ProcessPoolExecutor(max_workers=args.workers or os.cpu_count()) as pool:
+        futures = {pool.submit(compare_run, baseline, os.path.join(root, run), names, args.rel_tol, args.abs_tol): run
+                   for run in runs}
+        for done, future in enumerate(as_completed(futures), start=1):
+            run = futures[future]
+            try: results[run] = future.result()
+            except Exception as e: results[run] = {"ok": False, "max_rel": None, "tapes": {}, "missing": [], "error": str(e)}
+            res = results[run]
+            state = "ok" if res["ok"] else ("ERROR " + res["error"] if "error" in res else "DIFFERS")
+            max_rel = "-" if res["max_rel"] is None else f"{res['max_rel']:.3e}"
+            print(f"[{done}/{len(runs)}] {run}: {state} (max rel {max_rel})", flush=True)
+
+    failed = [run for run in runs if not results[run]["ok"]]
+    summary = {"baseline": baseline, "root": root, "rel_tol": args.rel_tol, "abs_tol": args.abs_tol,
+               "tapes": names, "failed": failed, "runs": {run: results[run] for run in runs}}
+    summary_path = args.summary or os.path.join(root, SUMMARY_NAME)
+    with open(summary_path, "w") as f: json.dump(summary, f, indent=2)
+
+    print(f"Comparison completed. Within tolerance: {len(runs) - len(failed)}/{len(runs)} -> {summary_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
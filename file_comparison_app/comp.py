@@ -1,7 +1,12 @@
+import bisect
+import threading
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import filedialog
 import customtkinter as ctk
-import difflib
+from tape_diff import TapeDiff, read_lines, SAME, CLOSE, CHANGED, REMOVED, ADDED, DEFAULT_REL_TOL, DEFAULT_ABS_TOL
+
+TEXT_PADY = 10  # same vertical padding on the gutters and the texts, so their rows line up
 
 class NJOYProDiff(ctk.CTk):
     def __init__(self):
@@ -32,6 +37,30 @@ class NJOYProDiff(ctk.CTk):
                                        command=self.reset_session, fg_color="#722f37", hover_color="#a23c48")
         self.btn_reset.pack(side="right", padx=5)
 
+        # Difference navigation (precomputed hunk index)
+        self.btn_prev = ctk.CTkButton(self.menu_frame, text="▲ Prev. Difference", width=130,
+                                      command=lambda: self.jump_difference(-1), fg_color="#3b3b3b")
+        self.btn_prev.pack(side="left", padx=(20, 5))
+        self.btn_next = ctk.CTkButton(self.menu_frame, text="▼ Next Difference", width=130,
+                                      command=lambda: self.jump_difference(1), fg_color="#3b3b3b")
+        self.btn_next.pack(side="left", padx=5)
+
+        self.btn_summary = ctk.CTkButton(self.menu_frame, text="Section Summary", width=130,
+                                         command=self.show_summary, fg_color="#3b3b3b")
+        self.btn_summary.pack(side="right", padx=5)
+
+        # Numeric tolerances (re-run the comparison with "Compare")
+        self.btn_compare = ctk.CTkButton(self.menu_frame, text="Compare", width=90, command=self.run_diff)
+        self.btn_compare.pack(side="right", padx=5)
+        self.ent_abs_tol = ctk.CTkEntry(self.menu_frame, width=80)
+        self.ent_abs_tol.insert(0, f"{DEFAULT_ABS_TOL:g}")
+        self.ent_abs_tol.pack(side="right", padx=(0, 5))
+        ctk.CTkLabel(self.menu_frame, text="Abs. tol:").pack(side="right", padx=(10, 2))
+        self.ent_rel_tol = ctk.CTkEntry(self.menu_frame, width=80)
+        self.ent_rel_tol.insert(0, f"{DEFAULT_REL_TOL:g}")
+        self.ent_rel_tol.pack(side="right", padx=(0, 5))
+        ctk.CTkLabel(self.menu_frame, text="Rel. tol:").pack(side="right", padx=(10, 2))
+
         # --- Main Comparison Area ---
         self.main_container = ctk.CTkFrame(self)
         self.main_container.grid(row=1, column=0, columnspan=2, padx=20, pady=5, sticky="nsew")
@@ -39,30 +68,36 @@ class NJOYProDiff(ctk.CTk):
         self.main_container.grid_rowconfigure(0, weight=1)
 
         # Left Gutter (Line Numbers) & Text
-        self.line_nums_l = tk.Text(self.main_container, width=5, padx=5, pady=10, fg="#666666", 
+        self.line_nums_l = tk.Text(self.main_container, width=5, padx=5, pady=TEXT_PADY, fg="#666666", 
                                    bg="#1a1a1a", borderwidth=0, font=("Courier New", 12), state="disabled")
         self.line_nums_l.grid(row=0, column=0, sticky="ns")
         
-        self.txt_left = tk.Text(self.main_container, wrap="none", bg="#242424", fg="#ffffff", 
+        self.txt_left = tk.Text(self.main_container, wrap="none", bg="#242424", fg="#ffffff", pady=TEXT_PADY,
                                 font=("Courier New", 12), borderwidth=0, state="disabled")
         self.txt_left.grid(row=0, column=1, sticky="nsew")
 
         # Right Gutter (Line Numbers) & Text
-        self.line_nums_r = tk.Text(self.main_container, width=5, padx=5, pady=10, fg="#666666", 
+        self.line_nums_r = tk.Text(self.main_container, width=5, padx=5, pady=TEXT_PADY, fg="#666666", 
                                    bg="#1a1a1a", borderwidth=0, font=("Courier New", 12), state="disabled")
         self.line_nums_r.grid(row=0, column=2, sticky="ns")
 
-        self.txt_right = tk.Text(self.main_container, wrap="none", bg="#242424", fg="#ffffff", 
+        self.txt_right = tk.Text(self.main_container, wrap="none", bg="#242424", fg="#ffffff", pady=TEXT_PADY,
                                  font=("Courier New", 12), borderwidth=0, state="disabled")
         self.txt_right.grid(row=0, column=3, sticky="nsew")
 
-        # Shared Scrollbar
+        # Shared Scrollbar, driven by the row count of the diff: the text
+        # widgets only ever hold the rows currently on screen
         self.master_scroll = ctk.CTkScrollbar(self.main_container, command=self.sync_scroll)
         self.master_scroll.grid(row=0, column=4, sticky="ns")
-        
-        # Linking scrolling
-        self.txt_left.config(yscrollcommand=self.master_scroll.set)
-        self.txt_right.config(yscrollcommand=self.master_scroll.set)
+
+        self.views = (self.line_nums_l, self.txt_left, self.line_nums_r, self.txt_right)
+        for w in self.views:
+            w.bind("<MouseWheel>", self._on_wheel)
+            w.bind("<Button-4>", lambda e: self._scroll_rows(-3))
+            w.bind("<Button-5>", lambda e: self._scroll_rows(3))
+        self.main_container.bind("<Configure>", lambda e: self._render())
+        self.bind("<Prior>", lambda e: self._scroll_rows(-self._visible_rows()))
+        self.bind("<Next>", lambda e: self._scroll_rows(self._visible_rows()))
 
         # --- Footer (Status Bar) ---
         self.status_frame = ctk.CTkFrame(self, height=35, fg_color="#1a1a1a")
@@ -75,25 +110,99 @@ class NJOYProDiff(ctk.CTk):
         # --- Internal Logic ---
         self.file1_content = []
         self.file2_content = []
+        self.diff = None
+        self.diff_token = 0  # comparison in progress: results of older ones are dropped
+        self.top_row = 0  # first aligned row on screen
+        self.line_height = tkfont.Font(font=("Courier New", 12)).metrics("linespace")
 
         # Highlighting Styles
         self.txt_left.tag_config("removal", background="#4a2c2c", foreground="#ff9999")
         self.txt_right.tag_config("addition", background="#2c4a2c", foreground="#99ff99")
+        for w in (self.txt_left, self.txt_right):
+            w.tag_config("tolerance", foreground="#d9c27a")
+
+    # --- Virtual Scrolling ---
+
+    def _total_rows(self): return len(self.diff.status) if self.diff else 0
+
+    def _visible_rows(self):
+        return max(1, (self.txt_left.winfo_height() - 2 * TEXT_PADY) // self.line_height)
 
     def sync_scroll(self, *args):
-        """Unified scrolling for all four text widgets."""
-        self.txt_left.yview(*args)
-        self.txt_right.yview(*args)
-        self.line_nums_l.yview(*args)
-        self.line_nums_r.yview(*args)
+        """Scrollbar commands ('moveto' fraction / 'scroll' n units|pages) mapped to rows."""
+        if not self.diff: return
+        if args[0] == "moveto":
+            self.top_row = int(float(args[1]) * self._total_rows())
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self._visible_rows() if args[2] == "pages" else 1)
+            self.top_row += step
+        self._render()
+
+    def _on_wheel(self, event):
+        self._scroll_rows(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _scroll_rows(self, n):
+        self.top_row += n
+        self._render()
+        return "break"
+
+    def _render(self):
+        """Fills the four text widgets with the rows of the current window only."""
+        total = self._total_rows()
+        visible = self._visible_rows()
+        self.top_row = max(0, min(self.top_row, total - visible))
+        if total:
+            self.master_scroll.set(self.top_row / total, min(1.0, (self.top_row + visible) / total))
+        else:
+            self.master_scroll.set(0.0, 1.0)
+
+        diff = self.diff
+        rows = range(self.top_row, min(total, self.top_row + visible + 1))
+        num_l, num_r, text_l, text_r = [], [], [], []
+        marks = {"removal": [], "addition": [], "tolerance": []}
+        for line, row in enumerate(rows, start=1):
+            i, j, status = diff.left[row], diff.right[row], diff.status[row]
+            num_l.append(str(i + 1) if i >= 0 else " ")
+            num_r.append(str(j + 1) if j >= 0 else " ")
+            text_l.append(self.file1_content[i] if i >= 0 else "")
+            text_r.append(self.file2_content[j] if j >= 0 else "")
+            if status in (REMOVED, CHANGED): marks["removal"].append(line)
+            if status in (ADDED, CHANGED): marks["addition"].append(line)
+            if status == CLOSE: marks["tolerance"].append(line)
+
+        for w, lines in zip(self.views, (num_l, text_l, num_r, text_r)):
+            w.config(state="normal")
+            w.delete("1.0", tk.END)
+            w.insert("1.0", "\n".join(lines))
+
+        for w, tag in ((self.txt_left, "removal"), (self.txt_right, "addition"), (self.txt_left, "tolerance"), (self.txt_right, "tolerance")):
+            for line in marks[tag]: w.tag_add(tag, f"{line}.0", f"{line + 1}.0")
+
+        for w in self.views: w.config(state="disabled")
+
+    def jump_difference(self, direction):
+        """Scrolls to the next (1) or previous (-1) hunk of differing rows."""
+        if not self.diff: return
+        hunks = self.diff.hunks()
+        if not hunks:
+            self.lbl_stats.configure(text="No differences beyond the tolerances.")
+            return
+        starts = [h[0] for h in hunks]
+        anchor = self.top_row + 3  # hunks are shown with 3 rows of context above
+        if direction > 0: k = bisect.bisect_right(starts, anchor)
+        else: k = bisect.bisect_left(starts, anchor) - 1
+        k = max(0, min(k, len(hunks) - 1))
+        self.top_row = starts[k] - 3
+        self._render()
+        self.lbl_stats.configure(text=f"Difference {k + 1}/{len(hunks)} (row {starts[k] + 1}). {self.diff.describe()}")
 
     def load_file(self, slot):
         path = filedialog.askopenfilename(title=f"Select File {slot}")
         if not path: return
         
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                content = f.readlines()
+            content = read_lines(path)
         except Exception as e:
             self.lbl_stats.configure(text=f"Error: Could not read file. {e}")
             return
@@ -109,58 +218,62 @@ class NJOYProDiff(ctk.CTk):
             self.run_diff()
 
     def run_diff(self):
-        """Calculates differences and populates the UI."""
-        # Unlock all
-        for w in [self.txt_left, self.txt_right, self.line_nums_l, self.line_nums_r]:
-            w.config(state="normal")
-            w.delete("1.0", tk.END)
+        """Compares the files section by section in a worker thread; _diff_done() shows the result."""
+        if not (self.file1_content and self.file2_content): return
+        try:
+            rel_tol, abs_tol = float(self.ent_rel_tol.get()), float(self.ent_abs_tol.get())
+        except ValueError:
+            self.lbl_stats.configure(text="Error: tolerances must be numbers.")
+            return
+
+        self.lbl_stats.configure(text="Comparing...")
+        self.btn_compare.configure(state="disabled")
+        self.diff_token += 1
+        token, left, right = self.diff_token, self.file1_content, self.file2_content
+
+        def worker():
+            try: diff, error = TapeDiff(left, right, rel_tol, abs_tol), None
+            except Exception as e: diff, error = None, e
+            self.after(0, lambda: self._diff_done(token, diff, error))
 
-        d = difflib.Differ()
-        diff = list(d.compare(self.file1_content, self.file2_content))
-
-        ln_l, ln_r = 1, 1
-        total_diffs = 0
-
-        for line in diff:
-            status = line[0]
-            text = line[2:]
-
-            if status == ' ': # Matching
-                self.line_nums_l.insert(tk.END, f"{ln_l}\n")
-                self.line_nums_r.insert(tk.END, f"{ln_r}\n")
-                self.txt_left.insert(tk.END, text)
-                self.txt_right.insert(tk.END, text)
-                ln_l += 1; ln_r += 1
-            elif status == '-': # Deletion
-                total_diffs += 1
-                self.line_nums_l.insert(tk.END, f"{ln_l}\n")
-                self.line_nums_r.insert(tk.END, " \n") # Keep sync
-                self.txt_left.insert(tk.END, text, "removal")
-                self.txt_right.insert(tk.END, "\n")
-                ln_l += 1
-            elif status == '+': # Addition
-                total_diffs += 1
-                self.line_nums_l.insert(tk.END, " \n") # Keep sync
-                self.line_nums_r.insert(tk.END, f"{ln_r}\n")
-                self.txt_left.insert(tk.END, "\n")
-                self.txt_right.insert(tk.END, text, "addition")
-                ln_r += 1
-
-        # Re-lock all
-        for w in [self.txt_left, self.txt_right, self.line_nums_l, self.line_nums_r]:
-            w.config(state="disabled")
-
-        self.lbl_stats.configure(text=f"Analysis Complete: Found {total_diffs} differences.")
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _diff_done(self, token, diff, error):
+        """Shows the comparison computed by run_diff() (Tk thread), unless a newer one was started."""
+        if token != self.diff_token: return
+        self.btn_compare.configure(state="normal")
+        if error is not None:
+            self.lbl_stats.configure(text=f"Error: comparison failed. {error}")
+            return
+        self.diff = diff
+        self.top_row = 0
+        self._render()
+
+        changed = sum(1 for s in diff.status if s not in (SAME, CLOSE))
+        self.lbl_stats.configure(text=f"Analysis Complete: {changed} differing lines in {len(diff.hunks())} blocks. {diff.describe()}")
+
+    def show_summary(self):
+        """Per-section table of the last comparison."""
+        if self.diff is None:
+            self.lbl_stats.configure(text="Status: Load both files first.")
+            return
+        win = ctk.CTkToplevel(self)
+        win.title("Section Summary")
+        win.geometry("760x500")
+        box = ctk.CTkTextbox(win, font=("Courier New", 12), wrap="none")
+        box.pack(fill="both", expand=True, padx=10, pady=10)
+        box.insert("1.0", self.diff.describe() + "\n\n" + self.diff.summary())
+        box.configure(state="disabled")
 
     def reset_session(self):
         """Clears memory and wipes the UI for a fresh comparison."""
         self.file1_content = []
         self.file2_content = []
-        
-        for w in [self.txt_left, self.txt_right, self.line_nums_l, self.line_nums_r]:
-            w.config(state="normal")
-            w.delete("1.0", tk.END)
-            w.config(state="disabled")
+        self.diff = None
+        self.diff_token += 1
+        self.btn_compare.configure(state="normal")
+        self.top_row = 0
+        self._render()
             
         self.lbl_stats.configure(text="Session Reset. Load new files.")
 
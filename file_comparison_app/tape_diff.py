@@ -0,0 +1,239 @@
+import difflib
+from array import array
+from collections import namedtuple
+
+# ==============================================================================
+# SECTION-AWARE TAPE DIFF
+# ==============================================================================
+# ENDF/PENDF/GENDF records carry MAT (columns 67-70), MF (71-72) and MT
+# (73-75). Both files are cut into sections on those keys, sections are
+# aligned by key, and only sections whose numbers differ beyond the
+# tolerances get a line diff. Other text files form a single section.
+
+# Status of a section / of an aligned row
+SAME, CLOSE, CHANGED, REMOVED, ADDED = range(5)
+STATUS_NAMES = ("identical", "within tolerance", "differs", "only in base", "only in comparison")
+
+DEFAULT_REL_TOL = 1e-6   # one unit in the 7th significant digit
+DEFAULT_ABS_TOL = 0.0
+
+SectionDiff = namedtuple("SectionDiff", "mat mf mt status a_start a_end b_start b_end max_abs max_rel changed")
+
+
+def _number(text):
+    """Float of an ENDF field or a plain token ("6.315200+4", "-1.2-5", "3.0E+2"), None otherwise."""
+    text = text.strip()
+    if not text: return 0.0
+    try: return float(text)
+    except ValueError: pass
+    for i in range(len(text) - 1, 0, -1):
+        if text[i] in "+-" and text[i - 1] not in "eE":
+            try: return float(text[:i] + "e" + text[i:])
+            except ValueError: return None
+    return None
+
+
+def _endf_key(line):
+    """(MAT, MF, MT) of an ENDF record, None for any other line."""
+    if len(line) < 75: return None
+    try: return int(line[66:70]), int(line[70:72]), int(line[72:75])
+    except ValueError: return None
+
+
+def split_sections(lines):
+    """
+    [(key, start, end)] with key = (MAT, MF, MT, occurrence). SEND/FEND/
+    MEND/TEND records (MT = 0) stay with the section they close; lines
+    that are not ENDF records are grouped under MAT/MF/MT = None.
+    """
+    blocks = []
+    seen = {}
+    current, start = None, 0
+    for i, line in enumerate(lines):
+        key = _endf_key(line)
+        if key is not None and key[2] == 0 and current is not None and current[0] is not None:
+            continue  # control record: closes the current section
+        if key is None: key = (None, None, None)
+        if key != current:
+            if current is not None: blocks.append((current, start, i))
+            current, start = key, i
+    if current is not None: blocks.append((current, start, len(lines)))
+
+    sections = []
+    for key, s, e in blocks:
+        n = seen.get(key, 0)
+        seen[key] = n + 1
+        sections.append((key + (n,), s, e))
+    return sections
+
+
+def compare_lines(a, b, rel_tol=DEFAULT_REL_TOL, abs_tol=DEFAULT_ABS_TOL):
+    """
+    (within tolerance, max abs deviation, max rel deviation) of two lines.
+    ENDF records are compared field by field (six 11-column fields plus
+    MAT/MF/MT), other lines token by token; non-numeric text must match.
+    """
+    if _endf_key(a) is not None and _endf_key(b) is not None:
+        if a[66:75] != b[66:75]: return False, 0.0, 0.0
+        fields_a = [a[k:k + 11] for k in range(0, 66, 11)]
+        fields_b = [b[k:k + 11] for k in range(0, 66, 11)]
+    else:
+        fields_a, fields_b = a.split(), b.split()
+        if len(fields_a) != len(fields_b): return False, 0.0, 0.0
+
+    ok, max_abs, max_rel = True, 0.0, 0.0
+    for fa, fb in zip(fields_a, fields_b):
+        if fa == fb: continue
+        xa, xb = _number(fa), _number(fb)
+        if xa is None or xb is None:
+            if fa.strip() != fb.strip(): ok = False
+            continue
+        dev = abs(xa - xb)
+        scale = max(abs(xa), abs(xb))
+        rel = dev / scale if scale else 0.0
+        max_abs, max_rel = max(max_abs, dev), max(max_rel, rel)
+        if dev > abs_tol and dev > rel_tol * scale: ok = False
+    return ok, max_abs, max_rel
+
+
+class TapeDiff:
+    """
+    Comparison of two files (lists of lines).
+
+    sections: SectionDiff per aligned section, in file order.
+    left, right, status: the aligned rows of the side-by-side view, as
+    parallel arrays (line index in each file or -1, row status).
+    """
+
+    def __init__(self, lines_a, lines_b, rel_tol=DEFAULT_REL_TOL, abs_tol=DEFAULT_ABS_TOL):
+        self.lines_a = lines_a
+        self.lines_b = lines_b
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+        self.sections = []
+        self.left, self.right, self.status = array("i"), array("i"), array("b")
+        self._hunks = None
+        self._run()
+
+    # --- Rows ---
+
+    def _rows(self, a_start, b_start, n, status):
+        self.left.extend(range(a_start, a_start + n))
+        self.right.extend(range(b_start, b_start + n))
+        self.status.extend([status] * n)
+
+    def _one_sided(self, start, n, status):
+        idx = range(start, start + n)
+        none = [-1] * n
+        self.left.extend(idx if status == REMOVED else none)
+        self.right.extend(idx if status == ADDED else none)
+        self.status.extend([status] * n)
+
+    # --- Alignment ---
+
+    def _run(self):
+        sec_a, sec_b = split_sections(self.lines_a), split_sections(self.lines_b)
+        matcher = difflib.SequenceMatcher(None, [k for k, _, _ in sec_a], [k for k, _, _ in sec_b], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                for (key, as_, ae), (_, bs, be) in zip(sec_a[i1:i2], sec_b[j1:j2]):
+                    self._compare_section(key, as_, ae, bs, be)
+                continue
+            for key, s, e in sec_a[i1:i2]:
+                self.sections.append(SectionDiff(*key[:3], REMOVED, s, e, -1, -1, 0.0, 0.0, e - s))
+                self._one_sided(s, e - s, REMOVED)
+            for key, s, e in sec_b[j1:j2]:
+                self.sections.append(SectionDiff(*key[:3], ADDED, -1, -1, s, e, 0.0, 0.0, e - s))
+                self._one_sided(s, e - s, ADDED)
+
+    def _compare_section(self, key, as_, ae, bs, be):
+        a, b = self.lines_a[as_:ae], self.lines_b[bs:be]
+        if a == b:
+            self.sections.append(SectionDiff(*key[:3], SAME, as_, ae, bs, be, 0.0, 0.0, 0))
+            self._rows(as_, bs, ae - as_, SAME)
+            return
+
+        if len(a) == len(b):
+            # Same layout: pair the records, which is all float noise needs
+            pairs = [((0, 0, len(a)), None)]
+        else:
+            pairs = []
+            for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+                pairs.append(((i1, j1, min(i2 - i1, j2 - j1)), (tag, i1, i2, j1, j2)))
+
+        changed, max_abs, max_rel = 0, 0.0, 0.0
+        for (i, j, n), op in pairs:
+            for k in range(n):
+                la, lb = a[i + k], b[j + k]
+                if la == lb: row = SAME
+                else:
+                    ok, dev, rel = compare_lines(la, lb, self.rel_tol, self.abs_tol)
+                    max_abs, max_rel = max(max_abs, dev), max(max_rel, rel)
+                    row = CLOSE if ok else CHANGED
+                    if not ok: changed += 1
+                self.left.append(as_ + i + k)
+                self.right.append(bs + j + k)
+                self.status.append(row)
+            if op is not None:
+                _, i1, i2, j1, j2 = op
+                # Unpaired rest of a replace / delete / insert block
+                if i2 - i1 > n:
+                    self._one_sided(as_ + i1 + n, i2 - i1 - n, REMOVED)
+                    changed += i2 - i1 - n
+                if j2 - j1 > n:
+                    self._one_sided(bs + j1 + n, j2 - j1 - n, ADDED)
+                    changed += j2 - j1 - n
+
+        status = CHANGED if changed else CLOSE
+        self.sections.append(SectionDiff(*key[:3], status, as_, ae, bs, be, max_abs, max_rel, changed))
+
+    # --- Results ---
+
+    def counts(self):
+        """{status: number of sections}."""
+        counts = dict.fromkeys(range(len(STATUS_NAMES)), 0)
+        for sec in self.sections: counts[sec.status] += 1
+        return counts
+
+    def differing(self):
+        return [sec for sec in self.sections if sec.status in (CHANGED, REMOVED, ADDED)]
+
+    def hunks(self):
+        """[(first row, end row)] of the runs of rows that differ beyond the tolerances (computed once)."""
+        if self._hunks is None:
+            self._hunks = []
+            start = None
+            for row, status in enumerate(self.status):
+                if status in (CHANGED, REMOVED, ADDED):
+                    if start is None: start = row
+                elif start is not None:
+                    self._hunks.append((start, row))
+                    start = None
+            if start is not None: self._hunks.append((start, len(self.status)))
+        return self._hunks
+
+    def describe(self):
+        """One-line outcome for status bars."""
+        c = self.counts()
+        parts = [f"{c[s]} {STATUS_NAMES[s]}" for s in range(len(STATUS_NAMES)) if c[s]]
+        return f"{len(self.sections)} sections: " + ", ".join(parts)
+
+    def summary(self, only_differences=False):
+        """Per-section table as text."""
+        rows = [f"{'MAT':>5} {'MF':>3} {'MT':>4}  {'Status':<20} {'Lines':>8} {'Max rel':>10} {'Max abs':>10}"]
+        for sec in self.sections:
+            if only_differences and sec.status in (SAME, CLOSE): continue
+            mat, mf, mt = ("-" if v is None else v for v in (sec.mat, sec.mf, sec.mt))
+            lines = (sec.a_end - sec.a_start) if sec.a_start >= 0 else (sec.b_end - sec.b_start)
+            rows.append(f"{mat:>5} {mf:>3} {mt:>4}  {STATUS_NAMES[sec.status]:<20} {lines:>8} "
+                        f"{sec.max_rel:>10.3e} {sec.max_abs:>10.3e}")
+        return "\n".join(rows)
+
+
+def read_lines(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read().splitlines()
+
+
+def diff_files(path_a, path_b, rel_tol=DEFAULT_REL_TOL, abs_tol=DEFAULT_ABS_TOL):
+    return TapeDiff(read_lines(path_a), read_lines(path_b), rel_tol, abs_tol)
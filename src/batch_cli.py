@@ -0,0 +1,120 @@
+"""
+Headless batch runner (no tkinter import, usable on display-less nodes).
+
+Usage:
+    python batch_cli.py project.json sweep.json [--exe njoy21] [--output DIR] [--workers N]
+
+project.json is a project saved from the GUI ("Save Project").
+sweep.json describes the variables to vary and the tapes to stage:
+
+{
+    "variables": [
+        {"module": 2, "card": "c4_1", "input": "temp_1", "values": ["300", "600", "900"]},
+        {"module": 1, "card": "c1", "input": "nendf", "values": ["/lib/U235.endf", "/lib/U238.endf"]}
+    ],
+    "tapes": {"20": "/lib/U235.endf"},
+    "exe": "njoy21",
+    "output_dir": "njoy_seq_runs",
+    "max_workers": 8,
+    "subset_tapes": true
+}
+
+"module" is the 1-based position of the module in the project (as shown in
+the Sequential Runner, e.g. "[2] BROADR"). Command line options override the
+values of the sweep file. With --subset-tapes (or "subset_tapes"), each job
+receives only the materials its deck references (RECONR mat_i, BROADR
+mat1_i, ...) instead of a copy of the whole library tape.
+
+Every batch journals its jobs in <output>/batch_manifest.jsonl. After an
+interruption, rerun the same command with --resume: jobs that finished are
+skipped, the others (including the ones cut mid-run) are run again.
+"""
+import argparse
+import json
+import os
+import sys
+
+from engine.project_state import load_project_file
+from engine.sweep_plan import SweepPlan
+from engine.batch import define_variable, run_batch
+from engine.batch_manifest import BatchManifest, MANIFEST_NAME
+from engine.parallel_runner import ParallelJobRunner, default_max_workers
+from engine.run_cache import RunCache, DEFAULT_CACHE_DIR
+from engine.tape_staging import STRATEGIES
+
+
+def load_sweep(spec, modules):
+    defined_vars = []
+    for var in spec.get("variables", []):
+        defined_vars.append(define_variable(modules, int(var["module"]) - 1, var["card"], var["input"], var["values"]))
+    return defined_vars
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an NJOY_Able parametric sweep without the GUI.")
+    parser.add_argument("project", help="Project JSON saved by the GUI")
+    parser.add_argument("sweep", help="Sweep specification JSON")
+    parser.add_argument("--exe", help="NJOY executable")
+    parser.add_argument("--output", help="Output root directory")
+    parser.add_argument("--workers", type=int, help="Parallel NJOY processes (default: one per core)")
+    parser.add_argument("--staging", choices=STRATEGIES, default="auto", help="Tape staging strategy")
+    parser.add_argument("--subset-tapes", action="store_true", help="Stage only the referenced MATs of library tapes")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Result cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="Always run NJOY, ignore the result cache")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the planned jobs")
+    parser.add_argument("--resume", action="store_true", help="Continue the batch journaled in the output directory")
+    args = parser.parse_args(argv)
+
+    with open(args.sweep, "r") as f: spec = json.load(f)
+    modules = load_project_file(args.project)
+    if not modules:
+        print(f"No modules found in {args.project}", file=sys.stderr)
+        return 2
+
+    plan = SweepPlan(load_sweep(spec, modules))
+    if not len(plan):
+        print("Sweep specification defines no jobs.", file=sys.stderr)
+        return 2
+
+    exe = args.exe or spec.get("exe", "njoy21")
+    out_root = os.path.abspath(args.output or spec.get("output_dir", "njoy_seq_runs"))
+    workers = args.workers or spec.get("max_workers") or default_max_workers()
+    user_tapes = {int(unit): path for unit, path in spec.get("tapes", {}).items()}
+
+    manifest = BatchManifest(out_root)
+    if args.resume:
+        manifest = BatchManifest.load(out_root)
+        if manifest.plan_record is None:
+            print(f"No {MANIFEST_NAME} in {out_root}, nothing to resume.", file=sys.stderr)
+            return 2
+        if manifest.plan_record["plan"]["variables"] != json.loads(json.dumps(plan.to_dict()["variables"])):
+            print("The sweep specification differs from the journaled batch, cannot resume.", file=sys.stderr)
+            return 2
+        plan = manifest.plan()
+
+    if args.dry_run:
+        for run in plan: print(f"{run['id']:>8}  {run['folder']}")
+        return 0
+
+    cache = None if args.no_cache else RunCache(args.cache_dir)
+    runner = ParallelJobRunner(exe, workers, cache=cache)
+    print(f"Launching {len(plan)} jobs on {runner.max_workers} workers -> {out_root}")
+
+    def report(event, finished, total):
+        if event[0] == "finished":
+            state = event[3] if event[2] else f"FAILED ({event[3]})"
+            print(f"[{finished}/{total}] job {event[1]}: {state}", flush=True)
+            for note in event[4].get("notes", []): print(f"    {note}")
+
+    subset = args.subset_tapes or bool(spec.get("subset_tapes", False))
+    success, total, skipped = run_batch(modules, plan, user_tapes, out_root, runner, args.staging, on_event=report,
+                                        manifest=manifest, resume=args.resume, subset=subset, on_message=print)
+    print(f"Batch completed. Successful: {success}/{total}" + (f" ({skipped} already done)" if skipped else ""))
+    if cache is not None and cache.store_failures:
+        stats = cache.stats()
+        print(f"Run cache: {stats['store_failures']} results not stored (last error: {stats['last_store_error']})")
+    return 0 if success == total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,34 @@
+import threading
 from typing import List, Callable, Optional, Union
 
 # ==============================================================================
 # 1. CORE LOGIC CLASSES
 # ==============================================================================
+_tracking = threading.local()  # per thread: .stack of sets collecting the NjoyInput objects read, see track_reads
+
+
+def _read_stack():
+    stack = getattr(_tracking, "stack", None)
+    if stack is None: stack = _tracking.stack = []
+    return stack
+
+
+class track_reads:
+    """
+    Records the inputs whose value is read inside the block, by this thread
+    only (decks written by worker threads do not leak into the UI's records):
+        with track_reads() as reads: card.active_if()
+    """
+    def __enter__(self):
+        self.reads = set()
+        _read_stack().append(self.reads)
+        return self.reads
+
+    def __exit__(self, *exc):
+        _read_stack().pop()
+        return False
+
+
 class NjoyInput:
     def __init__(self, name: str, description: str = "", default_value: any = None, 
                  rule: Callable[[any], bool] = lambda x: True, ref: str = "",
@@ -19,20 +45,40 @@ class NjoyInput:
         self.options = options
         self.hidden_in_file = hidden_in_file     # <--- STORE IT
         self.status = True       
+        self.rule_reads = set()  # other inputs read by the rule at its last evaluation
+
+    @property
+    def value(self):
+        stack = getattr(_tracking, "stack", None)
+        if stack:
+            for reads in stack: reads.add(self)
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
 
     def validate(self) -> bool:
-        try:
-            if not self.rule(self.value):
+        with track_reads() as reads:
+            try:
+                if not self.rule(self.value):
+                    self.status = False
+                else:
+                    self.status = True
+            except Exception:
                 self.status = False
-            else:
-                self.status = True
-        except Exception:
-            self.status = False
+        reads.discard(self)
+        self.rule_reads = reads
         return self.status
 
+    @staticmethod
+    def format_value(value) -> str:
+        """Deck text of a value (shared with the compiled deck templates)."""
+        if value is None: return ""
+        return str(value)
+
     def get_string_value(self) -> str:
-        if self.value is None: return ""
-        return str(self.value)
+        return self.format_value(self.value)
 
 class NjoyCard:
     def __init__(self, name: str, description: str = "", ref: str = "", active_if=None):
@@ -41,12 +87,20 @@ class NjoyCard:
         self.ref = ref
         self.inputs: List[NjoyInput] = [] 
         self.active_if = active_if
+        self.active_reads = set()  # inputs read by active_if at its last evaluation
 
     def add_input(self, inp: NjoyInput):
         self.inputs.append(inp)
         setattr(self, inp.name, inp)
         return inp 
 
+    def is_active(self) -> bool:
+        """active_if() evaluated while recording the inputs it reads (active_reads)."""
+        if self.active_if is None: return True
+        with track_reads() as reads:
+            try: return bool(self.active_if())
+            finally: self.active_reads = reads
+
     def write(self) -> Optional[str]:
             # 1. Check if the whole card is active
             if self.active_if and not self.active_if(): 
@@ -58,4 +112,24 @@ class NjoyCard:
                 if not inp.hidden_in_file:  # <--- FILTER HERE
                     values.append(inp.get_string_value())
             
-            return " ".join(values) +"/"
\ No newline at end of file
+            return " ".join(values) +"/"
+
+class DependencyIndex:
+    """
+    Which predicates read which inputs: keys are NjoyCard (active_if) or
+    NjoyInput (rule) objects, recorded from their last evaluation, so an
+    edit only re-evaluates the predicates that read the edited inputs.
+    """
+    def __init__(self):
+        self._reads = {}    # key -> inputs read
+        self._readers = {}  # input -> keys
+
+    def record(self, key, reads):
+        for inp in self._reads.get(key, ()): self._readers[inp].discard(key)
+        self._reads[key] = set(reads)
+        for inp in reads: self._readers.setdefault(inp, set()).add(key)
+
+    def readers(self, inputs) -> set:
+        found = set()
+        for inp in inputs: found |= self._readers.get(inp, set())
+        return found
@@ -0,0 +1,189 @@
+import hashlib
+import math
+import multiprocessing
+import os
+import struct
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from endf_tools.tape_index import TapeIndex, Section, Material, index_tape
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".njoy_able", "index_cache")
+DEFAULT_MAX_BYTES = 256 * 1024**2  # 256 MB
+
+# Binary layout (little endian):
+#   header   magic, version, size, mtime_ns, n_sections, n_materials
+#   strings  path, tpid, kind (u16 length + utf-8)
+#   records  Section (mat, mf, mt, offset, length, lines), Material (mat, za, awr, temp, first, last)
+_MAGIC = b"NJIX"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHqqII")
+_SECTION = struct.Struct("<ihhqqi")
+_MATERIAL = struct.Struct("<idddII")
+_STR_LEN = struct.Struct("<H")
+
+
+def _pack_str(text):
+    data = text.encode("utf-8")
+    return _STR_LEN.pack(len(data)) + data
+
+
+def _unpack_str(buf, pos):
+    (n,) = _STR_LEN.unpack_from(buf, pos)
+    pos += _STR_LEN.size
+    return buf[pos:pos + n].decode("utf-8"), pos + n
+
+
+def _num(value): return float("nan") if value is None else float(value)
+
+def _opt(value): return None if math.isnan(value) else value
+
+
+def encode_index(index):
+    parts = [_HEADER.pack(_MAGIC, _VERSION, index.size, index.mtime_ns, len(index.sections), len(index.materials)),
+             _pack_str(index.path), _pack_str(index.tpid), _pack_str(index.kind)]
+    parts += [_SECTION.pack(*sec) for sec in index.sections]
+    parts += [_MATERIAL.pack(m.mat, _num(m.za), _num(m.awr), _num(m.temp), m.first, m.last) for m in index.materials]
+    return b"".join(parts)
+
+
+def decode_index(buf):
+    magic, version, size, mtime_ns, n_sec, n_mat = _HEADER.unpack_from(buf, 0)
+    if magic != _MAGIC or version != _VERSION: raise ValueError("Not a tape index file")
+    pos = _HEADER.size
+    path, pos = _unpack_str(buf, pos)
+    tpid, pos = _unpack_str(buf, pos)
+    kind, pos = _unpack_str(buf, pos)
+    end = pos + n_sec * _SECTION.size
+    sections = [Section(*rec) for rec in _SECTION.iter_unpack(buf[pos:end])]
+    materials = [Material(mat, _opt(za), _opt(awr), _opt(temp), first, last)
+                 for mat, za, awr, temp, first, last in _MATERIAL.iter_unpack(buf[end:end + n_mat * _MATERIAL.size])]
+    return TapeIndex(path, size, mtime_ns, tpid, kind, sections, materials)
+
+
+class IndexCache:
+    """
+    On-disk store of TapeIndex objects in a compact binary form.
+
+    Entries are keyed by the tape identity (absolute path, size, mtime):
+    an edited or replaced tape simply misses and is indexed again. The
+    store is trimmed least-recently-used first above `max_bytes`.
+    """
+
+    def __init__(self, root=DEFAULT_INDEX_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.store_failures = 0
+        self.last_store_error = None
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry_path(self, path, st):
+        ident = f"{os.path.abspath(path)}\0{st.st_size}\0{st.st_mtime_ns}"
+        return os.path.join(self.root, hashlib.sha1(ident.encode("utf-8")).hexdigest() + ".idx")
+
+    def get(self, path):
+        try:
+            st = os.stat(path)
+            entry = self._entry_path(path, st)
+            with open(entry, "rb") as f: index = decode_index(f.read())
+            os.utime(entry)  # LRU bookkeeping
+        except (OSError, ValueError, struct.error):
+            return None
+        index.path = path
+        return index
+
+    def put(self, index, evict=True):
+        """Stores `index`. Returns False when the entry could not be written (counted in store_failures)."""
+        try:
+            st = os.stat(index.path)
+            if (st.st_size, st.st_mtime_ns) != (index.size, index.mtime_ns): return True  # changed while indexing
+            entry = self._entry_path(index.path, st)
+            tmp = f"{entry}.tmp{os.getpid()}_{threading.get_ident()}"
+            with open(tmp, "wb") as f: f.write(encode_index(index))
+            os.replace(tmp, entry)
+        except OSError as e:
+            with self._lock:
+                self.store_failures += 1
+                self.last_store_error = str(e)
+            return False
+        if evict: self.evict()
+        return True
+
+    def evict(self):
+        """Drops least-recently-used entries until the store fits in max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.root):
+                if not name.endswith(".idx"): continue
+                try: st = os.stat(os.path.join(self.root, name))
+                except OSError: continue
+                entries.append((st.st_mtime, st.st_size, name))
+                total += st.st_size
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes: break
+                try: os.remove(os.path.join(self.root, name))
+                except OSError: continue
+                total -= size
+
+    def load_or_index(self, path):
+        """Cached index of `path`, building and storing it on a miss."""
+        index = self.get(path)
+        if index is None:
+            index = index_tape(path)
+            self.put(index)
+        return index
+
+
+def _index_quietly(path):
+    try: return index_tape(path)
+    except (OSError, ValueError): return None
+
+
+def index_directory(directory, cache=None, max_workers=None, recursive=True):
+    """
+    Indexes every file of a library directory. Cached tapes are served
+    from `cache`, the others are indexed in a process pool and stored.
+    Returns ({path: TapeIndex}, counts); unreadable files and files without
+    ENDF sections are left out. counts = {"cached": cache hits, "indexed",
+    "unreadable", "store_failures": indexes that could not be cached,
+    "last_error": the last store error or None}.
+    """
+    cache = cache or IndexCache()
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        paths += [os.path.join(dirpath, n) for n in sorted(filenames) if not n.startswith(".")]
+        if not recursive: break
+
+    indexes, missing = {}, []
+    for path in paths:
+        index = cache.get(path)
+        if index is None: missing.append(path)
+        else: indexes[path] = index
+    counts = {"cached": len(indexes), "indexed": 0, "unreadable": 0, "store_failures": 0, "last_error": None}
+
+    if missing:
+        # spawn: never fork a process running Tk threads
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for path, index in zip(missing, pool.map(_index_quietly, missing, chunksize=4)):
+                if index is None:
+                    counts["unreadable"] += 1
+                    continue
+                counts["indexed"] += 1
+                if not cache.put(index, evict=False):
+                    counts["store_failures"] += 1
+                    counts["last_error"] = cache.last_store_error
+                indexes[path] = index
+        cache.evict()
+
+    return {p: ix for p, ix in indexes.items() if ix.sections}, counts
+
+
+if __name__ == "__main__":
+    # Warms the cache for a library directory: python -m endf_tools.index_cache /data/endfb8
+    for folder in sys.argv[1:]:
+        found, counts = index_directory(folder)
+        print(f"{folder}: {len(found)} tapes indexed ({counts['cached']} from cache)")
+        if counts["store_failures"]: print(f"  {counts['store_failures']} not cached: {counts['last_error']}")
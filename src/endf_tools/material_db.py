@@ -0,0 +1,102 @@
+import os
+import re
+from collections import namedtuple
+
+# ==============================================================================
+# MATERIAL DATABASE (built from the indexes of the loaded tapes)
+# ==============================================================================
+
+ELEMENTS = ("n H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co Ni Cu Zn Ga Ge As Se Br Kr "
+            "Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe Cs Ba La Ce Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm Yb "
+            "Lu Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po At Rn Fr Ra Ac Th Pa U Np Pu Am Cm Bk Cf Es Fm Md No Lr "
+            "Rf Db Sg Bh Hs Mt Ds Rg Cn Nh Fl Mc Lv Ts Og").split()
+
+# Inputs holding an ENDF MAT number (RECONR mat_i, BROADR mat1_i, MODER matd_i, PURR/UNRESR matd, ...)
+MATERIAL_INPUT_RE = re.compile(r"^(mat_\d+|mat1_\d+|matb|matd(_\d+)?)$")
+
+MaterialEntry = namedtuple("MaterialEntry", "mat za awr name temps mfmt tape unit")
+
+
+def is_material_input(name):
+    return bool(MATERIAL_INPUT_RE.match(name))
+
+
+def nuclide_name(za):
+    """'U-235', 'C-nat' from ZA = 1000*Z + A (None if unknown)."""
+    try: za = int(round(za))
+    except (TypeError, ValueError): return None
+    z, a = divmod(za, 1000)
+    if not 0 < z < len(ELEMENTS): return None
+    return f"{ELEMENTS[z]}-{a if a else 'nat'}"
+
+
+class MaterialDB:
+    """
+    Materials available on a set of tapes, one entry per (MAT, tape).
+
+    Lookups by MAT, ZA and name go through dictionaries; search() filters
+    on precomputed lower-case keys so it stays cheap for every keystroke
+    of the selection dialog, even with thousands of evaluations.
+    """
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.by_mat, self.by_za, self.by_name = {}, {}, {}
+        for e in self.entries:
+            self.by_mat.setdefault(e.mat, []).append(e)
+            if e.za is not None: self.by_za.setdefault(int(round(e.za)), []).append(e)
+            if e.name: self.by_name.setdefault(e.name.lower(), []).append(e)
+        self._labels = [self.label(e) for e in self.entries]
+        self._keys = [lbl.lower() for lbl in self._labels]
+
+    @classmethod
+    def from_indexes(cls, indexes):
+        """indexes: iterable of (unit, TapeIndex) pairs (unit may be None)."""
+        entries = []
+        for unit, index in indexes:
+            if not index: continue
+            blocks = {}
+            for m in index.materials: blocks.setdefault(m.mat, []).append(m)
+            for mat, mats in blocks.items():
+                first = mats[0]
+                mfmt = frozenset((s.mf, s.mt) for m in mats for s in index.material_sections(m))
+                temps = tuple(m.temp for m in mats if m.temp is not None)
+                entries.append(MaterialEntry(mat, first.za, first.awr, nuclide_name(first.za), temps, mfmt, index.path, unit))
+        return cls(entries)
+
+    def __len__(self): return len(self.entries)
+
+    # --- Lookups ---
+
+    def lookup(self, mat=None, za=None, name=None):
+        if mat is not None: return list(self.by_mat.get(int(mat), []))
+        if za is not None: return list(self.by_za.get(int(za), []))
+        if name is not None: return list(self.by_name.get(name.lower(), []))
+        return []
+
+    def has_reaction(self, mat, mf, mt):
+        return any((mf, mt) in e.mfmt for e in self.by_mat.get(int(mat), []))
+
+    # --- Selection List ---
+
+    @staticmethod
+    def label(entry):
+        files = sorted({mf for mf, _ in entry.mfmt})
+        temps = "/".join(f"{t:g}K" for t in entry.temps)
+        awr = f"{entry.awr:.4g}" if entry.awr is not None else "?"
+        za = int(round(entry.za)) if entry.za is not None else "?"
+        tape = f"tape{entry.unit}" if entry.unit is not None else os.path.basename(entry.tape)
+        parts = [entry.name or "?", f"ZA {za}", f"AWR {awr}"]
+        if temps: parts.append(temps)
+        parts.append("MF " + ",".join(map(str, files)))
+        return f"{entry.mat} : {' | '.join(parts)} [{tape}: {os.path.basename(entry.tape)}]"
+
+    def search(self, text=""):
+        """Labels matching the filter text (exact MAT/ZA hits first)."""
+        text = text.strip().lower()
+        if not text: return list(self._labels)
+        exact = []
+        if text.isdigit():
+            exact = [self.label(e) for e in self.by_mat.get(int(text), []) + self.by_za.get(int(text), [])]
+        found = [lbl for lbl, key in zip(self._labels, self._keys) if text in key and lbl not in exact]
+        return exact + found
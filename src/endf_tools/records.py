@@ -0,0 +1,326 @@
+import mmap
+from array import array
+from endf_tools.tape_index import endf_float
+
+# NumPy is optional: without it the same functions run a per-field loop
+# and return array('d') instead of numpy.ndarray.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ==============================================================================
+# BULK DECODING OF ENDF RECORDS
+# ==============================================================================
+# Data records hold six 11-column fields (columns 1-66). Reals are written
+# in Fortran style without "E" ("6.315200+4", "-1.2-5").
+
+FIELDS_PER_LINE = 6
+FIELD_WIDTH = 11
+SMALL_BUFFER = 4096  # below this the fixed cost of the array passes outweighs the per-field loop
+BLOCK_FIELDS = 65536  # fields decoded per pass, so the working arrays stay in cache
+
+_SPACE, _PLUS, _MINUS, _DOT = 32, 43, 45, 46
+
+if np is not None:
+    _POW10_FLOAT = np.array([10.0 ** i for i in range(23)])  # exact doubles
+    # Scale 10**k (|k| <= 22) of the standard layout at index 2 * (k + 22) + negative, split so
+    # that value = N * _SCALE_MUL / _SCALE_DIV with exact factors (one of them is 1)
+    _SCALE_K = np.arange(-22, 23)
+    _SCALE_MUL = np.repeat(np.where(_SCALE_K >= 0, 10.0 ** np.abs(_SCALE_K), 1.0), 2) * np.tile([1.0, -1.0], 45)
+    _SCALE_DIV = np.repeat(np.where(_SCALE_K < 0, 10.0 ** np.abs(_SCALE_K), 1.0), 2)
+
+
+def _fixed_records(data):
+    """True if every record of `data` has the length of the first one."""
+    rec = data.find(b"\n") + 1
+    if rec <= 0 or len(data) % rec: return False
+    return data[rec - 1::rec].count(b"\n") == len(data) // rec == data.count(b"\n")
+
+
+def _lines_array(data):
+    """(n_lines, 66) uint8 view of the data columns of the records in `data` (bytes)."""
+    if not data.endswith(b"\n"): data += b"\n"
+    rec = data.find(b"\n") + 1
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if rec > 66 and len(data) % rec == 0 and np.count_nonzero(raw == 10) == len(data) // rec:
+        records = raw.reshape(-1, rec)
+        if (records[:, -1] == 10).all(): return records[:, :66]  # same test as _fixed_records
+    # Irregular records (trimmed lines, mixed line endings): pad them first
+    lines = [line[:66].ljust(66) for line in data.splitlines()]
+    return np.frombuffer(b"".join(lines), dtype=np.uint8).reshape(-1, 66)
+
+
+def _fields_to_float(fields):
+    """Converts an (n, 11) uint8 array of ENDF fields to float64, BLOCK_FIELDS at a time."""
+    values = np.empty(fields.shape[0])
+    for start in range(0, fields.shape[0], BLOCK_FIELDS):
+        values[start:start + BLOCK_FIELDS] = _standard_to_float(fields[start:start + BLOCK_FIELDS])
+    return values
+
+
+def _standard_to_float(fields):
+    """
+    Converts the fields written in the standard layout "sd.ddddddse"
+    (sign or blank, one digit, point, digits, exponent sign followed by one
+    to three digits: what NJOY writes) in one pass over the columns. The
+    other fields go through _scan_to_float.
+
+    With the exponent sign zeroed, the digits read as one integer G whose
+    last digits are the exponent E; the mantissa is N = G - E (d.dddddd
+    times 10**8) and the value N * 10**(+-E - 8), N and the power of ten
+    being exact doubles for |+-E - 8| <= 22, so the single rounding gives
+    the same result as float().
+    """
+    columns = np.ascontiguousarray(fields.T)
+    digits = columns - np.uint8(48)  # wraps around for characters below '0'
+    ok = (columns[0] == _SPACE) | (columns[0] == _PLUS) | (columns[0] == _MINUS)
+    ok &= columns[2] == _DOT
+    for col in (1, 3, 4, 5, 6, 10): ok &= digits[col] < 10
+
+    # Exponent sign in column 7, 8 or 9 (exactly one), digits elsewhere
+    signs = [(columns[col] == _PLUS) | (columns[col] == _MINUS) for col in (7, 8, 9)]
+    for col, sign in zip((7, 8, 9), signs):
+        ok &= (digits[col] < 10) | sign
+        digits[col] *= ~sign
+    ok &= (signs[0].view(np.uint8) + signs[1].view(np.uint8) + signs[2].view(np.uint8)) == 1
+
+    # G: column 1 then the pairs of columns 3-4 ... 9-10 (each pair < 100 for valid fields)
+    pairs = digits[3::2] * np.uint8(10)
+    pairs += digits[4::2]
+    g = digits[1].astype(np.int32)
+    for pair in pairs:
+        g *= 100
+        g += pair
+    e = digits[10].astype(np.int16)
+    e += digits[9].astype(np.int16) * 10
+    e += (digits[8] * ~signs[2]).astype(np.int16) * 100
+    g -= e
+
+    exp_neg = (columns[7] == _MINUS) | (columns[8] == _MINUS) | (columns[9] == _MINUS)
+    k = e * (1 - 2 * exp_neg.astype(np.int16))
+    k += 14  # (+-E - 8) + 22
+    ok &= k.view(np.uint16) <= 44
+    index = k * 2 + (columns[0] == _MINUS)
+    index *= ok
+    values = g.astype(np.float64)
+    values *= _SCALE_MUL.take(index)
+    values /= _SCALE_DIV.take(index)
+
+    others = np.flatnonzero(~ok)
+    if others.size: values[others] = _scan_to_float(fields[others])
+    return values
+
+
+def _scan_to_float(fields):
+    """
+    Converts an (n, 11) uint8 array of ENDF fields in any layout to float64.
+
+    The 11 columns are scanned left to right, each step updating all the
+    fields at once: the mantissa digits accumulate into an integer M (at
+    most 11 digits, exact in int64 and float64) and the value is
+    M * 10**k or M / 10**-k. For |k| <= 22 both operands are exact, so the
+    single rounding gives the same result as float(). Other fields (larger
+    exponents, 'E' notation, garbage) go through endf_float one by one.
+    """
+    n = fields.shape[0]
+    if n == 0: return np.zeros(0)
+    columns = np.ascontiguousarray(fields.T)
+    zeros = np.zeros(n, dtype=bool)
+    m = np.zeros(n, dtype=np.int64)
+    e = np.zeros(n, dtype=np.int64)
+    decimals = np.zeros(n, dtype=np.int64)
+    n_digits = np.zeros(n, dtype=np.int64)
+    neg, exp_neg, in_exp, exp_digits = zeros.copy(), zeros.copy(), zeros.copy(), zeros.copy()
+    started, signed, seen_dot, ended, bad = zeros.copy(), zeros.copy(), zeros.copy(), zeros.copy(), zeros.copy()
+    blank = ~zeros
+    prev_num = zeros
+
+    for ch in columns:
+        d = ch - np.uint8(48)  # wraps around for characters below '0'
+        is_digit = d < 10
+        is_sign = (ch == _PLUS) | (ch == _MINUS)
+        is_dot = ch == _DOT
+        filled = ch != _SPACE
+        blank &= ~filled
+
+        # Exponent sign: a +/- right after a digit or the decimal point
+        exp_start = is_sign & prev_num & ~in_exp
+        bad |= (filled & ended) | (filled & ~(is_digit | is_sign | is_dot))
+        bad |= is_sign & ~exp_start & (started | signed | in_exp)
+        bad |= is_dot & (seen_dot | in_exp)
+
+        lead = is_sign & ~started & ~signed
+        neg |= lead & (ch == _MINUS)
+        signed |= lead
+        exp_neg |= exp_start & (ch == _MINUS)
+        in_exp |= exp_start
+
+        mant_digit = is_digit & ~in_exp
+        m = np.where(mant_digit, m * 10 + d, m)
+        decimals += mant_digit & seen_dot
+        n_digits += mant_digit
+        exp_digit = is_digit & in_exp
+        e = np.where(exp_digit, e * 10 + d, e)
+        exp_digits |= exp_digit
+
+        seen_dot |= is_dot & ~in_exp
+        ended |= ~filled & (started | signed)
+        started |= is_digit | is_dot
+        prev_num = is_digit | is_dot
+
+    k = np.where(exp_neg, -e, e) - decimals
+    bad |= (n_digits == 0) | (in_exp & ~exp_digits) | (np.abs(k) > 22)
+
+    kk = np.clip(k, -22, 22)
+    scale = _POW10_FLOAT[np.abs(kk)]
+    mf = m.astype(np.float64)
+    values = np.where(kk >= 0, mf * scale, mf / scale)
+    values = np.where(neg, -values, values)
+    values[blank] = 0.0
+
+    for i in np.flatnonzero(bad & ~blank):
+        values[i] = endf_float(fields[i].tobytes().decode("ascii", errors="replace"))
+    return values
+
+
+def _python_floats(data, count=None):
+    values = array("d")
+    for line in data.splitlines():
+        for k in range(FIELDS_PER_LINE):
+            if count is not None and len(values) >= count: return values
+            values.append(endf_float(line[k * FIELD_WIDTH:(k + 1) * FIELD_WIDTH].decode("ascii", errors="replace")))
+    return values
+
+
+def parse_floats(data, count=None):
+    """
+    All the real fields of the records in `data` (bytes), row by row,
+    truncated to `count` values. float64 ndarray (array('d') without NumPy).
+    """
+    if np is None: return _python_floats(data, count)
+    if len(data) < SMALL_BUFFER: return np.array(_python_floats(data, count), dtype=np.float64)
+
+    lines = _lines_array(data)
+    if count is not None:
+        lines = lines[:-(-count // FIELDS_PER_LINE)]
+    fields = lines.reshape(-1, FIELD_WIDTH)
+    if count is not None: fields = fields[:count]
+    return _fields_to_float(fields)
+
+
+def parse_ints(line, count=FIELDS_PER_LINE):
+    """Integer fields of one record line (blank = 0)."""
+    values = []
+    for k in range(count):
+        field = line[k * FIELD_WIDTH:(k + 1) * FIELD_WIDTH].strip()
+        values.append(int(field) if field else 0)
+    return values
+
+
+def _lines(data, start, n):
+    """Bytes of lines [start, start + n) of `data` (direct slicing for fixed-length records)."""
+    if _fixed_records(data):
+        rec = data.find(b"\n") + 1
+        return data[start * rec:(start + n) * rec]
+    pos = 0
+    for _ in range(start):
+        pos = data.index(b"\n", pos) + 1
+    end = pos
+    for _ in range(n):
+        nl = data.find(b"\n", end)
+        end = len(data) if nl < 0 else nl + 1
+    return data[pos:end]
+
+
+# ==============================================================================
+# RECORD DECODERS
+# ==============================================================================
+
+def _tab1_layout(data, line):
+    """(c1, c2, l1, l2, interp, raw bytes of the NP pairs, NP, lines used) of a TAB1 record."""
+    head = _lines(data, line, 1).decode("ascii", errors="replace")
+    c1, c2 = endf_float(head[0:11]), endf_float(head[11:22])
+    l1, l2, nr, npts = parse_ints(head[22:], 4)
+
+    nr_lines = -(-2 * nr // FIELDS_PER_LINE)
+    ints = []
+    for row in _lines(data, line + 1, nr_lines).decode("ascii", errors="replace").splitlines():
+        ints += parse_ints(row)
+    interp = list(zip(ints[0:2 * nr:2], ints[1:2 * nr:2]))
+
+    xy_lines = -(-2 * npts // FIELDS_PER_LINE)
+    xy = _lines(data, line + 1 + nr_lines, xy_lines)
+    return c1, c2, l1, l2, interp, xy, npts, 1 + nr_lines + xy_lines
+
+
+def decode_tab1(data, line=0):
+    """
+    TAB1 record starting at record `line` of `data`:
+    CONT [C1, C2, L1, L2, NR, NP], NR interpolation pairs, NP (x, y) pairs.
+    Returns (c1, c2, l1, l2, [(nbt, int)], x, y, lines used).
+    """
+    c1, c2, l1, l2, interp, raw, npts, used = _tab1_layout(data, line)
+    xy = parse_floats(raw, 2 * npts)
+    return c1, c2, l1, l2, interp, xy[0::2], xy[1::2], used
+
+
+def decode_list(data, line=0):
+    """LIST record: CONT [C1, C2, L1, L2, NPL, N2] then NPL reals. Returns (c1, c2, l1, l2, n2, values, lines used)."""
+    head = _lines(data, line, 1).decode("ascii", errors="replace")
+    c1, c2 = endf_float(head[0:11]), endf_float(head[11:22])
+    l1, l2, npl, n2 = parse_ints(head[22:], 4)
+    n_lines = -(-npl // FIELDS_PER_LINE)
+    values = parse_floats(_lines(data, line + 1, n_lines), npl)
+    return c1, c2, l1, l2, n2, values, 1 + n_lines
+
+
+# ==============================================================================
+# MF3 CROSS SECTIONS
+# ==============================================================================
+
+def _mf3_record(data, energy, xs, layout):
+    head = data[:data.find(b"\n")].decode("ascii", errors="replace")
+    qm, qi, _, lr, interp = layout[:5]
+    return {"za": endf_float(head[0:11]), "awr": endf_float(head[11:22]),
+            "qm": qm, "qi": qi, "lr": lr, "interp": interp, "energy": energy, "xs": xs}
+
+
+def read_mf3(index, mat, mt, block=0):
+    """
+    Cross section MF3/MT of a material from a TapeIndex (block = temperature
+    block for PENDF tapes with several temperatures). Returns a dict with
+    za, awr, qm, qi, lr, interp and the energy / xs arrays.
+    """
+    sections = index.find(mat, 3, mt)
+    if block >= len(sections): raise KeyError(f"No MF3/MT{mt} for MAT {mat} (block {block})")
+    data = index.read_section(sections[block]).encode("ascii")
+    layout = _tab1_layout(data, 1)
+    xy = parse_floats(layout[5], 2 * layout[6])
+    return _mf3_record(data, xy[0::2], xy[1::2], layout)
+
+
+def read_mf3_all(index, mat, block=0):
+    """
+    Every MF3 section of a material block, {mt: read_mf3 dict}. The data
+    records of all the sections are decoded in one pass over the mapped
+    tape, which is what makes whole-library scans cheap.
+    """
+    blocks = [m for m in index.materials if m.mat == mat]
+    if block >= len(blocks): raise KeyError(f"No MAT {mat} (block {block}) on {index.path}")
+    sections = [s for s in index.material_sections(blocks[block]) if s.mf == 3]
+    if not sections: return {}
+
+    with open(index.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        chunks = [mm[s.offset:s.offset + s.length] for s in sections]
+    layouts = [_tab1_layout(data, 1) for data in chunks]
+    raw = [xy if xy.endswith(b"\n") else xy + b"\n" for xy in (layout[5] for layout in layouts)]
+    values = parse_floats(b"".join(raw))
+
+    result = {}
+    start = 0
+    for sec, data, layout, xy in zip(sections, chunks, layouts, raw):
+        pairs = values[start:start + 2 * layout[6]]
+        start += FIELDS_PER_LINE * len(xy.splitlines())
+        result[sec.mt] = _mf3_record(data, pairs[0::2], pairs[1::2], layout)
+    return result
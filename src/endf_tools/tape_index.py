@@ -0,0 +1,201 @@
+import mmap
+import os
+from collections import namedtuple
+
+# ==============================================================================
+# ENDF / PENDF / GENDF TAPE INDEX
+# ==============================================================================
+# Every record is 80 columns: 66 columns of data, then MAT (67-70),
+# MF (71-72), MT (73-75) and the line number NS (76-80).
+# A section (MAT, MF, MT) ends with a SEND record (MT=0), a file with FEND
+# (MF=0), a material with MEND (MAT=0) and the tape with TEND (MAT=-1).
+
+Section = namedtuple("Section", "mat mf mt offset length lines")
+Material = namedtuple("Material", "mat za awr temp first last")  # sections[first:last]
+
+_MAT, _MF, _MT, _NS = slice(66, 70), slice(70, 72), slice(72, 75), slice(75, 80)
+_NS_MOD = 100000
+
+
+def _int(field, default=None):
+    try: return int(field)
+    except ValueError: return default
+
+
+def endf_float(text):
+    """Parses an ENDF real ("6.315200+4", "-1.2-5", " 3.0E+2", blank = 0.0)."""
+    text = text.strip()
+    if not text: return 0.0
+    try: return float(text)
+    except ValueError: pass
+    # Exponent without 'E': the last sign that does not start the number
+    for i in range(len(text) - 1, 0, -1):
+        if text[i] in "+-" and text[i - 1] not in "eE":
+            return float(text[:i] + "e" + text[i:])
+    raise ValueError(f"Not an ENDF number: {text!r}")
+
+
+class TapeIndex:
+    """
+    Section index of an ENDF-formatted tape (ENDF, PENDF or GENDF).
+
+    sections:  Section tuples in file order (offset/length in bytes, data
+               records only: the SEND line is not included).
+    materials: one Material per MAT block; a PENDF/GENDF tape holding
+               several temperatures has one block per temperature.
+    """
+
+    def __init__(self, path, size, mtime_ns, tpid, kind, sections, materials):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.tpid = tpid
+        self.kind = kind
+        self.sections = sections
+        self.materials = materials
+        self._lookup = {}
+        for i, sec in enumerate(sections): self._lookup.setdefault((sec.mat, sec.mf, sec.mt), []).append(i)
+
+    def mats(self):
+        """MAT numbers on the tape, in order of appearance, without repetitions."""
+        return list(dict.fromkeys(m.mat for m in self.materials))
+
+    def find(self, mat, mf, mt):
+        """All sections (one per temperature block) with this MAT/MF/MT."""
+        return [self.sections[i] for i in self._lookup.get((mat, mf, mt), [])]
+
+    def material_sections(self, material):
+        return self.sections[material.first:material.last]
+
+    def read_section(self, section):
+        """Raw text of a section (its data records, without the SEND line)."""
+        with open(self.path, "rb") as f:
+            f.seek(section.offset)
+            return f.read(section.length).decode("ascii", errors="replace")
+
+    def summary(self):
+        """Short description of the tape content, e.g. 'PENDF: 9228 (293.6K, 600K)'."""
+        temps = {}
+        for m in self.materials: temps.setdefault(m.mat, []).append(m.temp)
+        parts = []
+        for mat, values in temps.items():
+            t = ", ".join(f"{v:g}K" for v in values if v is not None)
+            parts.append(f"{mat} ({t})" if t else str(mat))
+        return f"{self.kind}: " + ", ".join(parts) if parts else self.kind
+
+
+def _section_end(mm, start, rec, key, ns0, size):
+    """
+    (end offset, line count) of the section starting at `start`, assuming fixed-length
+    records of `rec` bytes. Probes are accepted only if they are aligned,
+    carry the same MAT/MF/MT and the expected line number, which makes the
+    galloping search safe; returns None when the layout is irregular.
+    """
+    def same(k):
+        p = start + k * rec
+        if p + rec > size or mm[p + rec - 1] != 0x0A: return False
+        line = mm[p:p + 80]
+        return (line[_MAT], line[_MF], line[_MT]) == key and _int(line[_NS]) == (ns0 + k) % _NS_MOD
+
+    lo, step = 0, 1  # line `lo` is known to belong to the section
+    while same(lo + step):
+        lo += step
+        step *= 2
+    hi = lo + step    # first line known not to belong to it
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if same(mid): lo = mid
+        else: hi = mid
+
+    end = start + hi * rec
+    if end < size:
+        # The next record must really start there and belong to something else
+        if mm[end - 1] != 0x0A: return None
+        nxt = mm[end:end + 80]
+        if (nxt[_MAT], nxt[_MF], nxt[_MT]) == key: return None
+    return end, hi
+
+
+def _parse_header(text, kind_hint):
+    """(ZA, AWR, temperature, kind) from the first records of MF1/MT451."""
+    lines = text.splitlines()
+    try:
+        za = endf_float(lines[0][0:11])
+        awr = endf_float(lines[0][11:22])
+        lrp = _int(lines[0][22:33], 0)
+        n1 = _int(lines[0][44:55], 0)
+        if n1 == -1:
+            # GENDF: HEAD [ZA, AWR, 0, NZ, -1, NTW] then LIST [TEMP, ...]
+            return za, awr, endf_float(lines[1][0:11]), "GENDF"
+        temp = endf_float(lines[3][0:11]) if len(lines) > 3 else None
+        return za, awr, temp, "PENDF" if lrp == 2 else kind_hint
+    except (IndexError, ValueError):
+        return None, None, None, kind_hint
+
+
+def index_tape(path):
+    """Builds the TapeIndex of an ENDF-formatted file in a single forward pass."""
+    st = os.stat(path)
+    sections = []
+    materials = []
+    kind = "ENDF"
+    tpid = ""
+
+    with open(path, "rb") as f:
+        if st.st_size == 0:
+            return TapeIndex(path, 0, st.st_mtime_ns, tpid, kind, sections, materials)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            eol = mm.find(b"\n")
+            if eol < 0: eol = size
+            tpid = mm[:min(eol, 66)].decode("ascii", errors="replace").rstrip()
+            pos = eol + 1
+
+            current = None  # [mat, za, awr, temp, first] of the MAT block being read
+            while pos < size:
+                eol = mm.find(b"\n", pos)
+                if eol < 0: eol = size
+                line = mm[pos:min(eol, pos + 80)]
+                mat, mf, mt = _int(line[_MAT], 0), _int(line[_MF], 0), _int(line[_MT], 0)
+
+                if mat <= 0 or mf == 0 or mt == 0:
+                    # SEND / FEND / MEND / TEND (or garbage): closes a MAT block on MEND/TEND
+                    if mat <= 0 and current is not None:
+                        materials.append(Material(current[0], current[1], current[2], current[3], current[4], len(sections)))
+                        current = None
+                    pos = eol + 1
+                    continue
+
+                key = (line[_MAT], line[_MF], line[_MT])
+                ns0 = _int(line[_NS])
+                found = _section_end(mm, pos, eol + 1 - pos, key, ns0, size) if ns0 is not None else None
+                if found is not None:
+                    end, n_lines = found
+                else:
+                    # Irregular layout: walk the section line by line
+                    end, n_lines = pos, 0
+                    while end < size:
+                        nl = mm.find(b"\n", end)
+                        if nl < 0: nl = size
+                        rec = mm[end:min(nl, end + 80)]
+                        if (rec[_MAT], rec[_MF], rec[_MT]) != key: break
+                        end = nl + 1
+                        n_lines += 1
+                    end = min(end, size)
+
+                length = end - pos
+                if current is None or current[0] != mat:
+                    if current is not None:
+                        materials.append(Material(current[0], current[1], current[2], current[3], current[4], len(sections)))
+                    current = [mat, None, None, None, len(sections)]
+                if mf == 1 and mt == 451 and current[1] is None:
+                    head = mm[pos:min(end, pos + 4 * 82)].decode("ascii", errors="replace")
+                    current[1], current[2], current[3], block_kind = _parse_header(head, kind)
+                    if block_kind != "ENDF": kind = block_kind
+                sections.append(Section(mat, mf, mt, pos, length, n_lines))
+                pos = end
+
+            if current is not None:
+                materials.append(Material(current[0], current[1], current[2], current[3], current[4], len(sections)))
+
+    return TapeIndex(path, size, st.st_mtime_ns, tpid, kind, sections, materials)
@@ -0,0 +1,52 @@
+import mmap
+from endf_tools.tape_index import _MAT, _int
+
+# ==============================================================================
+# TAPE SUBSETS (TPID + selected materials + TEND)
+# ==============================================================================
+
+_SCAN_LINES = 4  # SEND, FEND, MEND after the last section of a material block
+
+
+def _material_span(mm, index, material):
+    """Byte range of a MAT block, from its first section to its MEND record included."""
+    start = index.sections[material.first].offset
+    last = index.sections[material.last - 1]
+    end = last.offset + last.length
+    for _ in range(_SCAN_LINES):
+        if end >= len(mm): break
+        nl = mm.find(b"\n", end)
+        nl = len(mm) if nl < 0 else nl + 1
+        mat = _int(mm[end:nl][_MAT], None)
+        if mat is None or mat < 0: break  # TEND or garbage: not part of the block
+        end = nl
+        if mat == 0: break                # MEND
+    return start, end
+
+
+def write_subset(index, dst, mats):
+    """
+    Writes a copy of the indexed tape holding only the given MATs (every
+    temperature block of each, in tape order) between the original TPID
+    and a TEND record. Returns the MATs actually written.
+    """
+    wanted = {int(m) for m in mats}
+    blocks = [m for m in index.materials if m.mat in wanted and m.last > m.first]
+
+    with open(index.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        eol = mm.find(b"\n")
+        newline = b"\r\n" if eol > 0 and mm[eol - 1:eol] == b"\r" else b"\n"
+        tpid = mm[:eol + 1] if eol >= 0 else mm[:] + newline
+
+        # Keep the source TEND line when there is one
+        tail = mm[max(0, len(mm) - 2 * 82):].rstrip(b"\r\n").rsplit(b"\n", 1)[-1].rstrip(b"\r")
+        tend = tail + newline if _int(tail[_MAT], None) == -1 else b" " * 66 + b"  -1 0  0    0" + newline
+
+        with open(dst, "wb") as out:
+            out.write(tpid)
+            for block in blocks:
+                start, end = _material_span(mm, index, block)
+                out.write(mm[start:end])
+            out.write(tend)
+
+    return list(dict.fromkeys(b.mat for b in blocks))
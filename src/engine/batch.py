@@ -0,0 +1,237 @@
+import os
+import queue
+import shutil
+from engine.project_state import write_state_json, serialize_modules
+from engine.deck_renderer import DeckRenderer, run_overrides
+from engine.deck_template import compile_template
+from engine.tape_staging import output_units, subset_materials
+from engine.stage_plan import shared_prefix_length
+
+SHARED_JOB_ID = "shared"
+SHARED_FOLDER = "Shared_Stage"
+
+# ==============================================================================
+# BATCH HELPERS (shared by the Sequential Runner and the headless runner)
+# ==============================================================================
+
+def generate_full_input(modules):
+    full_text = ""
+    for mod in modules:
+        full_text += mod.write() + "\n"
+    full_text += "stop\n"
+    return full_text
+
+
+def prepare_job(root, run, content, user_tapes, state):
+    """Creates the job folder and returns the job description for the worker pool."""
+    job_dir = os.path.join(root, run["folder"])
+    os.makedirs(job_dir, exist_ok=True)
+
+    # 1. Environment Tapes, overridden by Variable File Inputs
+    tapes = {int(unit): path for unit, path in user_tapes.items() if os.path.exists(path)}
+    for cfg in run["config"]:
+        if cfg["is_file"] and os.path.exists(cfg["val"]):
+            tapes[int(cfg["base_unit"])] = cfg["val"]
+
+    # 2. Save Project State JSON (the project state with the run's values)
+    write_state_json(job_dir, state)
+
+    return {"id": run["id"], "job_dir": job_dir, "content": content, "tapes": tapes}
+
+
+def find_input(modules, m_idx, card_name, inp_name):
+    if not 0 <= m_idx < len(modules): return None
+    for card in modules[m_idx].cards:
+        if card.name == card_name:
+            for inp in card.inputs:
+                if inp.name == inp_name: return inp
+    return None
+
+
+def define_variable(modules, m_idx, card_name, inp_name, values):
+    """Builds a sweep variable entry (same layout as the Sequential Runner list)."""
+    inp_obj = find_input(modules, m_idx, card_name, inp_name)
+    if inp_obj is None:
+        raise KeyError(f"No input '{inp_name}' in card '{card_name}' of module #{m_idx+1}")
+    is_file_input = getattr(inp_obj, 'is_input_file', False)
+    return {
+        "display": f"[{m_idx+1}] {modules[m_idx].name.upper()} > {card_name} > {inp_name}",
+        "key": (m_idx, card_name, inp_name),
+        "values": [str(v) for v in values],
+        "is_file_input": is_file_input,
+        "base_unit": inp_obj.value if is_file_input else None
+    }
+
+
+class JobBuilder:
+    """
+    Turns the runs of a SweepPlan into jobs for the ParallelJobRunner.
+
+    When the leading modules of the chain do not depend on any sweep
+    variable (e.g. RECONR while only BROADR temperatures vary), they are
+    run once as a shared job in SHARED_FOLDER. Every run then only
+    executes the remaining modules, with the tapes produced by the shared
+    job staged in, and waits for it through job["requires"].
+
+    With subset=True, library tapes are staged with only the materials
+    the deck references (see engine.tape_staging.subset_materials).
+
+    Decks are rendered by a DeckRenderer from a snapshot of the project
+    state: the modules passed in are only read, never modified. When the
+    swept inputs do not change the card structure, the deck is compiled
+    once into a DeckTemplate and each run only substitutes its values;
+    otherwise template_reason tells why every run is rendered in full.
+    """
+
+    def __init__(self, modules, plan, out_root, user_tapes, staging="auto", share_prefix=True, subset=False):
+        self.modules = modules
+        self.out_root = out_root
+        self.user_tapes = user_tapes
+        self.staging = staging
+        self.subset = subset
+        self.renderer = DeckRenderer(serialize_modules(modules))
+
+        self.prefix_len = shared_prefix_length(modules, plan.variables) if share_prefix and len(plan) > 1 else 0
+        self.shared_job = self._shared_job() if self.prefix_len else None
+        self.writable_units = output_units(modules[self.prefix_len:])
+
+        self.template, self.template_reason = compile_template(self.renderer, plan.variables, start=self.prefix_len)
+
+    def setup_jobs(self):
+        """Jobs to submit before the first run."""
+        return [self.shared_job] if self.shared_job else []
+
+    def _shared_job(self):
+        prefix = self.modules[:self.prefix_len]
+        job_dir = os.path.join(self.out_root, SHARED_FOLDER)
+        os.makedirs(job_dir, exist_ok=True)
+        write_state_json(job_dir, self.renderer.state()[:self.prefix_len])
+        return {
+            "id": SHARED_JOB_ID,
+            "job_dir": job_dir,
+            "content": self.renderer.render(stop=self.prefix_len),
+            "tapes": {int(unit): path for unit, path in self.user_tapes.items() if os.path.exists(path)},
+            "staging": self.staging,
+            "writable_units": output_units(prefix),
+            "keep_result": True,
+            "produces": sorted(output_units(prefix)),
+            "subset": subset_materials(prefix) if self.subset else {},
+        }
+
+    def make_job(self, run):
+        overrides = run_overrides(run["config"])
+        if self.template is not None:
+            content, state = self.template.fill(overrides), self.template.state(overrides)
+        else:
+            content, state = self.renderer.render(overrides, start=self.prefix_len), self.renderer.state(overrides)
+        job = prepare_job(self.out_root, run, content, self.user_tapes, state)
+        job["staging"] = self.staging
+        job["writable_units"] = self.writable_units
+        # Materials can be swept too: the subset is taken with the run's values applied
+        job["subset"] = subset_materials(self.renderer.modules(overrides, start=self.prefix_len)) if self.subset else {}
+        if self.shared_job:
+            # Tapes of the shared stage win over the environment: NJOY would have overwritten them too
+            for unit in self.shared_job["produces"]:
+                job["tapes"][unit] = os.path.join(self.shared_job["job_dir"], f"tape{unit}")
+                job["subset"].pop(unit, None)
+            job["requires"] = [SHARED_JOB_ID]
+        return job
+
+
+class BatchSession:
+    """
+    Bookkeeping of one running batch, driven by the Sequential Runner pump
+    or by run_batch(): feeds the runner lazily, counts the results and
+    journals everything in the BatchManifest of the output root.
+
+    With resume=True the manifest of the previous attempt is kept: jobs
+    that finished successfully (and whose outputs are still there) are
+    skipped, jobs that were started but never finished are cleaned and run
+    again.
+    """
+
+    def __init__(self, modules, plan, out_root, user_tapes, runner, staging="auto", manifest=None, resume=False, subset=False):
+        self.runner = runner
+        self.manifest = manifest
+        self.resume = resume and manifest is not None
+        self.total = len(plan)
+        self.finished = 0
+        self.success = 0
+        self.skipped = 0
+        self.exhausted = False
+        self._runs = iter(plan)
+
+        os.makedirs(out_root, exist_ok=True)
+        self.out_root = out_root
+        if manifest is not None:
+            if self.resume: manifest.resume()
+            else: manifest.begin(plan, serialize_modules(modules), runner.exe)
+
+        self.builder = JobBuilder(modules, plan, out_root, user_tapes, staging, subset=subset)
+        for job in self.builder.setup_jobs():
+            if self.resume and manifest.is_complete(job["id"]):
+                runner.mark_done(job["id"])
+                continue
+            self._submit(job)
+
+    @property
+    def done(self): return self.exhausted and self.finished >= self.total
+
+    def _submit(self, job):
+        if self.manifest is not None:
+            job["hash_outputs"] = True
+            self.manifest.record_submitted(job)
+        self.runner.submit(job)
+
+    def fill(self):
+        """Submits jobs until the pool queue is full. Returns the ids of the runs skipped on resume."""
+        skipped = []
+        while not self.exhausted and self.runner.in_flight < 2 * self.runner.max_workers:
+            run = next(self._runs, None)
+            if run is None:
+                self.exhausted = True
+                break
+            if self.resume:
+                if self.manifest.is_complete(run["id"]):
+                    self.finished += 1
+                    self.success += 1
+                    self.skipped += 1
+                    skipped.append(run["id"])
+                    continue
+                if self.manifest.was_started(run["id"]):
+                    # Half-done: drop whatever the interrupted run left behind
+                    shutil.rmtree(os.path.join(self.out_root, run["folder"]), ignore_errors=True)
+            self._submit(self.builder.make_job(run))
+        return skipped
+
+    def handle(self, event):
+        if self.manifest is not None: self.manifest.record_event(event)
+        if event[0] == "finished" and event[1] != SHARED_JOB_ID:
+            self.finished += 1
+            if event[2]: self.success += 1
+
+
+def run_batch(modules, plan, user_tapes, out_root, runner, staging="auto", on_event=None, manifest=None, resume=False, subset=False,
+              on_message=None):
+    """
+    Blocking batch loop (headless counterpart of SequentialRunManager._pump_jobs).
+    on_message(text) receives notes on the set-up (why the deck template is not used).
+    Returns (successful, total, skipped).
+    """
+    session = BatchSession(modules, plan, out_root, user_tapes, runner, staging, manifest, resume, subset)
+    if on_message and session.builder.template is None:
+        on_message(f"Deck template not used, rendering every run: {session.builder.template_reason}")
+
+    while not session.done:
+        # 1. Keep the pool busy
+        session.fill()
+        if session.done: break
+
+        # 2. Wait for the next report
+        try: event = runner.events.get(timeout=1.0)
+        except queue.Empty: continue
+        session.handle(event)
+        if on_event: on_event(event, session.finished, session.total)
+
+    runner.shutdown(wait=True)
+    return session.success, session.total, session.skipped
@@ -0,0 +1,107 @@
+import json
+import os
+import time
+from engine.sweep_plan import SweepPlan
+
+MANIFEST_NAME = "batch_manifest.jsonl"
+
+
+class BatchManifest:
+    """
+    Append-only journal of a batch, one JSON record per line in
+    <output root>/batch_manifest.jsonl:
+
+        {"type": "plan", "plan": {...}, "project": [...], "exe": ...}
+        {"type": "resume"}
+        {"type": "submitted", "id": 12, "folder": "Run_12_..."}
+        {"type": "started", "id": 12}
+        {"type": "finished", "id": 12, "success": true, "message": "OK",
+         "exit_code": 0, "duration": 41.2, "outputs": {"tape22": {"sha256": ..., "size": ...}}}
+
+    Only the records after the last "plan" belong to the current batch.
+    Since lines are only ever appended, a crash loses at most the last
+    records, and the jobs they describe are simply run again on resume.
+    """
+
+    def __init__(self, out_root):
+        self.out_root = out_root
+        self.path = os.path.join(out_root, MANIFEST_NAME)
+        self.plan_record = None
+        self.jobs = {}  # job id -> {"folder", "status", "outputs", ...}
+
+    @classmethod
+    def load(cls, out_root):
+        """Reads an existing manifest (missing file -> empty manifest)."""
+        manifest = cls(out_root)
+        try:
+            with open(manifest.path, "r") as f:
+                for line in f:
+                    try: record = json.loads(line)
+                    except ValueError: continue  # torn last line after a crash
+                    manifest._apply(record)
+        except OSError:
+            pass
+        return manifest
+
+    def _apply(self, record):
+        kind = record.get("type")
+        if kind == "plan":
+            self.plan_record = record
+            self.jobs = {}
+        elif kind in ("submitted", "started", "finished"):
+            entry = self.jobs.setdefault(record["id"], {})
+            if kind == "submitted": entry["folder"] = record["folder"]
+            if kind == "finished":
+                entry["status"] = "done" if record.get("success") else "failed"
+                entry["outputs"] = record.get("outputs", {})
+            else:
+                entry["status"] = kind
+
+    def _append(self, record, sync=False):
+        record["time"] = time.time()
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        self._apply(record)
+
+    # --- Batch Lifecycle ---
+
+    def begin(self, plan, project, exe):
+        self._append({"type": "plan", "plan": plan.to_dict(), "project": project, "exe": exe}, sync=True)
+
+    def resume(self):
+        self._append({"type": "resume"}, sync=True)
+
+    def plan(self):
+        return SweepPlan.from_dict(self.plan_record["plan"]) if self.plan_record else None
+
+    # --- Job Records ---
+
+    def record_submitted(self, job):
+        self._append({"type": "submitted", "id": job["id"], "folder": os.path.relpath(job["job_dir"], self.out_root)})
+
+    def record_event(self, event):
+        if event[0] == "started":
+            self._append({"type": "started", "id": event[1]})
+        elif event[0] == "finished":
+            info = event[4] if len(event) > 4 else {}
+            self._append({"type": "finished", "id": event[1], "success": event[2], "message": event[3], **info})
+
+    # --- Resume Queries ---
+
+    def was_started(self, job_id):
+        return job_id in self.jobs
+
+    def is_complete(self, job_id):
+        """Finished successfully and every recorded output is still on disk with its size."""
+        entry = self.jobs.get(job_id)
+        if not entry or entry.get("status") != "done": return False
+        job_dir = os.path.join(self.out_root, entry.get("folder", ""))
+        for name, meta in entry.get("outputs", {}).items():
+            try:
+                if os.path.getsize(os.path.join(job_dir, name)) != meta["size"]: return False
+            except OSError:
+                return False
+        return True
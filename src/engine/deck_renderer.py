@@ -0,0 +1,114 @@
+import json
+from engine.project_state import apply_data_to_module, build_module, regenerate_keeping_values, serialize_modules
+
+# ==============================================================================
+# DECK RENDERER (project state + overrides -> deck text, no shared state)
+# ==============================================================================
+
+def run_overrides(config):
+    """Overrides of a SweepPlan run: {(module index, card, input): value} of its non-file variables."""
+    return {tuple(cfg["key"]): cfg["val"] for cfg in config if not cfg["is_file"]}
+
+
+def _by_module(overrides):
+    per_module = {}
+    for (m_idx, card, inp), val in (overrides or {}).items():
+        per_module.setdefault(int(m_idx), {}).setdefault(card, {})[inp] = val
+    return per_module
+
+
+def _merge(cards, values):
+    merged = {card: dict(inputs) for card, inputs in cards.items()}
+    for card, inputs in values.items(): merged.setdefault(card, {}).update(inputs)
+    return merged
+
+
+class DeckRenderer:
+    """
+    Renders the NJOY deck of a project state (the project_state.json
+    layout: [{"type": ..., "cards": {card: {input: value}}}]) with per-run
+    overrides {(module index, card, input): value}, using each module's own
+    write() on private instances. The live GUI modules are never touched.
+
+    The state is copied at construction and the result of render() only
+    depends on (state, overrides), whatever was rendered before. Only the
+    project state is pickled, so renderers can be sent to a process pool;
+    each process builds its own instances on first use.
+    """
+
+    def __init__(self, project_state):
+        self.project_state = json.loads(json.dumps(project_state))
+        self._reset_cache()
+
+    def _reset_cache(self):
+        self._instances = {}  # module index -> private instance
+        self._texts = {}      # module index -> write() of the module without overrides
+        self._touched = {}    # module index -> (card, input) overridden by earlier renders
+
+    def __getstate__(self): return {"project_state": self.project_state}
+
+    def __setstate__(self, state):
+        self.project_state = state["project_state"]
+        self._reset_cache()
+
+    def __len__(self): return len(self.project_state)
+
+    def state(self, overrides=None):
+        """Project state of the run (what its project_state.json holds): the overridden modules are serialized after regeneration."""
+        per_module = _by_module(overrides)
+        return [serialize_modules([self.module(i, per_module[i])])[0] if per_module.get(i) else entry
+                for i, entry in enumerate(self.project_state)]
+
+    def module(self, index, values=None):
+        """
+        Private instance of module `index` with `values` ({card: {input: value}})
+        applied over the project state. The instance is reused by later calls.
+        """
+        entry = self.project_state[index]
+        base = entry.get("cards", {})
+        values = values or {}
+        touched = self._touched.setdefault(index, set())
+        keys = {(card, inp) for card, inputs in values.items() for inp in inputs}
+
+        inst = self._instances.get(index)
+        # An input overridden earlier, absent from the state and from this run, must get its default back
+        if inst is None or any(k not in keys and k[1] not in base.get(k[0], {}) for k in touched):
+            inst = build_module(entry)
+            if inst is None: raise ValueError(f"Unknown module type: {entry.get('type')}")
+            self._instances[index] = inst
+            touched.clear()
+        if not values and not touched: return inst
+
+        merged = _merge(base, values)
+        apply_data_to_module(inst, merged)
+        regenerate_keeping_values(inst)
+        apply_data_to_module(inst, merged)  # cards created by the regeneration
+        touched.clear()
+        touched |= keys
+        return inst
+
+    def modules(self, overrides=None, start=0, stop=None):
+        """Private instances of modules [start, stop) for the overrides (valid until the next call)."""
+        per_module = _by_module(overrides)
+        stop = len(self) if stop is None else stop
+        return [self.module(i, per_module.get(i)) for i in range(start, stop)]
+
+    def render(self, overrides=None, start=0, stop=None):
+        """Deck text of modules [start, stop) followed by 'stop' (same text as generate_full_input)."""
+        per_module = _by_module(overrides)
+        stop = len(self) if stop is None else stop
+        parts = []
+        for i in range(start, stop):
+            values = per_module.get(i)
+            parts.append(self.module(i, values).write() + "\n" if values else self.module_text(i))
+        return "".join(parts) + "stop\n"
+
+    def module_text(self, index):
+        """Deck block of module `index` without overrides (written once)."""
+        if index not in self._texts: self._texts[index] = self.module(index).write() + "\n"
+        return self._texts[index]
+
+
+def render_deck(project_state, overrides=None, start=0, stop=None):
+    """One-shot render (module-level function, usable with ProcessPoolExecutor.map)."""
+    return DeckRenderer(project_state).render(overrides, start, stop)
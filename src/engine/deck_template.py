@@ -0,0 +1,174 @@
+from class_def import NjoyInput
+from engine.deck_renderer import _by_module, _merge
+from engine.project_state import build_module, regenerate_keeping_values
+
+# ==============================================================================
+# COMPILED DECK TEMPLATES (one render, then substitution per run)
+# ==============================================================================
+# A sweep that only varies inputs written verbatim (temperatures, MAT
+# numbers, tolerances...) produces decks that differ only at those
+# positions. The project is rendered once with a marker in place of each
+# swept value; each run then only substitutes its values.
+
+_MARKERS = ("\x00{}\x00", "\x01{}\x01")  # two sets: the text around a slot must not depend on it
+
+
+def _kind(value):
+    """Slot type of a value: the name of its Python type (str, int, float, NoneType)."""
+    return type(value).__name__
+
+
+def _representatives(values):
+    """
+    Values checked against full renders for one slot: per type, the first
+    and last values and the ones with the shortest and longest deck text
+    (plus an exponent form for floats), so width- and format-dependent
+    writes are caught without rendering every value.
+    """
+    by_kind = {}
+    for value in values: by_kind.setdefault(_kind(value), []).append(value)
+    samples = []
+    for kind_values in by_kind.values():
+        texts = [NjoyInput.format_value(v) for v in kind_values]
+        picks = [0, len(kind_values) - 1,
+                 min(range(len(texts)), key=lambda k: len(texts[k])),
+                 max(range(len(texts)), key=lambda k: len(texts[k]))]
+        picks += [k for k, text in enumerate(texts) if "e" in text.lower()][:1]
+        for k in dict.fromkeys(picks): samples.append(kind_values[k])
+    return samples
+
+
+class DeckTemplate:
+    """
+    Deck text with typed slots for the swept inputs, keyed (module index,
+    card, input) like the DeckRenderer overrides. A slot accepts the value
+    types compile_template() checked against full renders and formats them
+    with NjoyInput.format_value, as write() does; other types or unknown
+    keys raise instead of producing a deck write() would not.
+    Only strings and tuples are kept, so templates pickle cheaply.
+    """
+
+    def __init__(self, literals, slot_keys, kinds, order, defaults, project_state):
+        self.keys = slot_keys            # one key per slot
+        self._key_set = frozenset(slot_keys)
+        self.kinds = kinds               # value types accepted by each slot
+        self.defaults = defaults         # value of each slot in the project
+        self.project_state = project_state
+        self._order = order              # slot index of each occurrence in the text
+        self._format = "%s".join(lit.replace("%", "%%") for lit in literals)
+
+    def _text(self, k, value):
+        if _kind(value) not in self.kinds[k]:
+            raise TypeError(f"{self.keys[k][2]}: {_kind(value)} values were not checked for this template")
+        return NjoyInput.format_value(value)
+
+    def fill(self, overrides=None):
+        """Deck text for the overrides {(module index, card, input): value} (missing keys keep the project value)."""
+        overrides = overrides or {}
+        unknown = overrides.keys() - self._key_set
+        if unknown: raise KeyError(f"Not a slot of the template: {sorted(unknown)}")
+        values = [self._text(k, overrides.get(key, default)) for k, (key, default) in enumerate(zip(self.keys, self.defaults))]
+        return self._format % tuple(values[k] for k in self._order)
+
+    def state(self, overrides=None):
+        """Project state of the run: the swept inputs do not change the card structure, so the values are merged in place."""
+        per_module = _by_module(overrides)
+        return [dict(entry, cards=_merge(entry.get("cards", {}), per_module[i])) if per_module.get(i) else entry
+                for i, entry in enumerate(self.project_state)]
+
+
+def _find_input(mod, card_name, inp_name):
+    for card in mod.cards:
+        if card.name == card_name:
+            for inp in card.inputs:
+                if inp.name == inp_name: return inp
+    return None
+
+
+def _marked_block(entry, slots, marker):
+    """Module block written with `marker` in place of the swept inputs, or (None, reason)."""
+    mod = build_module(entry)
+    regenerate_keeping_values(mod)  # records the inputs regenerate() reads
+    controls = set(getattr(mod, "_structure_controls", ()))  # modules without regenerate() have none
+    swept = {}
+    for k, (card_name, inp_name) in slots:
+        if (card_name, inp_name) in controls:
+            return None, f"{inp_name} controls the cards of {mod.name.upper()}"
+        inp = _find_input(mod, card_name, inp_name)
+        if inp is None: return None, f"no input {card_name} > {inp_name} in {mod.name.upper()}"
+        if "get_string_value" in vars(inp): return None, f"{inp_name} of {mod.name.upper()} has its own deck formatting"
+        swept[inp] = k
+
+    for card in mod.cards:
+        try: card.is_active()
+        except Exception: pass
+        read = [inp for inp in card.active_reads if inp in swept]
+        if read: return None, f"{read[0].name} controls the visibility of {mod.name.upper()} card {card.name}"
+
+    for inp, k in swept.items(): inp.value = marker.format(k)
+    try: return mod.write() + "\n", None
+    except Exception as e: return None, f"{mod.name.upper()} write() does not take the swept values verbatim ({e})"
+
+
+def compile_template(renderer, variables, start=0, stop=None):
+    """
+    Compiles the deck of modules [start, stop) of a DeckRenderer for the
+    scalar sweep variables (SweepPlan.variables). Returns (DeckTemplate,
+    None), or (None, reason) when a swept input controls regenerate() or
+    an active_if, or is not written verbatim: the caller then renders
+    every run in full.
+
+    The template is checked against full renders on a few representative
+    values of each slot type (see _representatives), whatever the number
+    of values swept.
+    """
+    stop = len(renderer) if stop is None else stop
+    variables = [v for v in variables if not v["is_file_input"] and start <= v["key"][0] < stop]
+    keys = [tuple(v["key"]) for v in variables]
+    slot_of = {key: k for k, key in enumerate(keys)}
+    per_module = {}
+    for key in keys: per_module.setdefault(key[0], []).append((slot_of[key], key[1:]))
+
+    texts = []
+    for marker in _MARKERS:
+        parts = []
+        for i in range(start, stop):
+            if i not in per_module:
+                parts.append(renderer.module_text(i))
+                continue
+            block, reason = _marked_block(renderer.project_state[i], per_module[i], marker)
+            if block is None: return None, reason
+            parts.append(block)
+        texts.append("".join(parts) + "stop\n")
+
+    # Split on the first marker set; the second one must give the same skeleton
+    first, second = texts
+    literals, order = [], []
+    pos = 0
+    while True:
+        hit = first.find("\x00", pos)
+        if hit < 0: break
+        end = first.find("\x00", hit + 1)
+        literals.append(first[pos:hit])
+        order.append(int(first[hit + 1:end]))
+        pos = end + 1
+    literals.append(first[pos:])
+    if second != "".join(lit + _MARKERS[1].format(k) for lit, k in zip(literals, order)) + literals[-1]:
+        return None, "the deck layout depends on the swept values"
+
+    defaults = []
+    for key in keys:
+        cards = renderer.project_state[key[0]].get("cards", {})
+        defaults.append(cards.get(key[1], {}).get(key[2]))
+    samples = [_representatives(list(v["values"]) + [default]) for v, default in zip(variables, defaults)]
+    kinds = [tuple(dict.fromkeys(_kind(value) for value in slot)) for slot in samples]
+    template = DeckTemplate(literals, keys, kinds, order, defaults, renderer.project_state)
+
+    # Verification against the full renderer: row r takes the r-th sample of every slot
+    for r in range(max((len(s) for s in samples), default=0)):
+        overrides = {key: slot[r % len(slot)] for key, slot in zip(keys, samples)}
+        try: full = renderer.render(overrides, start, stop)
+        except Exception as e: return None, f"full render failed for {overrides} ({e})"
+        if template.fill(overrides) != full or template.state(overrides) != renderer.state(overrides):
+            return None, f"the template differs from the full render for {overrides}"
+    return template, None
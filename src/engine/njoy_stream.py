@@ -0,0 +1,99 @@
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+
+# " broadr...doppler broaden xs                                  0.2s"
+_BANNER_RE = re.compile(r"^\s*([a-z]+)\.\.\.(.*?)\s+(\d+\.\d+)s\s*$")
+# "                                                              12.3s"
+_TIMING_RE = re.compile(r"^\s+(\d+\.\d+)s\s*$")
+
+TAIL_LINES = 20
+
+
+class NjoyProgress:
+    """
+    Live state of one NJOY run, fed line by line from its listing.
+
+    NJOY prints a banner when a module starts ("broadr...doppler broaden xs
+    0.2s") and the cumulated CPU time when it ends. Both are parsed as the
+    lines arrive; readers on other threads call snapshot().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start_time = time.time()
+        self.module = None
+        self.module_start = None
+        self.modules_done = 0
+        self.cpu_time = 0.0
+
+    def feed(self, line):
+        """Parses one listing line. Returns True when a new module started."""
+        m = _BANNER_RE.match(line)
+        if m:
+            with self._lock:
+                if self.module is not None: self.modules_done += 1
+                self.module = m.group(1)
+                self.module_start = time.time()
+                self.cpu_time = float(m.group(3))
+            return True
+        m = _TIMING_RE.match(line)
+        if m:
+            with self._lock: self.cpu_time = float(m.group(1))
+        return False
+
+    def snapshot(self):
+        with self._lock:
+            now = time.time()
+            return {
+                "module": self.module,
+                "module_elapsed": now - self.module_start if self.module_start else 0.0,
+                "modules_done": self.modules_done,
+                "cpu_time": self.cpu_time,
+                "elapsed": now - self.start_time,
+            }
+
+    def describe(self):
+        snap = self.snapshot()
+        if snap["module"] is None: return f"starting... ({snap['elapsed']:.0f}s)"
+        return f"{snap['module']} ({snap['module_elapsed']:.0f}s), {snap['modules_done']} module(s) done, {snap['elapsed']:.0f}s elapsed"
+
+
+def run_njoy_streaming(exe, content, cwd, log_path, progress=None, stderr_path=None, register_proc=None, on_module=None):
+    """
+    Runs NJOY with `content` on stdin, writing its listing to log_path line
+    by line (memory use does not depend on the size of the listing).
+    stderr goes to stderr_path, or is merged into the log when None.
+    on_module(name) is called from this thread whenever a module starts.
+    Returns (exit code, last TAIL_LINES lines of the listing).
+    """
+    progress = progress or NjoyProgress()
+    tail = deque(maxlen=TAIL_LINES)
+    err_f = open(stderr_path, "w") if stderr_path else None
+    try:
+        with open(log_path, "w") as log:
+            proc = subprocess.Popen([exe], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                    stderr=err_f if err_f else subprocess.STDOUT,
+                                    cwd=cwd, text=True, errors="replace", bufsize=1)
+            if register_proc: register_proc(proc)
+
+            # Feed the deck from another thread so a chatty NJOY can never block on a full pipe
+            def feed_stdin():
+                try:
+                    proc.stdin.write(content)
+                    proc.stdin.close()
+                except OSError: pass
+            writer = threading.Thread(target=feed_stdin, daemon=True)
+            writer.start()
+
+            for line in proc.stdout:
+                log.write(line)
+                tail.append(line.rstrip("\n"))
+                if progress.feed(line) and on_module: on_module(progress.module)
+            proc.wait()
+            writer.join()
+    finally:
+        if err_f: err_f.close()
+    return proc.returncode, list(tail)
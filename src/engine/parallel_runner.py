@@ -0,0 +1,191 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from engine.tape_staging import stage_tape, stage_subset, StagingError
+from engine.njoy_stream import run_njoy_streaming
+from engine.run_cache import file_digest, NON_RESULT_FILES
+
+
+def default_max_workers():
+    """Number of NJOY processes to run side by side (one per core)."""
+    return os.cpu_count() or 1
+
+
+def run_njoy_job(job, exe, register_proc=None, on_module=None, notes=None):
+    """
+    Runs a single prepared job inside job["job_dir"].
+    Stages the tapes, writes the input deck and pipes it into NJOY,
+    streaming the listing to disk (on_module(name) reports module starts).
+    Returns the NJOY exit code. Raises StagingError, before NJOY is
+    started, when a tape cannot be staged. `notes` (a list) receives the
+    reasons library tapes were staged whole instead of as a subset.
+    """
+    job_dir = job["job_dir"]
+    os.makedirs(job_dir, exist_ok=True)
+
+    # 1. Stage Tapes (linked when safe, copied when NJOY writes the unit,
+    #    cut down to the referenced materials when job["subset"] lists them)
+    writable = job.get("writable_units", set())
+    subset = job.get("subset", {})
+    for unit, path in job.get("tapes", {}).items():
+        if os.path.exists(path):
+            dst = os.path.join(job_dir, f"tape{unit}")
+            strategy = job.get("staging", "auto")
+            try:
+                if int(unit) in subset and int(unit) not in writable:
+                    _, note = stage_subset(path, dst, subset[int(unit)], strategy)
+                    if note and notes is not None: notes.append(f"tape{unit}: {note}")
+                else: stage_tape(path, dst, strategy, writable=int(unit) in writable)
+            except Exception as e: raise StagingError(f"Staging error: tape{unit} from {path}: {e}") from e
+
+    # 2. Write Input File
+    content = job["content"]
+    with open(os.path.join(job_dir, "input.inp"), "w") as f: f.write(content)
+
+    # 3. Run NJOY
+    log_path = os.path.join(job_dir, job.get("log_name", "output.out"))
+    rc, _ = run_njoy_streaming(exe, content, job_dir, log_path, register_proc=register_proc, on_module=on_module)
+    return rc
+
+
+def staged_inputs(job):
+    """Names of the tapes staged into a job that NJOY only reads (units it also writes are results)."""
+    writable = {int(unit) for unit in job.get("writable_units", ())}
+    return {f"tape{int(unit)}" for unit in job.get("tapes", {}) if int(unit) not in writable}
+
+
+def output_digests(job):
+    """{file name: {"sha256", "size"}} of the files a finished job produced in its folder."""
+    skip = NON_RESULT_FILES | staged_inputs(job)
+    digests = {}
+    for name in sorted(os.listdir(job["job_dir"])):
+        path = os.path.join(job["job_dir"], name)
+        if name in skip or not os.path.isfile(path): continue
+        digests[name] = {"sha256": file_digest(path), "size": os.path.getsize(path)}
+    return digests
+
+
+class ParallelJobRunner:
+    """
+    Worker pool running NJOY jobs concurrently.
+
+    Each worker thread only waits on its own NJOY subprocess, so the heavy
+    lifting happens in separate OS processes and uses every core.
+    Progress is reported through `self.events` (a thread-safe queue):
+        ("started", job_id)
+        ("progress", job_id, module_name)   when NJOY enters a new module
+        ("finished", job_id, success, message, info)
+    info = {"exit_code", "duration"} plus "outputs" (see output_digests)
+    for successful jobs submitted with job["hash_outputs"] = True,
+    "notes" when a tape of job["subset"] had to be staged whole and
+    "cache_stored" = False when the result could not be saved in the cache.
+    The caller (usually the Tk main loop) drains it with get_nowait().
+
+    With a RunCache attached, jobs whose deck, executable and tapes were
+    already computed are served from the cache (message "Cached").
+
+    A job may list other job ids in job["requires"]: it is held back until
+    they finished and fails without running if one of them failed. Jobs
+    other jobs wait for must be submitted with job["keep_result"] = True.
+    """
+
+    def __init__(self, exe, max_workers=None, cache=None):
+        self.exe = exe
+        self.max_workers = max(1, int(max_workers or default_max_workers()))
+        self.cache = cache
+        self.events = queue.Queue()
+
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="njoy")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._procs = set()
+        self._cancelled = False
+        self._results = {}  # job_id -> success, for keep_result jobs
+        self._waiting = []  # jobs held back by their requirements
+
+    @property
+    def in_flight(self):
+        """Jobs submitted but not finished yet."""
+        with self._lock: return self._in_flight
+
+    def submit(self, job):
+        with self._lock:
+            self._in_flight += 1
+            if any(req not in self._results for req in job.get("requires", ())):
+                self._waiting.append(job)
+                return
+        self._pool.submit(self._worker, job)
+
+    def mark_done(self, job_id, success=True):
+        """Records the result of a job finished earlier (resumed batch) for the jobs requiring it."""
+        with self._lock: self._results[job_id] = success
+
+    def cancel(self):
+        """Skips queued jobs and terminates running NJOY processes."""
+        self._cancelled = True
+        with self._lock:
+            procs = list(self._procs)
+            waiting, self._waiting = self._waiting, []
+        for job in waiting: self._pool.submit(self._worker, job)
+        for proc in procs:
+            try: proc.terminate()
+            except Exception: pass
+
+    def shutdown(self, wait=False):
+        self._pool.shutdown(wait=wait)
+
+    def _register(self, proc):
+        with self._lock: self._procs.add(proc)
+
+    def _worker(self, job):
+        job_id = job["id"]
+        success, msg = False, ""
+        info = {"exit_code": None, "duration": 0.0}
+        start = time.time()
+        try:
+            failed = [req for req in job.get("requires", ()) if not self._results.get(req)]
+            if self._cancelled:
+                msg = "Cancelled"
+            elif failed:
+                msg = f"Required job failed: {', '.join(map(str, failed))}"
+            else:
+                self.events.put(("started", job_id))
+                key = None
+                if self.cache is not None:
+                    key = self.cache.make_key(job["content"], self.exe, job.get("tapes", {}))
+                if key and self.cache.restore(key, job["job_dir"]):
+                    with open(os.path.join(job["job_dir"], "input.inp"), "w") as f: f.write(job["content"])
+                    success, msg = True, "Cached"
+                    info["exit_code"] = 0
+                else:
+                    on_module = lambda name: self.events.put(("progress", job_id, name))
+                    notes = []
+                    rc = run_njoy_job(job, self.exe, register_proc=self._register, on_module=on_module, notes=notes)
+                    if notes: info["notes"] = notes
+                    success = (rc == 0)
+                    msg = "OK" if success else f"Exit code {rc}"
+                    info["exit_code"] = rc
+                    if success and key and not self.cache.store(key, job["job_dir"], staged_inputs(job)):
+                        info["cache_stored"] = False
+                if success and job.get("hash_outputs"): info["outputs"] = output_digests(job)
+        except StagingError as e:
+            success, msg = False, str(e)
+        except Exception as e:
+            success, msg = False, f"Execution failed: {e}"
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._procs = {p for p in self._procs if p.poll() is None}
+                ready = []
+                if job.get("keep_result"):
+                    self._results[job_id] = success
+                    still_waiting = []
+                    for waiting_job in self._waiting:
+                        done = all(req in self._results for req in waiting_job.get("requires", ()))
+                        (ready if done else still_waiting).append(waiting_job)
+                    self._waiting = still_waiting
+            info["duration"] = round(time.time() - start, 3)
+            self.events.put(("finished", job_id, success, msg, info))
+            for ready_job in ready: self._pool.submit(self._worker, ready_job)
@@ -0,0 +1,136 @@
+import json
+import os
+from module_registry import AVAILABLE_MODULES
+from class_def import NjoyCard, NjoyInput, track_reads
+
+
+def module_type_key(mod):
+    for key, cls in AVAILABLE_MODULES.items():
+        if isinstance(mod, cls): return key
+    return None
+
+
+def serialize_modules(modules):
+    """Raw NjoyInput values mapped by Module/Card (the project JSON layout)."""
+    data = []
+    for mod in modules:
+        mod_type_key = module_type_key(mod)
+        if not mod_type_key: continue
+
+        cards_data = {}
+        for card in mod.cards:
+            inputs_data = {}
+            for inp in card.inputs:
+                inputs_data[inp.name] = inp.value
+            cards_data[card.name] = inputs_data
+        
+        data.append({"type": mod_type_key, "cards": cards_data})
+    return data
+
+
+def apply_data_to_module(module, saved_cards):
+    for card in module.cards:
+        if card.name in saved_cards:
+            for inp in card.inputs:
+                if inp.name in saved_cards[card.name]:
+                    inp.value = saved_cards[card.name][inp.name]
+
+
+def _input_names(mod):
+    return {inp: (card.name, inp.name) for card in mod.cards for inp in card.inputs}
+
+
+def _control_values(mod, controls):
+    cards = {card.name: card for card in mod.cards}
+    values = []
+    for card_name, inp_name in controls:
+        inp = getattr(cards.get(card_name), inp_name, None)
+        values.append(None if inp is None else inp.value)
+    return values
+
+
+def regenerate_keeping_values(mod):
+    """
+    regenerate() rebuilds the cards with default values, so re-apply the current ones.
+
+    The inputs regenerate() reads (nmat, iopt, nza, ...) are recorded as the
+    structure controls of the module: while their values are unchanged the
+    layout is the same and nothing is rebuilt. Otherwise the cards whose
+    inputs are unchanged are kept (same NjoyCard/NjoyInput objects, so the
+    widgets bound to them stay valid) and only the others are replaced.
+    """
+    if not hasattr(mod, 'regenerate'): return
+    controls = getattr(mod, '_structure_controls', None)
+    if controls is not None and _control_values(mod, controls) == mod._structure_values: return
+
+    old_cards = list(mod.cards)
+    names = _input_names(mod)
+    saved = {c.name: {inp.name: inp.value for inp in c.inputs} for c in mod.cards}
+    with track_reads() as reads:
+        mod.regenerate()
+    names.update(_input_names(mod))
+
+    # Keep the unaffected cards (closures only reach other inputs through the module)
+    old_by_name = {c.name: c for c in old_cards}
+    kept = {}  # new card/input -> the old one put back in its place
+    for k, card in enumerate(mod.cards):
+        prev = old_by_name.get(card.name)
+        if prev is None or [i.name for i in prev.inputs] != [i.name for i in card.inputs]: continue
+        mod.cards[k] = prev
+        kept[card] = prev
+        kept.update(zip(card.inputs, prev.inputs))
+    # Module attributes are not always named after their card (GROUPR c9_dummy, RECONR comment cards...)
+    if kept:
+        for attr, value in list(vars(mod).items()):
+            if isinstance(value, (NjoyCard, NjoyInput)) and value in kept: setattr(mod, attr, kept[value])
+
+    apply_data_to_module(mod, saved)
+    mod._structure_controls = sorted({names[inp] for inp in reads if inp in names})
+    mod._structure_values = _control_values(mod, mod._structure_controls)
+
+
+def build_module(mod_entry):
+    """Instantiates one saved module entry. Returns None for unknown types."""
+    mod_type = mod_entry.get("type")
+    if mod_type not in AVAILABLE_MODULES: return None
+
+    new_mod = AVAILABLE_MODULES[mod_type]()
+    saved_cards = mod_entry.get("cards", {})
+
+    # Pass 1: Initialize Control Variables
+    apply_data_to_module(new_mod, saved_cards)
+
+    # Regenerate Structure
+    if hasattr(new_mod, "regenerate"):
+        new_mod.regenerate()
+
+    # Pass 2: Fill Dynamic Data
+    apply_data_to_module(new_mod, saved_cards)
+    return new_mod
+
+
+def build_modules(data):
+    return [m for m in (build_module(entry) for entry in data) if m is not None]
+
+
+def load_project_file(path):
+    with open(path, "r") as f:
+        return build_modules(json.load(f))
+
+
+def write_state_json(job_dir, state):
+    """Writes a project state (serialize_modules layout) to project_state.json in the run directory."""
+    json_path = os.path.join(job_dir, "project_state.json")
+    try:
+        with open(json_path, "w") as f:
+            json.dump(state, f, indent=4)
+    except Exception as e:
+        print(f"Failed to save state JSON: {e}")
+
+
+def save_state_json(job_dir, modules):
+    """
+    Saves the current configuration of all modules to a project_state.json file
+    within the run directory (allows reproducibility of the run).
+    """
+    write_state_json(job_dir, serialize_modules(modules))
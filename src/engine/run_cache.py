@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from engine.tape_staging import stage_tape
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".njoy_able", "run_cache")
+DEFAULT_MAX_BYTES = 20 * 1024**3  # 20 GB
+
+# Files written by the GUI itself, never part of a cached result
+NON_RESULT_FILES = {"input.inp", "project_state.json"}
+
+_digest_memo = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(path):
+    """
+    SHA-256 of a file's content.
+    Memoized on (path, size, mtime) so a library tape is only read once per session.
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    memo_key = (path, st.st_size, st.st_mtime_ns)
+    with _digest_lock:
+        if memo_key in _digest_memo: return _digest_memo[memo_key]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""): h.update(chunk)
+    digest = h.hexdigest()
+
+    with _digest_lock: _digest_memo[memo_key] = digest
+    return digest
+
+
+class RunCache:
+    """
+    Content-addressed store of finished NJOY runs.
+
+    The key covers everything that determines the result: the deck text,
+    the NJOY executable and the content of every staged tape. Each entry
+    is a folder holding the files NJOY produced; entries are evicted
+    least-recently-used first once the store grows above `max_bytes`.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.store_failures = 0
+        self.last_store_error = None
+        os.makedirs(self.root, exist_ok=True)
+
+    def make_key(self, content, exe, tapes):
+        h = hashlib.sha256()
+        h.update(content.encode("utf-8"))
+
+        exe_path = shutil.which(exe) or exe
+        h.update(b"\0exe\0")
+        if os.path.isfile(exe_path): h.update(file_digest(exe_path).encode())
+        else: h.update(str(exe).encode("utf-8"))
+
+        for unit in sorted(tapes, key=int):
+            h.update(f"\0tape{int(unit)}\0{file_digest(tapes[unit])}".encode())
+        return h.hexdigest()
+
+    def _entry_dir(self, key): return os.path.join(self.root, key)
+
+    def restore(self, key, job_dir):
+        """Copies a cached result into job_dir. Returns False on a miss."""
+        entry = self._entry_dir(key)
+        meta_path = os.path.join(entry, "meta.json")
+        try:
+            with open(meta_path, "r") as f: meta = json.load(f)
+            os.makedirs(job_dir, exist_ok=True)
+            for name in meta["files"]:
+                # Writable staging: a later NJOY run in job_dir must not alter the cache
+                stage_tape(os.path.join(entry, "files", name), os.path.join(job_dir, name), writable=True)
+            os.utime(meta_path)  # LRU bookkeeping
+            return True
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def store(self, key, job_dir, staged_names=()):
+        """
+        Saves the files produced in job_dir (everything but the staged tapes NJOY only read).
+        Returns False when the entry could not be written (counted in stats()).
+        """
+        skip = NON_RESULT_FILES | set(staged_names)
+        names = [n for n in os.listdir(job_dir) if n not in skip and os.path.isfile(os.path.join(job_dir, n))]
+
+        entry = self._entry_dir(key)
+        if os.path.exists(entry): return True
+        tmp = f"{entry}.tmp{os.getpid()}_{threading.get_ident()}"
+        try:
+            os.makedirs(os.path.join(tmp, "files"))
+            size = 0
+            for name in names:
+                stage_tape(os.path.join(job_dir, name), os.path.join(tmp, "files", name), writable=True)
+                size += os.path.getsize(os.path.join(tmp, "files", name))
+            with open(os.path.join(tmp, "meta.json"), "w") as f:
+                json.dump({"files": names, "size": size, "created": time.time()}, f)
+            os.replace(tmp, entry)
+        except OSError as e:
+            shutil.rmtree(tmp, ignore_errors=True)
+            with self._lock:
+                self.store_failures += 1
+                self.last_store_error = str(e)
+            return False
+        self.evict()
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {"store_failures": self.store_failures, "last_store_error": self.last_store_error}
+
+    def evict(self):
+        """Drops least-recently-used entries until the store fits in max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            for key in os.listdir(self.root):
+                meta_path = os.path.join(self.root, key, "meta.json")
+                try:
+                    with open(meta_path, "r") as f: size = json.load(f)["size"]
+                    entries.append((os.path.getmtime(meta_path), size, key))
+                    total += size
+                except (OSError, ValueError, KeyError):
+                    continue
+
+            for _, size, key in sorted(entries):
+                if total <= self.max_bytes: break
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+                total -= size
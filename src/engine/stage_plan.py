@@ -0,0 +1,66 @@
+# ==============================================================================
+# STAGE PLANNING (which part of the module chain depends on the sweep)
+# ==============================================================================
+
+def tape_units(values):
+    """Tape numbers of an input_files/output_files list (sign = ASCII/binary, 0 = unused)."""
+    units = set()
+    for value in values:
+        try: unit = abs(int(value))
+        except (TypeError, ValueError): continue
+        if unit: units.add(unit)
+    return units
+
+
+def _active_inputs(mod):
+    """Inputs of the cards written in the deck (cards whose active_if fails are skipped)."""
+    for card in getattr(mod, "cards", []):
+        try:
+            if card.active_if and not card.active_if(): continue
+        except Exception:
+            pass
+        yield from card.inputs
+
+
+def read_units(mod):
+    """Tape units a module reads: every active input flagged is_input_file (nendf, nin, npend...)."""
+    return tape_units(inp.value for inp in _active_inputs(mod) if inp.is_input_file)
+
+
+def written_units(mod):
+    """Tape units a module writes: every active input flagged is_output_file."""
+    return tape_units(inp.value for inp in _active_inputs(mod) if inp.is_output_file)
+
+
+def dirty_modules(modules, variables):
+    """
+    Indices of the modules whose deck or input tapes change between sweep points:
+    the module owning a swept value, every module reading a swept tape unit,
+    and every module reading a tape written by a dirty module.
+    """
+    dirty = set()
+    swept_units = set()
+    for var in variables:
+        m_idx = var["key"][0]
+        dirty.add(m_idx)
+        if var.get("is_file_input"): swept_units |= tape_units([var.get("base_unit")])
+
+    changed = set(swept_units)  # units whose content differs between sweep points
+    for i, mod in enumerate(modules):
+        if read_units(mod) & changed: dirty.add(i)
+        written = written_units(mod)
+        if i in dirty: changed |= written
+        else: changed -= written  # rewritten by a module identical for every point
+    return dirty
+
+
+def shared_prefix_length(modules, variables):
+    """
+    Number of leading modules that are identical for every sweep point.
+    They can run once, their output tapes being handed to every job.
+    Returns 0 when nothing can be shared (first module swept, or nothing left to fan out).
+    """
+    dirty = dirty_modules(modules, variables)
+    if not dirty: return 0
+    first = min(dirty)
+    return first if 0 < first < len(modules) else 0
@@ -0,0 +1,148 @@
+import os
+from bisect import bisect_right
+
+
+class SweepPlan:
+    """
+    Lazy Cartesian product of the sweep variables.
+
+    Combinations are never stored: run number `raw` is decoded on demand
+    (mixed radix, last variable varying fastest, same order as
+    itertools.product). Deleted rows are kept as sorted ranges of raw
+    indices, so memory only grows with the number of delete operations,
+    not with the size of the sweep.
+    """
+
+    def __init__(self, defined_vars):
+        self.variables = [dict(v) for v in defined_vars]
+        self.sizes = [len(v["values"]) for v in self.variables]
+        self.total = 1
+        for n in self.sizes: self.total *= n
+        if not self.variables: self.total = 0
+
+        self._gaps = []        # sorted, disjoint [start, stop) raw ranges
+        self._gap_pos = []     # visible index at which each gap sits
+        self._gap_before = []  # deleted count before each gap (inclusive prefix)
+
+    # --- Persistence ---
+
+    def to_dict(self):
+        """JSON-friendly description (variables and deleted ranges), see from_dict()."""
+        return {
+            "variables": [dict(v, key=list(v["key"])) for v in self.variables],
+            "deleted": [list(g) for g in self._gaps],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        plan = cls([dict(v, key=tuple(v["key"])) for v in data["variables"]])
+        plan._add_gaps([list(g) for g in data.get("deleted", [])])
+        return plan
+
+    # --- Sizing / Indexing ---
+
+    @property
+    def deleted(self): return self._gap_before[-1] if self._gap_before else 0
+
+    def __len__(self): return self.total - self.deleted
+
+    def raw_index(self, i):
+        """Maps a visible row index (0-based) to its raw combination index."""
+        if i < 0: i += len(self)
+        if not 0 <= i < len(self): raise IndexError("SweepPlan index out of range")
+        k = bisect_right(self._gap_pos, i)
+        return i + (self._gap_before[k - 1] if k else 0)
+
+    def is_deleted(self, raw):
+        k = bisect_right(self._gaps, (raw, float("inf")))
+        return k > 0 and self._gaps[k - 1][1] > raw
+
+    def __getitem__(self, i): return self.run(self.raw_index(i))
+
+    def __iter__(self):
+        raw = 0
+        for start, stop in self._gaps + [(self.total, self.total)]:
+            while raw < start:
+                yield self.run(raw)
+                raw += 1
+            raw = max(raw, stop)
+
+    # --- Decoding ---
+
+    def combination(self, raw):
+        combo = [None] * len(self.sizes)
+        for j in range(len(self.sizes) - 1, -1, -1):
+            raw, digit = divmod(raw, self.sizes[j])
+            combo[j] = self.variables[j]["values"][digit]
+        return combo
+
+    def run(self, raw):
+        """Builds the run description (same layout as the former planned_runs entries)."""
+        folder_parts = [f"Run_{raw+1}"]
+        desc_parts = []
+        run_config = []
+
+        for var_def, val in zip(self.variables, self.combination(raw)):
+            var_name = var_def["display"].split(">")[-1].strip()
+
+            safe_val = os.path.basename(str(val)).replace(".", "p")
+            folder_parts.append(f"{var_name}_{safe_val}")
+
+            display_val = os.path.basename(val) if var_def["is_file_input"] else val
+            desc_parts.append(f"{var_name}={display_val}")
+
+            run_config.append({
+                "key": var_def["key"],
+                "val": val,
+                "is_file": var_def["is_file_input"],
+                "base_unit": var_def["base_unit"]
+            })
+
+        return {
+            "id": raw + 1,
+            "folder": "_".join(folder_parts),
+            "desc": ", ".join(desc_parts),
+            "config": run_config
+        }
+
+    # --- Deletion Mask ---
+
+    def delete_raw(self, raw_indices):
+        """Removes the given raw combination indices from the plan."""
+        ranges = []
+        for raw in sorted(set(raw_indices)):
+            if ranges and ranges[-1][1] == raw: ranges[-1][1] = raw + 1
+            else: ranges.append([raw, raw + 1])
+        self._add_gaps(ranges)
+
+    def delete_range(self, start, stop):
+        """Removes visible rows [start, stop)."""
+        stop = min(stop, len(self))
+        if start >= stop: return
+        ranges = []
+        i = start
+        while i < stop:
+            raw = self.raw_index(i)
+            # Extend the run of consecutive raw indices up to the next gap
+            k = bisect_right(self._gaps, (raw, float("inf")))
+            limit = self._gaps[k][0] if k < len(self._gaps) else self.total
+            n = min(stop - i, limit - raw)
+            ranges.append([raw, raw + n])
+            i += n
+        self._add_gaps(ranges)
+
+    def _add_gaps(self, ranges):
+        merged = []
+        for start, stop in sorted([list(g) for g in self._gaps] + ranges):
+            start, stop = max(0, start), min(self.total, stop)
+            if start >= stop: continue
+            if merged and start <= merged[-1][1]: merged[-1][1] = max(merged[-1][1], stop)
+            else: merged.append([start, stop])
+
+        self._gaps = [tuple(g) for g in merged]
+        self._gap_pos, self._gap_before = [], []
+        before = 0
+        for start, stop in self._gaps:
+            self._gap_pos.append(start - before)
+            before += stop - start
+            self._gap_before.append(before)
@@ -0,0 +1,162 @@
+import os
+import queue
+from engine.stage_plan import read_units, written_units
+from engine.tape_staging import stage_tape, output_units, subset_materials
+from engine.parallel_runner import ParallelJobRunner
+from engine.project_state import save_state_json
+from engine.batch import generate_full_input
+
+BRANCH_FOLDER = "branches"
+
+# ==============================================================================
+# TAPE DEPENDENCY GRAPH
+# ==============================================================================
+
+def tape_sources(modules):
+    """
+    For each module, {unit: index of the last module before it writing that unit}
+    for the tape units it reads (every is_input_file input of its active cards).
+    Units nobody wrote before are read from the environment (user tapes) and
+    do not appear.
+    """
+    last_writer = {}
+    sources = []
+    for i, mod in enumerate(modules):
+        sources.append({u: last_writer[u] for u in read_units(mod) if u in last_writer})
+        for u in written_units(mod): last_writer[u] = i
+    return sources
+
+
+def last_writers(modules):
+    """{unit: index of the last module writing it}: the tapes a single run would leave."""
+    writers = {}
+    for i, mod in enumerate(modules):
+        for u in written_units(mod): writers[u] = i
+    return writers
+
+
+def module_dependencies(modules):
+    """For each module, the set of module indices it needs tapes from."""
+    return [set(src.values()) for src in tape_sources(modules)]
+
+
+def split_branches(modules):
+    """
+    Groups the module chain into branches, each one a separate NJOY run.
+
+    Straight chains (B only needs A and nobody else needs A) stay in the
+    same run; a module needing several branches, or several modules
+    needing the same one (e.g. ACER and GROUPR both reading the BROADR
+    tape), start new branches. Returns a list of dicts:
+        {"modules": [module indices], "requires": [branch indices]}
+    in an order where requirements always come first.
+    """
+    deps = module_dependencies(modules)
+    dependents = [set() for _ in modules]
+    for j, d in enumerate(deps):
+        for i in d: dependents[i].add(j)
+
+    branch_of = {}
+    branches = []
+    for j, d in enumerate(deps):
+        if len(d) == 1:
+            (i,) = d
+            b = branch_of[i]
+            if dependents[i] == {j} and branches[b]["modules"][-1] == i:
+                branches[b]["modules"].append(j)
+                branch_of[j] = b
+                continue
+        branch_of[j] = len(branches)
+        branches.append({"modules": [j], "requires": []})
+
+    for b, branch in enumerate(branches):
+        required = {branch_of[i] for j in branch["modules"] for i in deps[j]} - {b}
+        branch["requires"] = sorted(required)
+    return branches
+
+
+# ==============================================================================
+# BRANCH EXECUTION
+# ==============================================================================
+
+def _branch_name(b, modules, branch):
+    names = "_".join(modules[i].name for i in branch["modules"])
+    return f"B{b+1}_{names}"
+
+
+def build_branch_jobs(modules, out_dir, user_tapes, staging="auto", subset=False):
+    """
+    One runner job per branch, in <out_dir>/branches/<name>. Tapes written
+    by a required branch are staged from its folder, the others from the
+    user tapes (cut down to the referenced materials with subset=True).
+    """
+    branches = split_branches(modules)
+    sources = tape_sources(modules)
+    branch_of = {i: b for b, branch in enumerate(branches) for i in branch["modules"]}
+    jobs = []
+    for b, branch in enumerate(branches):
+        job_dir = os.path.join(out_dir, BRANCH_FOLDER, _branch_name(b, modules, branch))
+        os.makedirs(job_dir, exist_ok=True)
+        mods = [modules[i] for i in branch["modules"]]
+
+        tapes = {int(unit): path for unit, path in user_tapes.items() if os.path.exists(path)}
+        staged_from = set()
+        for i in branch["modules"]:
+            for u, writer in sources[i].items():
+                if branch_of[writer] != b:
+                    tapes[u] = os.path.join(jobs[branch_of[writer]]["job_dir"], f"tape{u}")
+                    staged_from.add(u)
+        produced_here = output_units(mods) - {0}
+
+        save_state_json(job_dir, mods)
+        jobs.append({
+            "id": f"B{b+1}",
+            "job_dir": job_dir,
+            "content": generate_full_input(mods),
+            "tapes": tapes,
+            "staging": staging,
+            "writable_units": output_units(mods),
+            "requires": [f"B{r+1}" for r in branch["requires"]],
+            "keep_result": True,
+            "log_name": "output.log",
+            "produces": sorted(produced_here),
+            "subset": {u: m for u, m in subset_materials(mods).items() if u not in staged_from} if subset else {},
+        })
+    return jobs
+
+
+def run_branches(modules, out_dir, user_tapes, exe, staging="auto", max_workers=None, on_event=None, subset=False):
+    """
+    Runs the module chain as parallel NJOY invocations following the tape
+    graph, then gathers the final tapes and the logs into out_dir as if a
+    single run had produced them. Blocking; returns (success, jobs, {job id: finished event}).
+    """
+    jobs = build_branch_jobs(modules, out_dir, user_tapes, staging, subset)
+    runner = ParallelJobRunner(exe, max_workers or len(jobs))
+    for job in jobs: runner.submit(job)
+
+    results = {}
+    while len(results) < len(jobs):
+        try: event = runner.events.get(timeout=1.0)
+        except queue.Empty: continue
+        if event[0] == "finished": results[event[1]] = event
+        if on_event: on_event(event)
+    runner.shutdown(wait=True)
+
+    # Hand the tapes over: the last writer of each unit in module order wins, as in a single run
+    branch_of = {i: b for b, branch in enumerate(split_branches(modules)) for i in branch["modules"]}
+    for u, writer in sorted(last_writers(modules).items()):
+        job = jobs[branch_of[writer]]
+        if not results[job["id"]][2]: continue
+        src = os.path.join(job["job_dir"], f"tape{u}")
+        if os.path.exists(src): stage_tape(src, os.path.join(out_dir, f"tape{u}"), staging, writable=True)
+
+    with open(os.path.join(out_dir, "output.log"), "w") as log:
+        for job in jobs:
+            log.write(f"===== {os.path.basename(job['job_dir'])}: {results[job['id']][3]} =====\n")
+            try:
+                with open(os.path.join(job["job_dir"], "output.log"), "r", errors="replace") as f: log.write(f.read())
+            except OSError: pass
+
+    success = all(results[job["id"]][2] for job in jobs)
+    return success, jobs, results
@@ -0,0 +1,176 @@
+import os
+import re
+import shutil
+import threading
+from endf_tools.tape_index import index_tape
+from endf_tools.tape_subset import write_subset
+from engine.stage_plan import _active_inputs, written_units
+
+STRATEGIES = ("auto", "reflink", "hardlink", "symlink", "copy")
+
+# Cheapest first. Tapes NJOY writes to must never share data with the source,
+# so they are limited to copy-on-write clones or real copies.
+_READ_ONLY_ORDER = ("reflink", "hardlink", "symlink", "copy")
+_WRITABLE_ORDER = ("reflink", "copy")
+
+_FICLONE = 0x40049409  # Linux ioctl: share extents, copy-on-write (btrfs, xfs, ...)
+
+# (src device, dst device, strategy) -> works on that pair of filesystems
+_support = {}
+_support_lock = threading.Lock()
+
+
+def _reflink(src, dst):
+    import fcntl  # Not available on Windows, raises ImportError -> falls back
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.remove(dst)
+            raise
+
+
+def _hardlink(src, dst): os.link(src, dst)
+
+def _symlink(src, dst): os.symlink(os.path.abspath(src), dst)
+
+def _copy(src, dst): shutil.copy(src, dst)
+
+_IMPLEMENTATIONS = {"reflink": _reflink, "hardlink": _hardlink, "symlink": _symlink, "copy": _copy}
+
+
+class StagingError(Exception):
+    """A tape could not be placed in a job folder: NJOY must not run without it."""
+
+
+def stage_tape(src, dst, strategy="auto", writable=False):
+    """
+    Places `src` at `dst` (e.g. job_dir/tape20) using the cheapest safe method.
+    strategy: one of STRATEGIES. "auto" tries them cheapest first and
+    remembers which ones the filesystem pair supports.
+    writable: the unit is also written by NJOY; links are then refused.
+    Returns the strategy actually used.
+    """
+    if strategy not in STRATEGIES: raise ValueError(f"Unknown staging strategy: {strategy}")
+
+    safe_order = _WRITABLE_ORDER if writable else _READ_ONLY_ORDER
+    if strategy == "auto": candidates = safe_order
+    elif strategy in safe_order: candidates = (strategy, "copy")
+    else: candidates = ("copy",)
+
+    # Never write through an old link into somebody else's file
+    if os.path.lexists(dst): os.remove(dst)
+
+    try: devices = (os.stat(src).st_dev, os.stat(os.path.dirname(os.path.abspath(dst))).st_dev)
+    except OSError: devices = None
+
+    for name in candidates:
+        if name != "copy" and devices is not None:
+            with _support_lock:
+                if _support.get(devices + (name,)) is False: continue
+        try:
+            _IMPLEMENTATIONS[name](src, dst)
+        except (OSError, ImportError, NotImplementedError):
+            if name == "copy": raise
+            if devices is not None:
+                with _support_lock: _support[devices + (name,)] = False
+            continue
+        if devices is not None:
+            with _support_lock: _support[devices + (name,)] = True
+        return name
+    raise OSError(f"Could not stage {src}")
+
+
+def output_units(modules):
+    """Tape units written by the given modules (must be staged writable)."""
+    units = set()
+    for mod in modules: units |= written_units(mod)
+    return units
+
+
+# ==============================================================================
+# MATERIAL SUBSETS OF LIBRARY TAPES
+# ==============================================================================
+
+# Modules reading only the materials named in their deck: input tape -> material inputs
+_MATERIAL_SELECTORS = {
+    "reconr": {"nendf": r"mat_\d+"},
+    "broadr": {"nendf": r"mat1_\d+", "nin": r"mat1_\d+"},
+    "heatr": {"nendf": r"matd", "nin": r"matd"},
+    "unresr": {"nendf": r"matd", "nin": r"matd"},
+    "purr": {"nendf": r"matd", "nin": r"matd"},
+    "groupr": {"nendf": r"matb|matd", "npen": r"matb|matd"},
+}
+
+# (path, size, mtime) -> TapeIndex, shared by the jobs of a batch
+_indexes = {}
+_index_lock = threading.Lock()
+
+
+def subset_materials(modules):
+    """
+    {unit: [MAT, ...]} of the ASCII tapes that the chain only reads
+    material by material (RECONR mat_i, BROADR mat1_i, ...). Tapes that
+    any other module reads before the chain rewrites them, or that are
+    read in binary, are left out: they have to be staged whole.
+    """
+    mats, whole, written = {}, set(), set()
+    for mod in modules:
+        selectors = _MATERIAL_SELECTORS.get(getattr(mod, "name", ""), {})
+        inputs = list(_active_inputs(mod))
+        for inp in inputs:
+            if not inp.is_input_file: continue
+            try: unit = int(inp.value)
+            except (TypeError, ValueError): continue
+            if unit == 0 or abs(unit) in written: continue
+
+            found, ok = set(), unit > 0 and inp.name in selectors
+            if ok:
+                pattern = re.compile(f"^({selectors[inp.name]})$")
+                for other in inputs:
+                    if not pattern.match(other.name): continue
+                    try: mat = int(other.value)
+                    except (TypeError, ValueError): mat = -1
+                    if mat < 0: ok = False
+                    elif mat > 0: found.add(mat)
+            if ok and found: mats.setdefault(unit, set()).update(found)
+            else: whole.add(abs(unit))
+
+        for inp in inputs:
+            if inp.is_output_file:
+                try: written.add(abs(int(inp.value)))
+                except (TypeError, ValueError): pass
+    return {unit: sorted(m) for unit, m in mats.items() if unit not in whole}
+
+
+def _tape_index(src):
+    st = os.stat(src)
+    key = (os.path.abspath(src), st.st_size, st.st_mtime_ns)
+    with _index_lock: index = _indexes.get(key)
+    if index is None:
+        index = index_tape(src)
+        with _index_lock: _indexes[key] = index
+    return index
+
+
+def stage_subset(src, dst, mats, strategy="auto"):
+    """
+    Writes at `dst` only the TPID, the given MATs and the TEND record of
+    `src`. Falls back to stage_tape() when the tape is not indexable or
+    lacks one of the materials (NJOY then reports it as usual).
+    Returns (strategy actually used, why the whole tape was staged or None),
+    the strategy being "subset" or a stage_tape one.
+    """
+    try:
+        index = _tape_index(src)
+        missing = sorted(set(mats) - set(index.mats()))
+        if not index.sections: reason = "no ENDF sections"
+        elif missing: reason = f"MAT {', '.join(map(str, missing))} not on the tape"
+        else:
+            if os.path.lexists(dst): os.remove(dst)
+            write_subset(index, dst, mats)
+            return "subset", None
+    except (OSError, ValueError) as e:
+        reason = str(e)
+    return stage_tape(src, dst, strategy), f"{os.path.basename(src)} staged whole ({reason})"
@@ -1,38 +1,22 @@
-# Import Modules
-from modules.acer import Acer
-from modules.moder import Moder
-from modules.reconr import Reconr
-from modules.broadr import Broadr
-from modules.thermr import Thermr       
-from modules.groupr import Groupr
-from modules.viewr import Viewr
-from modules.errorr import Errorr
-from modules.plotr import Plotr
-from modules.unresr import Unresr
-from modules.heatr import Heatr
-from modules.purr import Purr
-from modules.gaspr import Gaspr
+from module_registry import AVAILABLE_MODULES
 
 # Import UI Components
 from gui_components.execution_panel import ExecutionPanel
 from gui_components.library_panel import TapeLibraryPanel
 from gui_components.GUI_helper import CollapsibleFrame, SmartInputRow
+from gui_components.update_scheduler import UpdateScheduler
 
 # Import New Managers
 from gui_components.project_manager import ProjectManager
 from gui_components.sequential_runner import SequentialRunManager
 from gui_components.ui_utils import UIUtils
+from endf_tools.material_db import MaterialDB, is_material_input
+from class_def import DependencyIndex, NjoyCard, NjoyInput
 
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 
-AVAILABLE_MODULES = {
-    "MODER": Moder, "RECONR": Reconr, "BROADR": Broadr, "THERMR": Thermr,
-    "ACER": Acer, "GROUPR": Groupr, "VIEWR": Viewr, "ERRORR": Errorr,   
-    "PLOTR": Plotr, "UNRESR": Unresr, "HEATR": Heatr, "PURR": Purr, "GASPR": Gaspr
-}
-
 class NJOYInputGUI:
     def __init__(self, root):
         self.root = root
@@ -41,7 +25,16 @@ class NJOYInputGUI:
         self.njoy_exe_path = "njoy21"
         self.output_dir_path = os.path.join(os.getcwd(), "njoy_seq_runs")
         self.user_tapes = {}     
+        self.tape_indexes = {}   # path -> endf_tools.tape_index.TapeIndex (None while indexing)
+        self._material_db = None
+        self._material_db_key = None
+        self.tape_staging = "auto"  # see engine.tape_staging.STRATEGIES
+        self.tape_subset = False    # stage only the referenced MATs of library tapes
         self.module_tapes = {}   
+        self._preview_blocks = None  # [(module, text)] currently shown in the preview, None until the first render
+        self._dirty_modules = []   # modules edited since the last preview update
+        self.update_scheduler = UpdateScheduler(root)
+        self.card_release_ms = 30000  # hidden card widgets are destroyed after this delay (None: keep them)
 
         # Initialize Helper Classes
         self.project_manager = ProjectManager(self, AVAILABLE_MODULES)
@@ -159,7 +152,7 @@ class NJOYInputGUI:
         new_mod.cached_widget = self._create_module_widget(new_mod)
         self.active_modules.append(new_mod)
         self.reorder_modules_layout()
-        self.update_preview()
+        self.update_preview(dirty=())
 
     def reorder_modules_layout(self):
         for child in self.scroll_frame.winfo_children(): child.pack_forget()
@@ -173,21 +166,22 @@ class NJOYInputGUI:
         if idx > 0:
             self.active_modules[idx], self.active_modules[idx-1] = self.active_modules[idx-1], self.active_modules[idx]
             self.reorder_modules_layout()
-            self.update_preview()
+            self.update_preview(dirty=())
 
     def move_module_down(self, module):
         idx = self.active_modules.index(module)
         if idx < len(self.active_modules) - 1:
             self.active_modules[idx], self.active_modules[idx+1] = self.active_modules[idx+1], self.active_modules[idx]
             self.reorder_modules_layout()
-            self.update_preview()
+            self.update_preview(dirty=())
 
     def delete_module(self, module):
+        self.update_scheduler.flush()  # pending updates may target its widgets
         if module in self.active_modules:
             if hasattr(module, 'cached_widget'): module.cached_widget.destroy()
             self.active_modules.remove(module)
             self.reorder_modules_layout()
-            self.update_preview()
+            self.update_preview(dirty=())
 
     def _create_module_widget(self, module):
         def show_mod_help():
@@ -202,59 +196,159 @@ class NJOYInputGUI:
         tk.Button(btn_frame, text="▼", width=2, relief="flat", bg="#e1e1e1", font=("Arial", 7), pady=0, command=lambda: self.move_module_down(module)).pack(side="left", padx=0)
         container.del_btn.configure(command=lambda: self.delete_module(module))
 
-        card_frames = []
-        for card in module.cards:
+        # Card frames are built the first time they become visible: [card, frame or None, hide token, visible]
+        card_frames = [[card, None, None, False] for card in module.cards]
+        deps = DependencyIndex()  # inputs read by each active_if / rule
+        rows = {}                 # NjoyInput -> SmartInputRow of the built cards
+        edited = []               # inputs edited since the last refresh
+
+        def build_card(card):
             def show_card_help(c=card): UIUtils.show_info(self.root, f"Card: {c.name}", c.description, c.ref)
             card_cont = CollapsibleFrame(container.sub_frame, title=card.name, help_command=show_card_help, show_delete=False)
-            
+
             for inp in card.inputs:
                 row = SmartInputRow(
                     parent=card_cont.sub_frame,
                     inp_obj=inp,
-                    update_callback=lambda: [self._check_visibility_rules(card_frames), self.update_preview()],
-                    options_callback=lambda obj, var, opts: UIUtils.open_selection_list(self.root, obj, var, opts),
+                    update_callback=lambda i=inp: [edited.append(i), self._on_input_edit(module, refresh_cards)],
+                    options_callback=self.open_options,
+                    scheduler=self.update_scheduler,
                     help_callback=lambda t, d, r: UIUtils.show_info(self.root, t, d, r)
                 )
                 row.pack(fill="x")
-            
-            card_frames.append((card, card_cont))
-        
-        self._check_visibility_rules(card_frames)
+                rows[inp] = row
+                deps.record(inp, inp.rule_reads)
+            return card_cont
+
+        def refresh_cards():
+            """Re-evaluates only the rules and active_if that read the edited inputs."""
+            changed = set(edited)
+            edited.clear()
+            for inp in changed: deps.record(inp, inp.rule_reads)  # validated earlier in the same flush
+            affected = deps.readers(changed)
+            for key in affected:
+                if isinstance(key, NjoyInput) and key not in changed and key in rows and rows[key].winfo_exists():
+                    rows[key].validate_visuals()
+                    deps.record(key, key.rule_reads)
+            cards = {key for key in affected if isinstance(key, NjoyCard)}
+            if cards: self._check_visibility_rules(card_frames, build_card, deps, cards)
+
+        self._check_visibility_rules(card_frames, build_card, deps)
         return container
 
-    def _check_visibility_rules(self, card_frames):
+    def _on_input_edit(self, module, refresh_cards):
+        """Queues the visibility check and the preview update of an edited module (once per burst of edits)."""
+        self.update_scheduler.schedule(("visibility", id(module)), refresh_cards)
+        if module not in self._dirty_modules: self._dirty_modules.append(module)
+        self.update_scheduler.schedule("preview", self._flush_preview)
+
+    def _flush_preview(self):
+        dirty, self._dirty_modules = self._dirty_modules, []
+        self.update_preview(dirty)
+
+    def get_material_db(self):
+        """Materials on the tapes of the library (rebuilt only when the tapes or their indexes change)."""
+        indexes = [(unit, self.tape_indexes.get(path)) for unit, path in sorted(self.user_tapes.items())]
+        key = tuple((unit, id(index)) for unit, index in indexes)
+        if key != self._material_db_key:
+            self._material_db = MaterialDB.from_indexes(indexes)
+            self._material_db_key = key
+        return self._material_db
+
+    def open_options(self, inp_obj, tk_var, options):
+        # MAT inputs list the evaluations of the loaded tapes (static MAT_DB when none is indexed)
+        if is_material_input(inp_obj.name):
+            db = self.get_material_db()
+            if len(db):
+                UIUtils.open_selection_list(self.root, inp_obj, tk_var, {}, search=db.search)
+                return
+        UIUtils.open_selection_list(self.root, inp_obj, tk_var, options)
+
+    def _check_visibility_rules(self, card_frames, build_card, deps, cards=None):
+        """Evaluates active_if of the given cards (all when None) and packs the visible frames in card order."""
+        toggled = False
+        for entry in card_frames:
+            card = entry[0]
+            if cards is not None and card not in cards: continue
+            try: visible = card.is_active()
+            finally: deps.record(card, card.active_reads)
+            toggled |= visible != entry[3]
+            entry[3] = visible
+        if cards is not None and not toggled: return
+
         desired_visible = []
-        for card, frame in card_frames:
-            if card.active_if is None or card.active_if(): desired_visible.append(frame)
-        
-        current_visible = [f for c, f in card_frames if f.winfo_manager() != '']
+        for entry in card_frames:
+            if not entry[3]: continue
+            if entry[1] is None: entry[1] = build_card(entry[0])
+            entry[2] = None
+            desired_visible.append(entry[1])
+
+        current_visible = [f for c, f, _, _ in card_frames if f is not None and f.winfo_manager() != '']
         if desired_visible == current_visible: return
 
-        for card, frame in card_frames: frame.pack_forget()
+        for entry in card_frames:
+            frame = entry[1]
+            if frame is None: continue
+            if frame.winfo_manager() != '' and entry[2] is None and frame not in desired_visible and self.card_release_ms is not None:
+                entry[2] = token = object()
+                self.root.after(self.card_release_ms, lambda e=entry, t=token: self._release_card(e, t))
+            frame.pack_forget()
         for frame in desired_visible: frame.pack(fill="x", pady=2)
 
-    def update_preview(self):
-        current_yview = self.preview_text.yview()
-        full_text = ""
-        self.module_tapes = {} 
+    def _release_card(self, entry, token):
+        """Destroys the widgets of a card still hidden since `token` was set (rebuilt from its inputs if it shows again)."""
+        if entry[2] is not token or entry[1] is None: return
+        self.update_scheduler.flush()  # pending validations may target its rows
+        try: entry[1].destroy()
+        except tk.TclError: pass
+        entry[1] = entry[2] = None
+
+    def _write_module(self, mod):
+        try: return mod.write() + "\n"
+        except Exception: return f"!!! Error generating {mod.name.upper()} !!!\n"
+
+    def update_preview(self, dirty=None):
+        """
+        Refreshes the preview. `dirty` lists the modules whose inputs changed
+        (None = all of them): only those are written again, the others reuse
+        their cached text (mod.cached_write). When the module order is
+        unchanged, only the lines of the modules whose text changed are
+        replaced in the widget.
+        """
+        self.module_tapes = {}
         try:
+            blocks = []
             for mod in self.active_modules:
-                try:
-                    full_text += mod.write() + "\n"
-                    for out_unit in mod.output_files:
-                        try: self.module_tapes[int(out_unit)] = f"Output of {mod.name.upper()}"
-                        except: pass
-                except Exception:
-                    full_text += f"!!! Error generating {mod.name.upper()} !!!\n"
-            
-            full_text += "stop\n"
+                if dirty is None or mod in dirty or not hasattr(mod, 'cached_write'):
+                    mod.cached_write = self._write_module(mod)
+                blocks.append((mod, mod.cached_write))
+                for out_unit in mod.output_files:
+                    try: self.module_tapes[int(out_unit)] = f"Output of {mod.name.upper()}"
+                    except: pass
+
             self.preview_text.config(state="normal")
-            self.preview_text.delete("1.0", tk.END)
-            self.preview_text.insert(tk.END, full_text)
-            self.preview_text.yview_moveto(current_yview[0])
+            previous = self._preview_blocks
+            if previous is not None and [m for m, _ in previous] == [m for m, _ in blocks]:
+                # Same layout: replace the changed blocks, bottom-up so the line numbers above stay valid
+                starts, line = [], 1
+                for _, text in previous:
+                    starts.append(line)
+                    line += text.count("\n")
+                for start, (_, old), (_, text) in reversed(list(zip(starts, previous, blocks))):
+                    if text is old or text == old: continue
+                    end = start + old.count("\n")
+                    self.preview_text.delete(f"{start}.0", f"{end}.0")
+                    self.preview_text.insert(f"{start}.0", text)
+            else:
+                current_yview = self.preview_text.yview()
+                self.preview_text.delete("1.0", tk.END)
+                self.preview_text.insert(tk.END, "".join(text for _, text in blocks) + "stop\n")
+                self.preview_text.yview_moveto(current_yview[0])
+            self._preview_blocks = blocks
             self.preview_text.config(state="disabled")
             self.lib_panel.refresh()
         except Exception as e: print(f"Preview error: {e}")
 
     def export_file(self):
+        self.update_scheduler.flush()
         self.project_manager.export_input_file(self.preview_text.get("1.0", tk.END))
\ No newline at end of file
@@ -87,11 +87,12 @@ class CollapsibleFrame(ttk.Frame):
 # 3. SMART INPUT ROW (COMPACT)
 # ==============================================================================
 class SmartInputRow(ttk.Frame):
-    def __init__(self, parent, inp_obj, update_callback, options_callback=None, help_callback=None):
+    def __init__(self, parent, inp_obj, update_callback, options_callback=None, help_callback=None, scheduler=None):
         super().__init__(parent)
         self.inp_obj = inp_obj
         self.update_callback = update_callback
         self.options_callback = options_callback
+        self.scheduler = scheduler  # UpdateScheduler: validation coalesced per burst of edits
         
         self.columnconfigure(1, weight=1) 
         
@@ -130,7 +131,8 @@ class SmartInputRow(ttk.Frame):
 
     def on_change(self, *args):
         self.inp_obj.value = self.var.get()
-        self.validate_visuals()
+        if self.scheduler: self.scheduler.schedule(("validate", id(self)), self.validate_visuals)
+        else: self.validate_visuals()
         if self.update_callback:
             self.update_callback()
 
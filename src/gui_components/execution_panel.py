@@ -1,15 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
-import shutil
-import subprocess
 import threading
-import json  # Required for state saving
+from engine.tape_staging import stage_tape, stage_subset, output_units, subset_materials, StagingError
+from engine.project_state import save_state_json, serialize_modules, write_state_json, build_modules
+from engine.tape_graph import split_branches, run_branches
+from engine.njoy_stream import NjoyProgress, run_njoy_streaming
 
 class ExecutionPanel(ttk.LabelFrame):
     def __init__(self, parent_widget, controller):
         super().__init__(parent_widget, text="3. Execution Manager", padding=5)
         self.controller = controller
+        self._progress = None
         self._setup_ui()
 
     def _setup_ui(self):
@@ -41,6 +43,17 @@ class ExecutionPanel(ttk.LabelFrame):
         self.btn_browse_dir = ttk.Button(r2, text="Browse...", command=self.browse_output_dir)
         self.btn_browse_dir.pack(side="right")
 
+        # Branch Row
+        self.var_branches = tk.BooleanVar(value=False)
+        self.chk_branches = ttk.Checkbutton(container, text="Run independent module branches in parallel", variable=self.var_branches)
+        self.chk_branches.pack(anchor="w", pady=2)
+
+        # Subset Row
+        self.var_subset = tk.BooleanVar(value=self.controller.tape_subset)
+        self.chk_subset = ttk.Checkbutton(container, text="Stage only the referenced materials of library tapes", variable=self.var_subset,
+                                          command=lambda: setattr(self.controller, "tape_subset", self.var_subset.get()))
+        self.chk_subset.pack(anchor="w", pady=2)
+
         # --- Bottom Area (Status + Button) ---
         bottom_frame = ttk.Frame(main_content)
         bottom_frame.pack(side="bottom", fill="x", pady=(10, 0))
@@ -73,6 +86,8 @@ class ExecutionPanel(ttk.LabelFrame):
         self.ent_dir.config(state=state)
         self.btn_browse_exe.config(state=state)
         self.btn_browse_dir.config(state=state)
+        self.chk_branches.config(state=state)
+        self.chk_subset.config(state=state)
         self.btn_run.config(state=state)
         
         if is_running:
@@ -103,15 +118,39 @@ class ExecutionPanel(ttk.LabelFrame):
         self._toggle_ui_state(is_running=True)
         
         # Capture current state from Main Thread before starting Worker Thread
+        self.controller.update_scheduler.flush()  # edits still waiting for the preview
         inp_content = self.controller.preview_text.get("1.0", tk.END)
         user_tapes = self.controller.user_tapes.copy()
-        active_modules = self.controller.active_modules # Reference is okay here
+        active_modules = self.controller.active_modules
+
+        # Several branches in the tape graph -> one NJOY process per branch
+        target = self._run_njoy_process
+        if self.var_branches.get() and len(split_branches(active_modules)) > 1:
+            target = self._run_njoy_branches
 
-        thread = threading.Thread(target=self._run_njoy_process, args=(exe, out_dir, inp_content, user_tapes, active_modules))
+        # The worker never touches the live modules: they may be edited while NJOY runs
+        if target == self._run_njoy_branches:
+            snapshot = build_modules(serialize_modules(active_modules))
+            args = (exe, out_dir, inp_content, user_tapes, snapshot, self.var_subset.get(), self.controller.tape_staging)
+        else:
+            writable = output_units(active_modules)
+            subset = subset_materials(active_modules) if self.var_subset.get() else {}
+            args = (exe, out_dir, inp_content, user_tapes, serialize_modules(active_modules),
+                    writable, subset, self.controller.tape_staging)
+            self._progress = NjoyProgress()
+            self.after(500, self._poll_progress)
+
+        thread = threading.Thread(target=target, args=args)
         thread.daemon = True
         thread.start()
 
-    def _run_njoy_process(self, exe, out_dir, inp_content, user_tapes, active_modules):
+    def _poll_progress(self):
+        """Shows the module NJOY is in while the single-process run is going."""
+        if self._progress is None: return
+        self.status_var.set(f"Status: Running {self._progress.describe()}")
+        self.after(500, self._poll_progress)
+
+    def _run_njoy_process(self, exe, out_dir, inp_content, user_tapes, state, writable, subset, staging):
         result = {"success": False, "msg": "", "returncode": None}
         inp_path = os.path.join(out_dir, "input.inp")
         
@@ -119,36 +158,40 @@ class ExecutionPanel(ttk.LabelFrame):
             # 1. Write Input File
             with open(inp_path, "w") as f: f.write(inp_content)
             
-            # 2. Copy Tape Files
+            # 2. Stage Tape Files (linked when safe, copied when NJOY writes the unit,
+            #    optionally cut down to the materials the deck references)
+            notes = []
             for unit, src_path in user_tapes.items():
-                dst_name = f"tape{unit}"
-                dst_path = os.path.join(out_dir, dst_name)
-                if os.path.exists(dst_path): os.remove(dst_path)
-                try: shutil.copy(src_path, dst_path)
-                except: pass
+                dst_path = os.path.join(out_dir, f"tape{unit}")
+                try:
+                    if int(unit) in subset and int(unit) not in writable:
+                        _, note = stage_subset(src_path, dst_path, subset[int(unit)], staging)
+                        if note: notes.append(f"tape{unit}: {note}")
+                    else: stage_tape(src_path, dst_path, staging, writable=int(unit) in writable)
+                except Exception as e: raise StagingError(f"Staging error: tape{unit} from {src_path}: {e}") from e
 
             # 3. NEW: Save Project State JSON
-            self._save_run_state_json(out_dir, active_modules)
+            write_state_json(out_dir, state)
 
-            # 4. Execute Subprocess
-            cmd = [exe]
-            with open(inp_path, "r") as stdin_f:
-                proc = subprocess.run(cmd, stdin=stdin_f, cwd=out_dir, capture_output=True, text=True)
-            
-            # 5. Write Logs
-            with open(os.path.join(out_dir, "output.log"), "w") as log: log.write(proc.stdout)
-            if proc.stderr:
-                with open(os.path.join(out_dir, "error.log"), "w") as err: err.write(proc.stderr)
+            # 4. Execute Subprocess (listing streamed to disk, parsed for progress)
+            returncode, tail = run_njoy_streaming(exe, inp_content, out_dir, os.path.join(out_dir, "output.log"),
+                                                  progress=self._progress, stderr_path=os.path.join(out_dir, "error.log"))
+            err_path = os.path.join(out_dir, "error.log")
+            if os.path.exists(err_path) and os.path.getsize(err_path) == 0: os.remove(err_path)
 
-            result["returncode"] = proc.returncode
-            if proc.returncode == 0:
+            result["returncode"] = returncode
+            if returncode == 0:
                 result["success"] = True
                 result["msg"] = f"NJOY Run Complete!\nFiles are in: {out_dir}"
+                if notes: result["msg"] += "\n\n" + "\n".join(notes)
             else:
                 result["success"] = False
-                tail = "\n".join(proc.stdout.splitlines()[-20:]) if proc.stdout else "No output."
-                result["msg"] = f"NJOY Execution Failed (Code {proc.returncode})\n\nLast Output:\n{tail}"
+                tail = "\n".join(tail) if tail else "No output."
+                result["msg"] = f"NJOY Execution Failed (Code {returncode})\n\nLast Output:\n{tail}"
 
+        except StagingError as e:
+            result["success"] = False
+            result["msg"] = f"{e}\n\nNJOY was not started."
         except Exception as e:
             result["success"] = False
             result["msg"] = f"System Error:\n{str(e)}"
@@ -156,41 +199,38 @@ class ExecutionPanel(ttk.LabelFrame):
         # Schedule UI update on Main Thread
         self.after(0, lambda: self._on_process_complete(result))
 
-    def _save_run_state_json(self, job_dir, modules):
-        """
-        Saves the current configuration of all modules to a project_state.json file.
-        This allows reproducibility of the single run.
-        """
-        data = []
-        # Dynamic import to avoid circular dependency issues at top level
-        from gui_app import AVAILABLE_MODULES 
-        
-        for mod in modules:
-            mod_type_key = None
-            for key, cls in AVAILABLE_MODULES.items():
-                if isinstance(mod, cls):
-                    mod_type_key = key
-                    break
-            
-            if not mod_type_key: continue
-
-            cards_data = {}
-            for card in mod.cards:
-                inputs_data = {}
-                for inp in card.inputs:
-                    inputs_data[inp.name] = inp.value
-                cards_data[card.name] = inputs_data
-            
-            data.append({"type": mod_type_key, "cards": cards_data})
-
-        json_path = os.path.join(job_dir, "project_state.json")
+    def _run_njoy_branches(self, exe, out_dir, inp_content, user_tapes, modules, subset, staging):
+        result = {"success": False, "msg": "", "returncode": None}
         try:
-            with open(json_path, "w") as f:
-                json.dump(data, f, indent=4)
+            with open(os.path.join(out_dir, "input.inp"), "w") as f: f.write(inp_content)
+            save_state_json(out_dir, modules)
+
+            running = {}
+            def on_event(event):
+                if event[0] == "finished": running.pop(event[1], None)
+                elif event[0] == "started": running[event[1]] = "..."
+                elif event[0] == "progress": running[event[1]] = event[2]
+                text = ", ".join(f"{b}: {m}" for b, m in sorted(running.items()))
+                self.after(0, lambda: self.status_var.set(f"Status: Running {text}"))
+
+            success, jobs, results = run_branches(modules, out_dir, user_tapes, exe, staging, on_event=on_event, subset=subset)
+            result["success"] = success
+            if success:
+                result["msg"] = f"NJOY Run Complete ({len(jobs)} parallel branches)!\nFiles are in: {out_dir}"
+                notes = [n for j in jobs for n in results[j["id"]][4].get("notes", [])]
+                if notes: result["msg"] += "\n\n" + "\n".join(notes)
+            else:
+                failed = [os.path.basename(j["job_dir"]) + ": " + results[j["id"]][3] for j in jobs if not results[j["id"]][2]]
+                result["msg"] = "NJOY Execution Failed\n\n" + "\n".join(failed) + f"\n\nLogs: {os.path.join(out_dir, 'output.log')}"
+
         except Exception as e:
-            print(f"Failed to save state JSON: {e}")
+            result["success"] = False
+            result["msg"] = f"System Error:\n{str(e)}"
+
+        self.after(0, lambda: self._on_process_complete(result))
 
     def _on_process_complete(self, result):
+        self._progress = None
         self._toggle_ui_state(is_running=False)
         if result["success"]:
             self.status_var.set("Status: Finished Successfully")
@@ -1,11 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, simpledialog, messagebox
 import os
+import threading
+from endf_tools.tape_index import index_tape
+from endf_tools.index_cache import IndexCache, index_directory
 
 class TapeLibraryPanel(ttk.LabelFrame):
     def __init__(self, parent_widget, controller):
         super().__init__(parent_widget, text="2. Tape Library", padding=5)
         self.controller = controller
+        self.status_var = tk.StringVar(value="")
+        try: self.index_cache = IndexCache()
+        except OSError as e:
+            self.status_var.set(f"Tape index cache disabled: {e}")
+            self.index_cache = None
         self._setup_ui()
 
     def _setup_ui(self):
@@ -13,6 +21,8 @@ class TapeLibraryPanel(ttk.LabelFrame):
         lib_tool = ttk.Frame(self)
         lib_tool.pack(fill="x", pady=(0, 5))
         ttk.Button(lib_tool, text="+ Load Input File", command=self.add_input_tape).pack(side="left")
+        ttk.Button(lib_tool, text="Index Library Folder...", command=self.index_library_folder).pack(side="left", padx=5)
+        ttk.Label(lib_tool, textvariable=self.status_var, foreground="gray").pack(side="left", padx=5)
 
         # --- Split Columns Container ---
         lib_split = ttk.Frame(self)
@@ -37,10 +47,12 @@ class TapeLibraryPanel(ttk.LabelFrame):
         tk.Label(col1, text="User Inputs ", fg="green", font=("Segoe UI", 9, "bold"), bg="white").grid(row=0, column=0, sticky="w")
         
         # Row 1: Treeview & Scrollbar
-        self.tree_user = ttk.Treeview(col1, columns=("Unit", "File"), show='headings', height=4) # Height is default lines
+        self.tree_user = ttk.Treeview(col1, columns=("Unit", "File", "Content"), show='headings', height=4) # Height is default lines
         self.tree_user.heading("Unit", text="Unit")
         self.tree_user.heading("File", text="File Name")
+        self.tree_user.heading("Content", text="Content")
         self.tree_user.column("Unit", width=40, anchor="center")
+        self.tree_user.column("File", width=100)
         self.tree_user.grid(row=1, column=0, sticky="nsew", pady=2)
         
         sb_user = ttk.Scrollbar(col1, orient="vertical", command=self.tree_user.yview)
@@ -85,11 +97,49 @@ class TapeLibraryPanel(ttk.LabelFrame):
         for item in self.tree_mods.get_children(): self.tree_mods.delete(item)
 
         for unit, path in sorted(self.controller.user_tapes.items()):
-            self.tree_user.insert("", "end", values=(unit, os.path.basename(path)))
+            self.tree_user.insert("", "end", values=(unit, os.path.basename(path), self._tape_content(path)))
 
         for unit, desc in sorted(self.controller.module_tapes.items()):
             self.tree_mods.insert("", "end", values=(unit, desc))
 
+    def _tape_content(self, path):
+        """Summary of the tape materials; indexing is started in the background on first sight."""
+        indexes = self.controller.tape_indexes
+        if path not in indexes:
+            indexes[path] = None
+            threading.Thread(target=self._index_tape_worker, args=(path,), daemon=True).start()
+        index = indexes[path]
+        if index is None: return "indexing..."
+        if index is False: return "unreadable"
+        return index.summary() if index.sections else "no ENDF sections"
+
+    def _index_tape_worker(self, path):
+        try: index = self.index_cache.load_or_index(path) if self.index_cache else index_tape(path)
+        except (OSError, ValueError) as e:
+            msg = f"Could not index {os.path.basename(path)}: {e}"
+            self.after(0, lambda: self.status_var.set(msg))
+            index = False
+        self.controller.tape_indexes[path] = index
+        self.after(0, self.refresh)
+
+    def index_library_folder(self):
+        """Indexes a whole evaluated library (process pool) so its tapes load instantly afterwards."""
+        d = filedialog.askdirectory(title="Select Library Folder")
+        if not d or self.index_cache is None: return
+
+        def worker():
+            try:
+                found, counts = index_directory(d, self.index_cache)
+                msg = f"{len(found)} tapes indexed in {os.path.basename(d)} ({counts['cached']} already known)."
+                if counts["store_failures"]:
+                    msg += f"\n{counts['store_failures']} could not be cached: {counts['last_error']}"
+            except Exception as e:
+                found, msg = {}, f"Indexing failed: {e}"
+            self.controller.tape_indexes.update(found)
+            self.after(0, lambda: messagebox.showinfo("Library Indexed", msg))
+
+        threading.Thread(target=worker, daemon=True).start()
+
     def add_input_tape(self):
         f = filedialog.askopenfilename(title="Select Input ENDF/PENDF Tape")
         if not f: return
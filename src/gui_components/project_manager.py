@@ -1,6 +1,7 @@
 import json
 import os
 from tkinter import filedialog, messagebox
+from engine.project_state import serialize_modules, build_module
 
 class ProjectManager:
     """
@@ -11,29 +12,7 @@ class ProjectManager:
         self.AVAILABLE_MODULES = available_modules
 
     def save_project(self):
-        data = []
-        for mod in self.parent.active_modules:
-            # Identify class type
-            mod_type_key = None
-            for key, cls in self.AVAILABLE_MODULES.items():
-                if isinstance(mod, cls):
-                    mod_type_key = key
-                    break
-            
-            if not mod_type_key: continue
-
-            # Serialize Cards
-            cards_data = {}
-            for card in mod.cards:
-                inputs_data = {}
-                for inp in card.inputs:
-                    inputs_data[inp.name] = inp.value
-                cards_data[card.name] = inputs_data
-            
-            data.append({
-                "type": mod_type_key,
-                "cards": cards_data
-            })
+        data = serialize_modules(self.parent.active_modules)
 
         path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("NJOY Project", "*.json")])
         if path:
@@ -53,6 +32,7 @@ class ProjectManager:
                 data = json.load(f)
             
             # Clear UI
+            self.parent.update_scheduler.flush()
             for mod in self.parent.active_modules:
                 if hasattr(mod, 'cached_widget'):
                     mod.cached_widget.destroy()
@@ -60,21 +40,8 @@ class ProjectManager:
             
             # Rebuild
             for mod_entry in data:
-                mod_type = mod_entry.get("type")
-                if mod_type not in self.AVAILABLE_MODULES: continue
-                
-                new_mod = self.AVAILABLE_MODULES[mod_type]()
-                saved_cards = mod_entry.get("cards", {})
-
-                # Pass 1: Initialize Control Variables
-                self._apply_data_to_module(new_mod, saved_cards)
-
-                # Regenerate Structure
-                if hasattr(new_mod, "regenerate"):
-                    new_mod.regenerate()
-
-                # Pass 2: Fill Dynamic Data
-                self._apply_data_to_module(new_mod, saved_cards)
+                new_mod = build_module(mod_entry)
+                if new_mod is None: continue
 
                 # Add to UI
                 new_mod.cached_widget = self.parent._create_module_widget(new_mod)
@@ -87,13 +54,6 @@ class ProjectManager:
         except Exception as e:
             messagebox.showerror("Load Error", str(e))
 
-    def _apply_data_to_module(self, module, saved_cards):
-        for card in module.cards:
-            if card.name in saved_cards:
-                for inp in card.inputs:
-                    if inp.name in saved_cards[card.name]:
-                        inp.value = saved_cards[card.name][inp.name]
-
     def export_input_file(self, content):
         path = filedialog.asksaveasfilename(defaultextension=".inp", filetypes=[("NJOY Input", "*.inp")])
         if path:
@@ -1,11 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
+import json
 import subprocess
-import itertools
-import shutil
-import json  # Added import for JSON handling
+import queue
+import time
 from gui_components.ui_utils import UIUtils
+from gui_components.virtual_table import VirtualTable
+from engine.parallel_runner import ParallelJobRunner, default_max_workers
+from engine.run_cache import RunCache, DEFAULT_CACHE_DIR
+from engine.tape_staging import STRATEGIES
+from engine.sweep_plan import SweepPlan
+from engine.batch import BatchSession, SHARED_JOB_ID
+from engine.batch_manifest import BatchManifest, MANIFEST_NAME
+from engine.project_state import serialize_modules
 
 class SequentialRunManager:
     """
@@ -20,6 +28,9 @@ class SequentialRunManager:
         self.seq_map = {}       
         self.defined_vars = []  
         self.planned_runs = []  
+        self.runner = None
+        self.job_progress = {}  # job_id -> (current NJOY module, start time)
+        self.job_errors = {}    # job_id -> failure message of the running batch
 
     def open_window(self):
         if not self.active_modules:
@@ -105,7 +116,13 @@ class SequentialRunManager:
         def show_step2_help():
             desc = (
                 "Output Directory: All run folders will be created here.\n"
-                "NJOY Executable: Path to your installed NJOY binary."
+                "NJOY Executable: Path to your installed NJOY binary.\n"
+                "Parallel Jobs: Number of NJOY runs executed at the same time (default: one per CPU core).\n"
+                "Result Cache: Jobs whose input deck, executable and tapes were already run are\n"
+                "copied from this folder instead of calling NJOY again.\n"
+                "Tape Staging: How tapes are placed in each run folder. 'auto' uses the cheapest\n"
+                "method the disk supports (reflink, hardlink, symlink, copy). Tapes written by NJOY\n"
+                "are always cloned or copied so the original file is never modified."
             )
             UIUtils.show_info(self.win, "Step 2: Configuration", desc, "")
             
@@ -126,6 +143,25 @@ class SequentialRunManager:
         self.ent_exe.insert(0, self.parent.njoy_exe_path)
         self.ent_exe.grid(row=1, column=1, sticky="ew", padx=5)
         tk.Button(cfg_frame, text="...", width=3, command=lambda: self._browse_file(self.ent_exe)).grid(row=1, column=2)
+
+        tk.Label(cfg_frame, text="Parallel Jobs:", bg="#f9f9f9").grid(row=2, column=0, sticky="w")
+        self.var_workers = tk.IntVar(value=default_max_workers())
+        tk.Spinbox(cfg_frame, from_=1, to=256, width=6, textvariable=self.var_workers).grid(row=2, column=1, sticky="w", padx=5)
+
+        self.var_use_cache = tk.BooleanVar(value=True)
+        tk.Checkbutton(cfg_frame, text="Result Cache:", variable=self.var_use_cache, bg="#f9f9f9").grid(row=3, column=0, sticky="w", pady=5)
+        self.ent_cache = tk.Entry(cfg_frame)
+        self.ent_cache.insert(0, DEFAULT_CACHE_DIR)
+        self.ent_cache.grid(row=3, column=1, sticky="ew", padx=5)
+        tk.Button(cfg_frame, text="...", width=3, command=lambda: self._browse_dir(self.ent_cache)).grid(row=3, column=2)
+
+        tk.Label(cfg_frame, text="Tape Staging:", bg="#f9f9f9").grid(row=4, column=0, sticky="w")
+        self.var_staging = tk.StringVar(value=self.parent.tape_staging)
+        ttk.Combobox(cfg_frame, textvariable=self.var_staging, values=STRATEGIES, state="readonly", width=10).grid(row=4, column=1, sticky="w", padx=5)
+
+        self.var_subset = tk.BooleanVar(value=self.parent.tape_subset)
+        tk.Checkbutton(cfg_frame, text="Stage only the referenced materials of library tapes", variable=self.var_subset,
+                       bg="#f9f9f9").grid(row=5, column=0, columnspan=3, sticky="w")
         
         cfg_frame.columnconfigure(1, weight=1)
 
@@ -138,8 +174,10 @@ class SequentialRunManager:
         def show_step3_help():
             desc = (
                 "Click 'Generate Combinations' to create the full matrix of runs.\n"
-                "Select specific rows and click 'Delete Selected' to remove unwanted cases.\n"
-                "Click 'Execute Batch' to run all jobs in the list."
+                "Select rows (Shift/Ctrl-click for ranges, Ctrl+A for all) and click 'Delete Selected' to remove unwanted cases.\n"
+                "Click 'Execute Batch' to run all jobs in the list.\n"
+                "Each batch keeps a journal (batch_manifest.jsonl) in the output directory: after a crash,\n"
+                "'Resume Batch' reloads that job list and only runs the jobs that did not finish."
             )
             UIUtils.show_info(self.win, "Step 3: Job Matrix", desc, "")
             
@@ -151,24 +189,17 @@ class SequentialRunManager:
         tk.Button(btn_frame, text="Generate Combinations", command=self._generate_table_logic, bg="#e3f2fd").pack(side="left", padx=2)
         tk.Button(btn_frame, text="Delete Selected Rows", command=self._delete_rows_logic, bg="#ffebee").pack(side="left", padx=2)
 
-        cols = ("ID", "Parameters", "Output Folder")
-        self.tree = ttk.Treeview(parent, columns=cols, show="headings", selectmode="extended")
-        self.tree.heading("ID", text="#")
-        self.tree.column("ID", width=50, anchor="center")
-        self.tree.heading("Parameters", text="Configuration")
-        self.tree.column("Parameters", width=300)
-        self.tree.heading("Output Folder", text="Folder Name")
-        self.tree.column("Output Folder", width=200)
-        
-        vsb = ttk.Scrollbar(parent, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=vsb.set)
-        self.tree.pack(side="top", fill="both", expand=True)
-        vsb.pack(side="right", fill="y", before=self.tree)
+        cols = [("#", 50, "center"), ("Configuration", 300, "w"), ("Folder Name", 200, "w"), ("Status", 80, "center")]
+        self.table = VirtualTable(parent, cols)
+        self.table.pack(side="top", fill="both", expand=True)
 
         self.lbl_status = tk.Label(parent, text="Waiting...", fg="gray", font=("Segoe UI", 9))
         self.lbl_status.pack(pady=5)
         
-        tk.Button(parent, text="🚀 EXECUTE BATCH", command=self._launch_jobs_logic, bg="#4caf50", fg="white", font=("Segoe UI", 11, "bold"), pady=10).pack(side="bottom", fill="x")
+        self.btn_execute = tk.Button(parent, text="🚀 EXECUTE BATCH", command=self._launch_jobs_logic, bg="#4caf50", fg="white", font=("Segoe UI", 11, "bold"), pady=10)
+        self.btn_execute.pack(side="bottom", fill="x")
+        self.btn_resume = tk.Button(parent, text="↻ Resume Batch in Output Directory", command=self._resume_batch_logic, bg="#fff3e0")
+        self.btn_resume.pack(side="bottom", fill="x", pady=(0, 4))
 
     # --- Logic Helpers ---
 
@@ -229,208 +260,195 @@ class SequentialRunManager:
         self.defined_vars.pop(idx)
 
     def _generate_table_logic(self):
-        for row in self.tree.get_children(): self.tree.delete(row)
         self.planned_runs = []
-        
-        if not self.defined_vars: return
-
-        all_lists = [v["values"] for v in self.defined_vars]
-        combinations = list(itertools.product(*all_lists))
-        
-        for i, combo in enumerate(combinations):
-            folder_parts = [f"Run_{i+1}"]
-            desc_parts = []
-            run_config = []
-            
-            for j, val in enumerate(combo):
-                var_def = self.defined_vars[j]
-                var_name = var_def["display"].split(">")[-1].strip()
-                
-                safe_val = os.path.basename(str(val)).replace(".", "p")
-                folder_parts.append(f"{var_name}_{safe_val}")
-                
-                display_val = os.path.basename(val) if var_def["is_file_input"] else val
-                desc_parts.append(f"{var_name}={display_val}")
-                
-                run_config.append({
-                    "key": var_def["key"], 
-                    "val": val, 
-                    "is_file": var_def["is_file_input"],
-                    "base_unit": var_def["base_unit"]
-                })
-            
-            folder_name = "_".join(folder_parts)
-            self.tree.insert("", "end", iid=str(i), values=(i+1, ", ".join(desc_parts), folder_name))
-            self.planned_runs.append({
-                "id": i+1,
-                "folder": folder_name,
-                "config": run_config
-            })
+        if self.defined_vars:
+            # Combinations are enumerated lazily, the table only draws visible rows
+            self.planned_runs = SweepPlan(self.defined_vars)
+        self.table.statuses = {}
+        self.table.set_source(len(self.planned_runs), self._table_row)
+        self.lbl_status.config(text=f"{len(self.planned_runs)} jobs planned", fg="gray")
+
+    def _table_row(self, index):
+        run = self.planned_runs[index]
+        status = self.table.statuses.get(run["id"], "queued").capitalize()
+        if run["id"] in self.job_errors: status = f"Failed: {self.job_errors[run['id']]}"
+        if run["id"] in self.job_progress:
+            module, since = self.job_progress[run["id"]]
+            status = f"{module} {time.time() - since:.0f}s"
+        return run["id"], (run["id"], run["desc"], run["folder"], status)
 
     def _delete_rows_logic(self):
-        selected = self.tree.selection()
-        if not selected: return
-        
-        ids_to_remove = []
-        for item in selected:
-            vals = self.tree.item(item)['values']
-            ids_to_remove.append(int(vals[0]))
-            self.tree.delete(item)
-            
-        self.planned_runs = [r for r in self.planned_runs if r["id"] not in ids_to_remove]
-
-    def _launch_jobs_logic(self):
+        ranges = self.table.selected_ranges()
+        if not ranges or not self.planned_runs: return
+
+        # Delete from the bottom up so the remaining row indices stay valid
+        for start, stop in reversed(ranges):
+            self.planned_runs.delete_range(start, stop)
+        self.table.set_source(len(self.planned_runs), self._table_row)
+        self.lbl_status.config(text=f"{len(self.planned_runs)} jobs planned", fg="gray")
+
+    def _launch_jobs_logic(self, resume_manifest=None):
+        if self.runner is not None:
+            messagebox.showwarning("Busy", "A batch is already running.")
+            return
         if not self.planned_runs:
             messagebox.showerror("Error", "Job list is empty.")
             return
         
         out_root = self.ent_outdir.get()
         exe = self.ent_exe.get()
+        try: max_workers = max(1, int(self.var_workers.get()))
+        except (tk.TclError, ValueError): max_workers = default_max_workers()
         
         try: os.makedirs(out_root, exist_ok=True)
         except Exception as e:
             messagebox.showerror("Error", str(e))
             return
 
-        if not messagebox.askyesno("Confirm", f"Launch {len(self.planned_runs)} jobs?"): return
+        action = "Resume" if resume_manifest else "Launch"
+        if not messagebox.askyesno("Confirm", f"{action} {len(self.planned_runs)} jobs on {max_workers} parallel workers?"): return
 
-        backup = self._create_state_backup()
+        cache = None
+        if self.var_use_cache.get():
+            try: cache = RunCache(self.ent_cache.get())
+            except Exception as e: messagebox.showwarning("Result Cache", f"Result cache disabled: {e}")
 
-        success = 0
+        self.runner = ParallelJobRunner(exe, max_workers, cache=cache)
+        manifest = resume_manifest or BatchManifest(out_root)
         try:
-            for run in self.planned_runs:
-                self.lbl_status.config(text=f"Running Job {run['id']}...", fg="blue")
-                self.win.update()
+            session = BatchSession(self.active_modules, self.planned_runs, out_root, self.parent.user_tapes, self.runner,
+                                   self.var_staging.get(), manifest=manifest, resume=resume_manifest is not None,
+                                   subset=self.var_subset.get())
+        except Exception as e:
+            self.runner.shutdown()
+            self.runner = None
+            messagebox.showerror("Error", str(e))
+            return
 
-                self._apply_run_config(run["config"])
-                full_text = self._generate_full_input()
-                
-                # --- CHANGED: Passing the active_modules to save the JSON state ---
-                if self._execute_single_run(out_root, run["folder"], full_text, exe, run["config"], self.active_modules):
-                    success += 1
+        self._batch = {"out_root": out_root, "session": session}
+        self.btn_execute.config(state="disabled")
+        self.btn_resume.config(state="disabled")
+        self.job_progress = {}
+        self.job_errors = {}
+        self.table.clear_statuses()
+        self._pump_jobs()
+
+    def _resume_batch_logic(self):
+        """Reloads the plan journaled in the output folder and runs only the unfinished jobs."""
+        if self.runner is not None:
+            messagebox.showwarning("Busy", "A batch is already running.")
+            return
+        out_root = self.ent_outdir.get()
+        manifest = BatchManifest.load(out_root)
+        if manifest.plan_record is None:
+            messagebox.showerror("Error", f"No batch manifest ({MANIFEST_NAME}) found in:\n{out_root}")
+            return
 
-            messagebox.showinfo("Done", f"Batch completed.\nSuccessful: {success}/{len(self.planned_runs)}")
-            
-            if os.name == 'nt': os.startfile(out_root)
-            else: 
-                try: subprocess.Popen(['xdg-open', out_root])
-                except: pass
+        current_project = json.loads(json.dumps(serialize_modules(self.active_modules)))  # same types as the journal
+        if manifest.plan_record.get("project") != current_project:
+            if not messagebox.askyesno("Project Changed", "The current project differs from the one the batch was started with.\nResume with the current project anyway?"):
+                return
 
-        except Exception as e:
-            messagebox.showerror("Fatal Error", str(e))
-        finally:
-            self._restore_state(backup)
-            self.lbl_status.config(text="Idle", fg="black")
-
-    # --- State Management Helpers ---
-
-    def _create_state_backup(self):
-        backup = []
-        for mod in self.active_modules:
-            m_state = {}
-            for c in mod.cards:
-                c_state = {}
-                for inp in c.inputs: c_state[inp.name] = inp.value
-                m_state[c.name] = c_state
-            backup.append(m_state)
-        return backup
-
-    def _restore_state(self, backup):
-        for i, mod in enumerate(self.active_modules):
-            if i < len(backup):
-                saved = backup[i]
-                for c in mod.cards:
-                    if c.name in saved:
-                        for inp in c.inputs:
-                            if inp.name in saved[c.name]:
-                                inp.value = saved[c.name][inp.name]
-                if hasattr(mod, 'regenerate'): mod.regenerate()
-        self.parent.update_preview()
-        self.parent.reorder_modules_layout()
-
-    def _apply_run_config(self, config):
-        for cfg in config:
-            m_idx, c_name, i_name = cfg["key"]
-            val = cfg["val"]
-            if not cfg["is_file"]:
-                if m_idx < len(self.active_modules):
-                    mod = self.active_modules[m_idx]
-                    for c in mod.cards:
-                        if c.name == c_name:
-                            for inp in c.inputs:
-                                if inp.name == i_name:
-                                    inp.value = val
-                    if hasattr(mod, 'regenerate'): mod.regenerate()
-
-    def _generate_full_input(self):
-        full_text = ""
-        for mod in self.active_modules:
-            full_text += mod.write() + "\n"
-        full_text += "stop\n"
-        return full_text
-
-    def _execute_single_run(self, root, folder, content, exe, config, modules_snapshot):
-        job_dir = os.path.join(root, folder)
-        os.makedirs(job_dir, exist_ok=True)
-
-        # 1. Copy Environment Tapes
-        for unit, path in self.parent.user_tapes.items():
-            if os.path.exists(path):
-                try: shutil.copy(path, os.path.join(job_dir, f"tape{unit}"))
-                except: pass
-
-        # 2. Copy Variable File Inputs
-        for cfg in config:
-            if cfg["is_file"] and os.path.exists(cfg["val"]):
-                dest = os.path.join(job_dir, f"tape{cfg['base_unit']}")
-                try: shutil.copy(cfg["val"], dest)
-                except Exception as e: print(f"Copy error: {e}")
-
-        # 3. Write Input File
-        with open(os.path.join(job_dir, "input.inp"), "w") as f: f.write(content)
-
-        # 4. NEW: Save Project State JSON
-        self._save_run_state_json(job_dir, modules_snapshot)
-
-        # 5. Run NJOY
-        try:
-            with open(os.path.join(job_dir, "output.out"), "w") as fout:
-                subprocess.run([exe], input=content.encode('utf-8'), stdout=fout, stderr=subprocess.STDOUT, cwd=job_dir, check=True)
-            return True
-        except Exception as e:
-            print(f"Execution failed: {e}")
-            return False
+        try: plan = manifest.plan()
+        except (KeyError, IndexError, ValueError) as e:
+            messagebox.showerror("Error", f"Unreadable batch plan: {e}")
+            return
+
+        self.defined_vars = plan.variables
+        self.lb_vars.delete(0, tk.END)
+        for var in self.defined_vars:
+            tag = "[FILE]" if var["is_file_input"] else "[VAL]"
+            self.lb_vars.insert(tk.END, f"{tag} {var['display']} ({len(var['values'])})")
+        self.planned_runs = plan
+        self.table.statuses = {}
+        self.table.set_source(len(plan), self._table_row)
+
+        self._launch_jobs_logic(resume_manifest=manifest)
 
-    def _save_run_state_json(self, job_dir, modules):
+    def _pump_jobs(self):
         """
-        Saves the current configuration of all modules to a project.json file 
-        within the run directory.
+        Main-thread loop of a running batch (re-scheduled with after()).
+        Decks are rendered here from a snapshot of the project (the live
+        modules are not modified), NJOY itself runs in the worker pool.
         """
-        data = []
-        # We need the class map to identify the module type string
-        from gui_app import AVAILABLE_MODULES 
-        
-        for mod in modules:
-            mod_type_key = None
-            for key, cls in AVAILABLE_MODULES.items():
-                if isinstance(mod, cls):
-                    mod_type_key = key
-                    break
-            
-            if not mod_type_key: continue
-
-            cards_data = {}
-            for card in mod.cards:
-                inputs_data = {}
-                for inp in card.inputs:
-                    inputs_data[inp.name] = inp.value
-                cards_data[card.name] = inputs_data
-            
-            data.append({"type": mod_type_key, "cards": cards_data})
+        session = self._batch["session"]
+        if not self.win.winfo_exists():
+            self.runner.cancel()
+            self._finish_batch(aborted=True)
+            return
 
-        json_path = os.path.join(job_dir, "project_state.json")
         try:
-            with open(json_path, "w") as f:
-                json.dump(data, f, indent=4)
+            # 1. Collect completion reports from the workers
+            while True:
+                try: event = self.runner.events.get_nowait()
+                except queue.Empty: break
+                self._handle_job_event(event)
+
+            # 2. Keep the pool busy (bounded, jobs are prepared lazily)
+            for run_id in session.fill(): self.table.set_status(run_id, "done")
+            self.table.refresh()
         except Exception as e:
-            print(f"Failed to save state JSON: {e}")
\ No newline at end of file
+            self.runner.cancel()
+            self._finish_batch(aborted=True)
+            messagebox.showerror("Fatal Error", str(e))
+            return
+
+        text = f"Running: {session.finished}/{session.total} finished, {self.runner.in_flight} active"
+        if session.skipped: text += f", {session.skipped} already done"
+        if SHARED_JOB_ID in self.job_progress: text += f" (shared stage: {self.job_progress[SHARED_JOB_ID][0]})"
+        if SHARED_JOB_ID in self.job_errors: text += f" (shared stage failed: {self.job_errors[SHARED_JOB_ID]})"
+        self.lbl_status.config(text=text, fg="blue")
+
+        if session.done:
+            self._finish_batch()
+        else:
+            self.win.after(100, self._pump_jobs)
+
+    def _handle_job_event(self, event):
+        kind, job_id = event[0], event[1]
+        self._batch["session"].handle(event)
+        if job_id == SHARED_JOB_ID:
+            # Shared upstream stage: not a row of the table
+            if kind == "progress": self.job_progress[job_id] = (event[2], time.time())
+            elif kind == "finished":
+                self.job_progress.pop(job_id, None)
+                if not event[2]: self.job_errors[job_id] = event[3]
+            return
+        if kind == "started":
+            self.table.set_status(job_id, "running")
+        elif kind == "progress":
+            self.job_progress[job_id] = (event[2], time.time())
+        elif kind == "finished":
+            self.job_progress.pop(job_id, None)
+            success, msg = event[2], event[3]
+            if not success: self.job_errors[job_id] = msg
+            if not success: status = "failed"
+            elif msg == "Cached": status = "cached"
+            else: status = "done"
+            self.table.set_status(job_id, status)
+
+    def _finish_batch(self, aborted=False):
+        batch = self._batch
+        cache = self.runner.cache
+        self.runner.shutdown()
+        self.runner = None
+        if not self.win.winfo_exists(): return
+
+        self.btn_execute.config(state="normal")
+        self.btn_resume.config(state="normal")
+        self.lbl_status.config(text="Idle", fg="black")
+        if aborted: return
+
+        session = batch["session"]
+        msg = f"Batch completed.\nSuccessful: {session.success}/{session.total}"
+        if session.skipped: msg += f" ({session.skipped} already done before resuming)"
+        if SHARED_JOB_ID in self.job_errors: msg += f"\nShared stage failed: {self.job_errors[SHARED_JOB_ID]}"
+        if cache is not None and cache.store_failures:
+            msg += f"\n{cache.store_failures} results could not be stored in the result cache: {cache.last_store_error}"
+        if session.success < session.total: msg += "\nThe failure messages are shown in the Status column."
+        messagebox.showinfo("Done", msg)
+        out_root = batch["out_root"]
+        if os.name == 'nt': os.startfile(out_root)
+        else: 
+            try: subprocess.Popen(['xdg-open', out_root])
+            except: pass
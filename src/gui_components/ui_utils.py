@@ -30,7 +30,12 @@ class UIUtils:
         ttk.Button(top, text="Close", command=top.destroy).pack(pady=5)
 
     @staticmethod
-    def open_selection_list(root, inp_obj, tk_var, options_dict):
+    def open_selection_list(root, inp_obj, tk_var, options_dict, search=None):
+        """
+        Filterable list of options ("key : description" rows).
+        search(text) -> rows, when given, replaces the default substring filter
+        over options_dict (used for the material list built from the tapes).
+        """
         top = tk.Toplevel(root)
         top.title(f"Select {inp_obj.name}")
         top.geometry("400x500") 
@@ -49,8 +54,9 @@ class UIUtils:
         
         def pop(filt=""):
             lb.delete(0, tk.END)
-            for i in all_items: 
-                if filt.lower() in i.lower(): lb.insert(tk.END, i)
+            if search is not None: items = search(filt)
+            else: items = [i for i in all_items if filt.lower() in i.lower()]
+            if items: lb.insert(tk.END, *items)
         pop()
         
         search_var.trace_add("write", lambda *a: pop(search_var.get()))
@@ -0,0 +1,95 @@
+import time
+
+# ==============================================================================
+# COALESCED UI UPDATES
+# ==============================================================================
+DEFAULT_DELAY_MS = 60   # idle window closing a burst of edits
+MAX_WAIT_MS = 300       # flush at the latest this long after the first edit of a burst
+SLOW_FLUSH_MS = 100     # flushes slower than this are counted in stats()
+
+
+class UpdateScheduler:
+    """
+    Coalesces bursts of edits (typing, pasting a long list into an entry)
+    into one run of the expensive updates.
+
+    schedule(key, callback) registers work; the same key scheduled again
+    within a burst runs only once. The burst is flushed when no edit came
+    for `delay_ms` (or `max_wait_ms` after its first edit), from after_idle
+    so pending redraws are handled first. Callbacks run in the order their
+    key was first scheduled.
+
+    Latency (first edit -> end of flush), flush durations and the number of
+    slow flushes are kept in `stats()`. A failing callback goes to Tk's
+    report_callback_exception, like any other callback, without stopping
+    the others.
+    """
+
+    def __init__(self, root, delay_ms=DEFAULT_DELAY_MS, max_wait_ms=MAX_WAIT_MS):
+        self.root = root
+        self.delay_ms = delay_ms
+        self.max_wait_ms = max_wait_ms
+        self._pending = {}
+        self._timer = None
+        self._idle = None
+        self._burst_start = None
+        self._edits = 0
+
+        self.flushes = 0
+        self.coalesced = 0      # edits absorbed by the flushes so far
+        self.last_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self.total_flush_ms = 0.0
+        self.slow_flushes = 0
+
+    def schedule(self, key, callback):
+        self._pending.setdefault(key, callback)
+        self._edits += 1
+        if self._idle is not None: return  # flush already queued
+        now = time.perf_counter()
+        if self._burst_start is None: self._burst_start = now
+        if self._timer is not None: self.root.after_cancel(self._timer)
+
+        waited = (now - self._burst_start) * 1000.0
+        delay = max(0, min(self.delay_ms, int(self.max_wait_ms - waited)))
+        self._timer = self.root.after(delay, self._queue_flush)
+
+    def _queue_flush(self):
+        self._timer = None
+        self._idle = self.root.after_idle(self.flush)
+
+    def flush(self):
+        """Runs the pending callbacks now (also usable to force a synchronous update)."""
+        for job in (self._timer, self._idle):
+            if job is not None:
+                try: self.root.after_cancel(job)
+                except Exception: pass
+        self._timer = self._idle = None
+        if not self._pending: return
+
+        pending, self._pending = self._pending, {}
+        start = time.perf_counter()
+        for callback in pending.values():
+            try: callback()
+            except Exception as e: self.root.report_callback_exception(type(e), e, e.__traceback__)
+        end = time.perf_counter()
+
+        flush_ms = (end - start) * 1000.0
+        self.last_latency_ms = (end - (self._burst_start or start)) * 1000.0
+        self.max_latency_ms = max(self.max_latency_ms, self.last_latency_ms)
+        self.total_flush_ms += flush_ms
+        self.flushes += 1
+        self.coalesced += self._edits
+        if flush_ms > SLOW_FLUSH_MS: self.slow_flushes += 1
+        self._burst_start = None
+        self._edits = 0
+
+    def stats(self):
+        return {
+            "flushes": self.flushes,
+            "edits": self.coalesced,
+            "last_latency_ms": round(self.last_latency_ms, 1),
+            "max_latency_ms": round(self.max_latency_ms, 1),
+            "mean_flush_ms": round(self.total_flush_ms / self.flushes, 1) if self.flushes else 0.0,
+            "slow_flushes": self.slow_flushes,
+        }
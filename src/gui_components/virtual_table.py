@@ -0,0 +1,211 @@
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+# ==============================================================================
+# VIRTUAL JOB TABLE
+# ==============================================================================
+STATUS_COLORS = {
+    "queued": "black",
+    "running": "blue",
+    "done": "green",
+    "cached": "#00796b",
+    "failed": "red",
+}
+
+ROW_HEIGHT = 18
+SELECT_BG = "#cce4f7"
+
+
+class VirtualTable(ttk.Frame):
+    """
+    Table that only draws the rows currently on screen.
+
+    Rows are fetched on demand through `row_provider(index) -> (key, values)`,
+    so the widget cost is the same for 10 or 10 million rows: a fixed pool of
+    canvas items is recycled while scrolling. Selection is kept as ranges of
+    row indices and statuses as a sparse dict {key: status}.
+    """
+
+    def __init__(self, parent, columns, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.columns = columns  # list of (title, width_px, anchor)
+        self.row_provider = None
+        self.row_count = 0
+        self.top = 0
+        self.statuses = {}
+        self.selection = []  # sorted disjoint [start, stop) ranges
+        self.anchor = None
+
+        self.font = tkfont.Font(family="Segoe UI", size=9)
+        self.char_px = max(1, self.font.measure("0"))
+
+        self.header = tk.Canvas(self, height=ROW_HEIGHT + 2, bg="#e8e8e8", highlightthickness=0)
+        self.header.grid(row=0, column=0, sticky="ew")
+        self.canvas = tk.Canvas(self, bg="white", highlightthickness=0, takefocus=1)
+        self.canvas.grid(row=1, column=0, sticky="nsew")
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.vsb.grid(row=1, column=1, sticky="ns")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+
+        x = 0
+        for title, width, _ in self.columns:
+            self.header.create_text(x + 4, ROW_HEIGHT // 2 + 1, text=title, anchor="w", font=(self.font.actual("family"), 9, "bold"))
+            x += width
+
+        self._slots = []  # (background rect, [text items])
+        self.canvas.bind("<Configure>", lambda e: self.refresh())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Shift-Button-1>", lambda e: self._on_click(e, extend=True))
+        self.canvas.bind("<Control-Button-1>", lambda e: self._on_click(e, toggle=True))
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll(-1 * (e.delta // 120 or (1 if e.delta > 0 else -1)) * 3))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll(3))
+        self.canvas.bind("<Up>", lambda e: self._move_cursor(-1))
+        self.canvas.bind("<Down>", lambda e: self._move_cursor(1))
+        self.canvas.bind("<Prior>", lambda e: self.scroll(-self._visible_rows()))
+        self.canvas.bind("<Next>", lambda e: self.scroll(self._visible_rows()))
+        self.canvas.bind("<Control-a>", lambda e: self.select_all())
+
+    # --- Data Source ---
+
+    def set_source(self, row_count, row_provider):
+        self.row_count = row_count
+        self.row_provider = row_provider
+        self.top = min(self.top, max(0, row_count - 1))
+        self.selection = []
+        self.anchor = None
+        self.refresh()
+
+    def set_status(self, key, status):
+        """Stores a row status; call refresh() once a batch of updates is done."""
+        if status == "queued": self.statuses.pop(key, None)
+        else: self.statuses[key] = status
+
+    def clear_statuses(self):
+        self.statuses = {}
+        self.refresh()
+
+    # --- Scrolling ---
+
+    def _visible_rows(self):
+        return max(1, self.canvas.winfo_height() // ROW_HEIGHT + 1)
+
+    def scroll(self, delta):
+        self.scroll_to(self.top + delta)
+
+    def scroll_to(self, index):
+        max_top = max(0, self.row_count - self._visible_rows() + 1)
+        self.top = max(0, min(int(index), max_top))
+        self.refresh()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * self.row_count)
+        elif args[0] == "scroll":
+            step = self._visible_rows() if args[2] == "pages" else 1
+            self.scroll(int(args[1]) * step)
+
+    # --- Drawing ---
+
+    def _ensure_slots(self, n):
+        while len(self._slots) < n:
+            y = len(self._slots) * ROW_HEIGHT
+            rect = self.canvas.create_rectangle(0, y, 0, y + ROW_HEIGHT, outline="", fill="")
+            texts = []
+            x = 0
+            for _, width, anchor in self.columns:
+                tx = x + width // 2 if anchor == "center" else x + 4
+                texts.append(self.canvas.create_text(tx, y + ROW_HEIGHT // 2, text="", anchor=anchor if anchor == "center" else "w", font=self.font))
+                x += width
+            self._slots.append((rect, texts))
+
+    def _clip(self, text, width):
+        text = str(text)
+        max_chars = max(1, (width - 8) // self.char_px)
+        return text if len(text) <= max_chars else text[:max_chars - 1] + "…"
+
+    def refresh(self):
+        n_visible = self._visible_rows()
+        self._ensure_slots(n_visible)
+        canvas_w = self.canvas.winfo_width()
+
+        for slot, (rect, texts) in enumerate(self._slots):
+            index = self.top + slot
+            if slot >= n_visible or index >= self.row_count or self.row_provider is None:
+                self.canvas.itemconfigure(rect, fill="")
+                for t in texts: self.canvas.itemconfigure(t, text="")
+                continue
+
+            key, values = self.row_provider(index)
+            color = STATUS_COLORS.get(self.statuses.get(key, "queued"), "black")
+            y = slot * ROW_HEIGHT
+            self.canvas.coords(rect, 0, y, canvas_w, y + ROW_HEIGHT)
+            self.canvas.itemconfigure(rect, fill=SELECT_BG if self.is_selected(index) else "")
+            for t, value, (_, width, _) in zip(texts, values, self.columns):
+                self.canvas.itemconfigure(t, text=self._clip(value, width), fill=color)
+
+        if self.row_count:
+            self.vsb.set(self.top / self.row_count, min(1.0, (self.top + n_visible - 1) / self.row_count))
+        else:
+            self.vsb.set(0.0, 1.0)
+
+    # --- Selection (ranges of row indices) ---
+
+    def is_selected(self, index):
+        for start, stop in self.selection:
+            if start <= index < stop: return True
+            if start > index: break
+        return False
+
+    def _set_selection(self, ranges):
+        merged = []
+        for start, stop in sorted(ranges):
+            if start >= stop: continue
+            if merged and start <= merged[-1][1]: merged[-1][1] = max(merged[-1][1], stop)
+            else: merged.append([start, stop])
+        self.selection = [tuple(r) for r in merged]
+
+    def _toggle(self, index):
+        if not self.is_selected(index):
+            self._set_selection(self.selection + [(index, index + 1)])
+            return
+        ranges = []
+        for start, stop in self.selection:
+            if start <= index < stop: ranges += [(start, index), (index + 1, stop)]
+            else: ranges.append((start, stop))
+        self._set_selection(ranges)
+
+    def select_range(self, start, stop):
+        self._set_selection([(max(0, start), min(stop, self.row_count))])
+        self.refresh()
+
+    def select_all(self):
+        self.select_range(0, self.row_count)
+        return "break"
+
+    def selected_ranges(self): return list(self.selection)
+
+    def _on_click(self, event, extend=False, toggle=False):
+        self.canvas.focus_set()
+        index = self.top + event.y // ROW_HEIGHT
+        if index >= self.row_count: return
+        if extend and self.anchor is not None:
+            self._set_selection([(min(self.anchor, index), max(self.anchor, index) + 1)])
+        elif toggle:
+            self._toggle(index)
+            self.anchor = index
+        else:
+            self._set_selection([(index, index + 1)])
+            self.anchor = index
+        self.refresh()
+
+    def _move_cursor(self, delta):
+        if not self.row_count: return
+        index = max(0, min(self.row_count - 1, (self.anchor if self.anchor is not None else -1) + delta))
+        self.anchor = index
+        self._set_selection([(index, index + 1)])
+        if index < self.top: self.top = index
+        elif index >= self.top + self._visible_rows() - 1: self.top = index - self._visible_rows() + 2
+        self.scroll_to(self.top)
@@ -0,0 +1,21 @@
+# Import Modules
+from modules.acer import Acer
+from modules.moder import Moder
+from modules.reconr import Reconr
+from modules.broadr import Broadr
+from modules.thermr import Thermr       
+from modules.groupr import Groupr
+from modules.viewr import Viewr
+from modules.errorr import Errorr
+from modules.plotr import Plotr
+from modules.unresr import Unresr
+from modules.heatr import Heatr
+from modules.purr import Purr
+from modules.gaspr import Gaspr
+
+# Kept free of any tkinter import so the headless runner can use it
+AVAILABLE_MODULES = {
+    "MODER": Moder, "RECONR": Reconr, "BROADR": Broadr, "THERMR": Thermr,
+    "ACER": Acer, "GROUPR": Groupr, "VIEWR": Viewr, "ERRORR": Errorr,   
+    "PLOTR": Plotr, "UNRESR": Unresr, "HEATR": Heatr, "PURR": Purr, "GASPR": Gaspr
+}
@@ -0,0 +1,45 @@
+import os
+import stat
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ("src", "file_comparison_app"):
+    path = os.path.join(ROOT, folder)
+    if path not in sys.path: sys.path.insert(0, path)
+
+from module_registry import AVAILABLE_MODULES
+
+# Stand-in for the NJOY executable: for every module of the deck, the units of
+# its first card are its input tapes followed by its output tape. It fails
+# when an input tape is missing and writes "<module> in <folder>" to the output.
+FAKE_NJOY = """#!{python}
+import os, sys
+lines = sys.stdin.read().splitlines()
+names = {names}
+for i, line in enumerate(lines):
+    if line.strip() not in names: continue
+    units = [abs(int(u)) for u in lines[i + 1].replace("/", " ").split()]
+    print(" " + line.strip(), flush=True)
+    for u in units[:-1]:
+        if not os.path.exists(f"tape{{u}}"): sys.exit(f"missing tape{{u}}")
+    with open(f"tape{{units[-1]}}", "w") as f: f.write(f"{{line.strip()}} in {{os.path.basename(os.getcwd())}}")
+"""
+
+
+@pytest.fixture
+def fake_njoy(tmp_path):
+    path = tmp_path / "fake_njoy"
+    names = sorted(key.lower() for key in AVAILABLE_MODULES)
+    path.write_text(FAKE_NJOY.format(python=sys.executable, names=names))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def make_module(kind, *units, **values):
+    """Module of the registry with the first units of its card 1 set (in, ..., out)."""
+    mod = AVAILABLE_MODULES[kind]()
+    files = [inp for inp in mod.c1.inputs if inp.is_input_file or inp.is_output_file]
+    for inp, unit in zip(files, units): inp.value = unit
+    for name, value in values.items(): getattr(mod.c1, name).value = value
+    return mod
@@ -0,0 +1,50 @@
+import json
+
+from batch_compare import main, SUMMARY_NAME
+
+
+def tape(xs):
+    """Small MF3 MT1 tape with the given cross section at 1e-5 eV."""
+    lines = ["tape id".ljust(66) + "   1 0  0    0",
+             f"{'1.000000-5':>11}{xs:>11}".ljust(66) + "9228 3  1    1",
+             "".ljust(66) + "9228 3  099999"]
+    return "\n".join(lines) + "\n"
+
+
+def sweep(tmp_path, runs):
+    """Baseline run and one sweep sub-folder per {run: {tape name: xs}} entry."""
+    (tmp_path / "baseline").mkdir()
+    (tmp_path / "baseline" / "tape21").write_text(tape("2.000000+1"))
+    for run, tapes in runs.items():
+        (tmp_path / "sweep" / run).mkdir(parents=True)
+        for name, xs in tapes.items(): (tmp_path / "sweep" / run / name).write_text(tape(xs))
+    return [str(tmp_path / "baseline"), str(tmp_path / "sweep"), "--workers", "2"]
+
+
+def test_runs_within_tolerance(tmp_path):
+    args = sweep(tmp_path, {"run_1": {"tape21": "2.000000+1"}, "run_2": {"tape21": "2.0000001+1"}})
+    assert main(args) == 0
+    summary = json.loads((tmp_path / "sweep" / SUMMARY_NAME).read_text())
+    assert summary["failed"] == [] and summary["tapes"] == ["tape21"]
+    assert summary["runs"]["run_1"]["tapes"]["tape21"]["sections"] == []
+    section = summary["runs"]["run_2"]["tapes"]["tape21"]["sections"][0]
+    assert (section["mat"], section["mf"], section["mt"], section["status"]) == (9228, 3, 1, "within tolerance")
+
+
+def test_differing_and_incomplete_runs(tmp_path):
+    args = sweep(tmp_path, {"run_1": {"tape21": "2.000000+1"}, "run_2": {"tape21": "2.500000+1"},
+                            "run_3": {"tape22": "2.000000+1"}})
+    assert main(args + ["--summary", str(tmp_path / "summary.json")]) == 1
+    summary = json.loads((tmp_path / "summary.json").read_text())
+    assert summary["failed"] == ["run_2", "run_3"]
+    section = summary["runs"]["run_2"]["tapes"]["tape21"]["sections"][0]
+    assert section["status"] == "differs" and abs(section["max_rel"] - 0.2) < 1e-9
+    assert summary["runs"]["run_3"]["missing"] == ["tape21"]
+
+
+def test_usage_errors(tmp_path):
+    args = sweep(tmp_path, {"run_1": {"tape21": "2.000000+1"}})
+    assert main([str(tmp_path / "no_baseline"), args[1]]) == 2
+    assert main([args[0], str(tmp_path / "no_sweep")]) == 2
+    assert main(args + ["--pattern", "*.pendf"]) == 2
+    assert not (tmp_path / "sweep" / SUMMARY_NAME).exists()
@@ -0,0 +1,91 @@
+import os
+
+from conftest import make_module
+from engine.batch import run_batch
+from engine.batch_manifest import BatchManifest
+from engine.parallel_runner import ParallelJobRunner
+from engine.sweep_plan import SweepPlan
+
+
+def make_plan():
+    return SweepPlan([{"key": (1, "c2", "temp"), "display": "BROADR > c2 > temp", "values": ["300", "600", "900"],
+                       "is_file_input": False, "base_unit": None}])
+
+
+def run_job(manifest, run, success=True, outputs=None):
+    job_dir = os.path.join(manifest.out_root, run["folder"])
+    os.makedirs(job_dir, exist_ok=True)
+    for name, text in (outputs or {}).items():
+        with open(os.path.join(job_dir, name), "w") as f: f.write(text)
+    manifest.record_submitted({"id": run["id"], "job_dir": job_dir})
+    manifest.record_event(("started", run["id"]))
+    info = {"outputs": {name: {"size": len(text)} for name, text in (outputs or {}).items()}}
+    manifest.record_event(("finished", run["id"], success, "OK" if success else "exit 1", info))
+
+
+def test_resume_state_after_an_interruption(tmp_path):
+    manifest = BatchManifest(str(tmp_path))
+    plan = make_plan()
+    manifest.begin(plan, [{"type": "broadr"}], "njoy")
+    runs = list(plan)
+    run_job(manifest, runs[0], outputs={"tape22": "pendf"})
+    run_job(manifest, runs[1], success=False)
+    manifest.record_submitted({"id": 3, "job_dir": str(tmp_path / runs[2]["folder"])})
+    with open(manifest.path, "a") as f: f.write('{"type": "finished", "id": 3, "succ')  # torn by the crash
+
+    loaded = BatchManifest.load(str(tmp_path))
+    assert [run["id"] for run in loaded.plan()] == [1, 2, 3]
+    assert loaded.is_complete(1)
+    assert not loaded.is_complete(2) and loaded.was_started(2)
+    assert not loaded.is_complete(3) and loaded.was_started(3)
+    assert not loaded.was_started(4)
+
+
+def test_changed_or_missing_outputs_are_run_again(tmp_path):
+    manifest = BatchManifest(str(tmp_path))
+    plan = make_plan()
+    manifest.begin(plan, [], "njoy")
+    runs = list(plan)
+    run_job(manifest, runs[0], outputs={"tape22": "pendf"})
+    run_job(manifest, runs[1], outputs={"tape22": "pendf"})
+    with open(tmp_path / runs[0]["folder"] / "tape22", "w") as f: f.write("truncated")
+    os.remove(tmp_path / runs[1]["folder"] / "tape22")
+
+    loaded = BatchManifest.load(str(tmp_path))
+    assert not loaded.is_complete(1) and not loaded.is_complete(2)
+
+
+def test_a_new_plan_starts_a_new_batch(tmp_path):
+    manifest = BatchManifest(str(tmp_path))
+    manifest.begin(make_plan(), [], "njoy")
+    run_job(manifest, list(make_plan())[0])
+    manifest.begin(make_plan(), [], "njoy")
+    manifest.resume()
+
+    loaded = BatchManifest.load(str(tmp_path))
+    assert loaded.jobs == {} and not loaded.is_complete(1)
+    assert BatchManifest.load(str(tmp_path / "missing")).plan() is None
+
+
+def test_resumed_batch_only_runs_the_unfinished_jobs(tmp_path, fake_njoy):
+    (tmp_path / "tape20").write_text("endf")
+    modules = [make_module("MODER", 20, -21), make_module("RECONR", -21, -22), make_module("BROADR", -21, -22, -23)]
+    plan = SweepPlan([{"key": (2, "c4_1", "temp_1"), "display": "BROADR > c4_1 > temp_1", "values": ["300", "600", "900"],
+                       "is_file_input": False, "base_unit": None}])
+    out_root, user_tapes = str(tmp_path / "runs"), {20: str(tmp_path / "tape20")}
+
+    manifest = BatchManifest(out_root)
+    runner = ParallelJobRunner(fake_njoy, 2)
+    assert run_batch(modules, plan, user_tapes, out_root, runner, "copy", manifest=manifest) == (3, 3, 0)
+    os.remove(os.path.join(out_root, list(plan)[1]["folder"], "tape23"))  # lost output
+
+    manifest = BatchManifest.load(out_root)
+    runner = ParallelJobRunner(fake_njoy, 2)
+    started = []
+
+    def on_event(event, finished, total):
+        if event[0] == "started": started.append(event[1])
+
+    assert run_batch(modules, manifest.plan(), user_tapes, out_root, runner, "copy", on_event=on_event,
+                     manifest=manifest, resume=True) == (3, 3, 2)
+    assert started == [2]
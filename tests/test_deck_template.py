@@ -0,0 +1,58 @@
+import pickle
+import pytest
+from conftest import make_module
+from engine.deck_renderer import DeckRenderer
+from engine.deck_template import compile_template
+from engine.project_state import serialize_modules
+
+
+def project():
+    """MODER (no regenerate()), RECONR and BROADR (regenerate())."""
+    return serialize_modules([make_module("MODER", 20, -21), make_module("RECONR", -21, -22),
+                              make_module("BROADR", -21, -22, -23)])
+
+
+def variable(key, values):
+    return {"key": key, "values": values, "is_file_input": False, "base_unit": None}
+
+
+def test_template_matches_write_for_every_value():
+    renderer = DeckRenderer(project())
+    temps = [str(t) for t in (293.6, 300, 1e3, "2.5e+3", 12345.678)] + [600.0, 900, 1.5e-05]
+    variables = [variable((2, "c4_1", "temp_1"), temps), variable((0, "c1", "nout"), ["-21", -21])]
+    template, reason = compile_template(renderer, variables)
+    assert template is not None, reason
+    assert pickle.loads(pickle.dumps(template)).fill() == renderer.render()
+    for temp in temps:
+        for nout in ("-21", -21):
+            overrides = {(2, "c4_1", "temp_1"): temp, (0, "c1", "nout"): nout}
+            assert template.fill(overrides) == renderer.render(overrides)
+            assert template.state(overrides) == renderer.state(overrides)
+
+
+def test_slots_only_accept_checked_types():
+    renderer = DeckRenderer(project())
+    template, reason = compile_template(renderer, [variable((2, "c4_1", "temp_1"), ["300", "600"])])
+    assert template is not None, reason
+    with pytest.raises(TypeError): template.fill({(2, "c4_1", "temp_1"): 300j})
+    with pytest.raises(KeyError): template.fill({(2, "c4_1", "temp_2"): "300"})
+
+
+def test_verification_cost_does_not_grow_with_the_values():
+    renderer = DeckRenderer(project())
+    calls = []
+    render = renderer.render
+    renderer.render = lambda *args: calls.append(args) or render(*args)
+    values = [str(300 + k) for k in range(5000)]
+    template, reason = compile_template(renderer, [variable((2, "c4_1", "temp_1"), values)])
+    assert template is not None, reason
+    assert len(calls) <= 5
+    assert template.fill({(2, "c4_1", "temp_1"): values[1234]}) == render({(2, "c4_1", "temp_1"): values[1234]})
+
+
+def test_structure_and_visibility_controls_fall_back():
+    renderer = DeckRenderer(project())
+    template, reason = compile_template(renderer, [variable((2, "c_gui", "nmat"), ["1", "2"])])
+    assert template is None and "controls the cards" in reason
+    template, reason = compile_template(renderer, [variable((1, "c3_1", "ncards_1"), ["0", "2"])])
+    assert template is None and "controls the visibility" in reason
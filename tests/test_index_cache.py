@@ -0,0 +1,59 @@
+import os
+import shutil
+
+from endf_tools.index_cache import IndexCache, index_directory
+from endf_tools.tape_index import index_tape
+
+TAPE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output_exemple", "tape20")
+
+
+def sections(index): return [tuple(s) for s in index.sections]
+
+
+def test_hit_miss_and_invalidation(tmp_path):
+    cache = IndexCache(str(tmp_path / "cache"))
+    tape = tmp_path / "tape20"
+    shutil.copy(TAPE, tape)
+    assert cache.get(str(tape)) is None
+
+    built = cache.load_or_index(str(tape))
+    cached = cache.get(str(tape))
+    assert cached is not None and sections(cached) == sections(built) == sections(index_tape(TAPE))
+    assert cached.mats() == [6328] and cached.materials[0].za == 63152.0
+
+    st = os.stat(tape)
+    os.utime(tape, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert cache.get(str(tape)) is None
+    cache.load_or_index(str(tape))
+    assert cache.get(str(tape)) is not None
+
+    with open(tape, "a") as f: f.write(" " * 80 + "\n")
+    os.utime(tape, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))  # same mtime, other size
+    assert cache.get(str(tape)) is None
+
+
+def test_failed_store_is_counted(tmp_path):
+    cache = IndexCache(str(tmp_path / "cache"))
+    cache.root = str(tmp_path / "missing")
+    assert cache.put(index_tape(TAPE)) is False
+    assert cache.store_failures == 1 and cache.last_store_error
+
+
+def test_folder_is_indexed_in_a_process_pool(tmp_path):
+    library = tmp_path / "library"
+    (library / "sub").mkdir(parents=True)
+    shutil.copy(TAPE, library / "a.endf")
+    shutil.copy(TAPE, library / "sub" / "b.endf")
+    (library / "notes.txt").write_text("not a tape\n")
+    cache = IndexCache(str(tmp_path / "cache"))
+
+    found, counts = index_directory(str(library), cache, max_workers=2)
+    assert sorted(os.path.relpath(p, library) for p in found) == ["a.endf", os.path.join("sub", "b.endf")]
+    assert sections(found[str(library / "a.endf")]) == sections(index_tape(TAPE))
+    assert counts["cached"] == 0 and counts["indexed"] == 3 and counts["store_failures"] == 0
+
+    again, counts = index_directory(str(library), cache, max_workers=2)
+    assert sorted(again) == sorted(found) and counts["cached"] == 3 and counts["indexed"] == 0
+
+    found, counts = index_directory(str(library), cache, recursive=False)
+    assert list(found) == [str(library / "a.endf")]
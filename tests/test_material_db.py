@@ -0,0 +1,34 @@
+import os
+
+from endf_tools.material_db import MaterialDB, is_material_input, nuclide_name
+from endf_tools.tape_index import index_tape
+
+TAPE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output_exemple", "tape20")
+
+
+def test_choices_from_the_example_tape():
+    index = index_tape(TAPE)
+    db = MaterialDB.from_indexes([(20, index), (21, None)])
+    assert len(db) == 1
+    entry = db.lookup(mat=6328)[0]
+    assert (entry.za, entry.name, entry.unit, entry.tape) == (63152.0, "Eu-152", 20, TAPE)
+    assert db.lookup(za=63152) == db.lookup(name="eu-152") == [entry]
+    assert db.has_reaction(6328, 3, 1) and not db.has_reaction(6328, 3, 9999)
+    assert entry.mfmt == {(s.mf, s.mt) for s in index.sections}
+
+    label = db.label(entry)
+    assert label.startswith("6328 : Eu-152 | ZA 63152 |") and label.endswith("[tape20: tape20]")
+    assert db.search() == db.search("6328") == db.search("eu-1") == [label]
+    assert db.search("63152") == [label] and db.search("U-235") == []
+
+
+def test_nuclide_names():
+    assert nuclide_name(92235) == "U-235" and nuclide_name(6000.0) == "C-nat"
+    assert nuclide_name(None) is None and nuclide_name(200001) is None
+
+
+def test_material_inputs():
+    for name in ("mat_1", "mat_12", "mat1_1", "matb", "matd", "matd_1", "matd_10"):
+        assert is_material_input(name), name
+    for name in ("mat", "mat1", "mat2", "matc", "nmat", "num_mats", "matde_1", "matdp_1", "mat_", "matd_x", "xmatd"):
+        assert not is_material_input(name), name
@@ -0,0 +1,39 @@
+import threading
+from class_def import NjoyInput, NjoyCard, track_reads
+
+
+def test_reads_are_recorded_per_block():
+    a, b = NjoyInput("a", default_value=1), NjoyInput("b", default_value=2)
+    with track_reads() as outer:
+        a.value
+        with track_reads() as inner: b.value
+    assert outer == {a, b} and inner == {b}
+
+
+def test_active_if_reads():
+    card = NjoyCard("c2")
+    ctrl = card.add_input(NjoyInput("iopt", default_value=1))
+    card.active_if = lambda: ctrl.value == 1
+    assert card.is_active()
+    assert card.active_reads == {ctrl}
+
+
+def test_reads_of_other_threads_are_not_recorded():
+    mine, other = NjoyInput("mine", default_value=1), NjoyInput("other", default_value=2)
+    inside, done = threading.Event(), threading.Event()
+
+    def worker():
+        inside.wait(5)
+        other.value  # e.g. a deck written on a worker thread
+        with track_reads() as reads: mine.value
+        assert reads == {mine}
+        done.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    with track_reads() as reads:
+        inside.set()
+        assert done.wait(5)
+        mine.value
+    thread.join()
+    assert reads == {mine}
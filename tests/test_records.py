@@ -0,0 +1,71 @@
+import os
+import random
+
+import pytest
+
+from endf_tools import records
+from endf_tools.tape_index import endf_float, index_tape
+
+np = pytest.importorskip("numpy")
+
+TAPE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output_exemple", "tape20")
+
+
+def endf(value, exp_digits=1):
+    """NJOY-style 11-column field of a value, with at least `exp_digits` exponent digits."""
+    exp_digits = max(exp_digits, len(str(abs(int(f"{value:e}".split("e")[1])))))
+    mantissa, exponent = f"{value:.{7 - exp_digits}e}".split("e")
+    sign = "-" if exponent.startswith("-") else "+"
+    return (mantissa + sign + str(abs(int(exponent))).zfill(exp_digits)).rjust(11)
+
+
+def tape(fields):
+    fields = fields + [" " * 11] * (-len(fields) % 6)
+    return "".join("".join(fields[i:i + 6]) + "9228 3  1    1\n" for i in range(0, len(fields), 6)).encode()
+
+
+def same_bits(values, expected):
+    return np.asarray(values).tobytes() == np.asarray(expected, dtype=np.float64).tobytes()
+
+
+def test_standard_fields_match_the_per_field_parser():
+    rng = random.Random(4)
+    fields = [endf(rng.uniform(-9.99, 9.99) * 10.0 ** rng.randint(-30, 30), rng.choice((1, 2, 3)))
+              for _ in range(30000)]
+    fields += [" 0.000000+0", "-0.000000+0", "+1.000000+0", " 9.999999+9", " 1.00000-14", " 1.00000+15"]
+    data = tape(fields)
+    assert same_bits(records.parse_floats(data), records._python_floats(data))
+
+
+def test_other_layouts_match_the_per_field_parser():
+    fields = ["          1", "        -12", " 1234.56789", " 20000000.0", "        1.5", "1.5        ",
+              " 3.0E+2    ", "   1.23e-05", " .5        ", "5.         ", " 1.2345+123", "-1.2-5     ",
+              "12345678901", "           ", "+.5-3      ", " 1.000000+0"] * 400
+    data = tape(fields)
+    assert same_bits(records.parse_floats(data), records._python_floats(data))
+
+
+def test_blocks_and_count(monkeypatch):
+    monkeypatch.setattr(records, "BLOCK_FIELDS", 7)
+    fields = [endf(1.5 * k) for k in range(1000)]
+    data = tape(fields)
+    assert same_bits(records.parse_floats(data), records._python_floats(data))
+    assert same_bits(records.parse_floats(data, 995), [1.5 * k for k in range(995)])
+
+
+def test_garbage_raises():
+    data = tape([endf(1.0)] * 600 + [" 1.0+2abc  "])
+    with pytest.raises(ValueError):
+        records.parse_floats(data)
+
+
+def test_mf3_arrays():
+    index = index_tape(TAPE)
+    total = records.read_mf3(index, 6328, 1)
+    lines = index.read_section(index.find(6328, 3, 1)[0]).splitlines()
+    npts = int(lines[1][55:66])
+    assert len(total["energy"]) == len(total["xs"]) == npts
+    assert total["energy"][0] == endf_float(lines[3][0:11]) and total["xs"][0] == endf_float(lines[3][11:22])
+    every = records.read_mf3_all(index, 6328)
+    assert sorted(every) == sorted(s.mt for s in index.sections if s.mf == 3)
+    assert list(every[1]["xs"]) == list(total["xs"])
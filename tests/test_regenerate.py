@@ -0,0 +1,43 @@
+from class_def import NjoyCard
+from module_registry import AVAILABLE_MODULES
+from engine.project_state import regenerate_keeping_values, serialize_modules
+
+
+def attribute_cards(mod):
+    return {attr: value for attr, value in vars(mod).items() if isinstance(value, NjoyCard)}
+
+
+def assert_attributes_in_cards(mod):
+    cards = {id(card) for card in mod.cards}
+    for attr, card in attribute_cards(mod).items():
+        if card.name in {c.name for c in mod.cards}: assert id(card) in cards, attr
+
+
+def test_attributes_follow_the_kept_cards():
+    mod = AVAILABLE_MODULES["GROUPR"]()
+    regenerate_keeping_values(mod)
+    assert_attributes_in_cards(mod)
+    assert mod.c9_dummy is next(card for card in mod.cards if card.name == "c9")
+
+
+def test_structure_change_keeps_values_and_unaffected_cards():
+    mod = AVAILABLE_MODULES["BROADR"]()
+    regenerate_keeping_values(mod)
+    mod.c3_1.thnmax_1.value = 5.0
+    c1, c3_1 = mod.c1, mod.c3_1
+    before = serialize_modules([mod])[0]["cards"]
+
+    mod.c_gui.nmat.value = 2
+    regenerate_keeping_values(mod)
+    assert mod.c1 is c1 and c1 in mod.cards
+    assert mod.c3_1 is c3_1 and mod.c3_1.thnmax_1.value == 5.0
+    assert [card.name for card in mod.cards][-3:] == ["c2_2", "c3_2", "c4_2"]
+    assert_attributes_in_cards(mod)
+    after = serialize_modules([mod])[0]["cards"]
+    before["c_gui"]["nmat"] = 2
+    for card, inputs in before.items(): assert after[card] == inputs
+
+    # Unchanged controls: nothing is rebuilt
+    cards = list(mod.cards)
+    regenerate_keeping_values(mod)
+    assert all(a is b for a, b in zip(cards, mod.cards))
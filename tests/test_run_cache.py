@@ -0,0 +1,62 @@
+from engine.parallel_runner import ParallelJobRunner
+from engine.run_cache import RunCache
+
+
+def run_job(runner, job):
+    runner.submit(job)
+    while True:
+        event = runner.events.get(timeout=10)
+        if event[0] == "finished": return event
+
+
+def test_key_covers_deck_exe_and_tapes(tmp_path):
+    cache = RunCache(str(tmp_path / "cache"))
+    tape = tmp_path / "tape20"
+    tape.write_text("a")
+    key = cache.make_key("moder\n", "njoy", {20: str(tape)})
+    assert key == cache.make_key("moder\n", "njoy", {"20": str(tape)})
+    assert key != cache.make_key("reconr\n", "njoy", {20: str(tape)})
+    tape.write_text("b")
+    assert key != cache.make_key("moder\n", "njoy", {20: str(tape)})
+
+
+def test_rewritten_input_tape_is_cached(tmp_path, fake_njoy):
+    tape = tmp_path / "tape21"
+    tape.write_text("input")
+    deck = "moder\n21 -21/\nstop\n"  # reads and rewrites unit 21
+    cache = RunCache(str(tmp_path / "cache"))
+    runner = ParallelJobRunner(fake_njoy, 1, cache=cache)
+    job = {"content": deck, "tapes": {21: str(tape)}, "writable_units": {21}, "staging": "copy"}
+
+    first = run_job(runner, dict(job, id="a", job_dir=str(tmp_path / "a")))
+    assert first[2] and first[3] == "OK"
+    second = run_job(runner, dict(job, id="b", job_dir=str(tmp_path / "b")))
+    runner.shutdown(wait=True)
+    assert second[3] == "Cached"
+    assert (tmp_path / "b" / "tape21").read_text() == "moder in a"
+    assert tape.read_text() == "input"
+
+
+def test_read_only_input_tape_is_not_cached(tmp_path, fake_njoy):
+    tape = tmp_path / "tape20"
+    tape.write_text("input")
+    cache = RunCache(str(tmp_path / "cache"))
+    runner = ParallelJobRunner(fake_njoy, 1, cache=cache)
+    job = {"id": "a", "job_dir": str(tmp_path / "a"), "content": "moder\n20 -21/\nstop\n",
+           "tapes": {20: str(tape)}, "writable_units": {21}, "staging": "copy"}
+    run_job(runner, job)
+    runner.shutdown(wait=True)
+    key = cache.make_key(job["content"], fake_njoy, job["tapes"])
+    assert sorted(p.name for p in (tmp_path / "cache" / key / "files").iterdir()) == ["output.out", "tape21"]
+
+
+def test_failed_store_is_counted(tmp_path, fake_njoy, monkeypatch):
+    cache = RunCache(str(tmp_path / "cache"))
+    (tmp_path / "not_a_folder").write_text("")
+    monkeypatch.setattr(cache, "root", str(tmp_path / "not_a_folder" / "cache"))
+    runner = ParallelJobRunner(fake_njoy, 1, cache=cache)
+    event = run_job(runner, {"id": "a", "job_dir": str(tmp_path / "a"), "content": "moder\n-21/\nstop\n",
+                             "tapes": {}, "writable_units": {21}})
+    runner.shutdown(wait=True)
+    assert event[2] and event[4]["cache_stored"] is False
+    assert cache.stats()["store_failures"] == 1
@@ -0,0 +1,47 @@
+import itertools
+
+from engine.sweep_plan import SweepPlan
+
+
+def variable(name, values, is_file_input=False):
+    return {"key": (0, "c1", name), "display": f"MODER > c1 > {name}", "values": values,
+            "is_file_input": is_file_input, "base_unit": 20 if is_file_input else None}
+
+
+def plan_of(*sizes):
+    return SweepPlan([variable(f"v{k}", [str(i) for i in range(n)]) for k, n in enumerate(sizes)])
+
+
+def test_runs_follow_itertools_product():
+    plan = plan_of(3, 4, 2)
+    assert len(plan) == 24
+    expected = list(itertools.product(*[[str(i) for i in range(n)] for n in (3, 4, 2)]))
+    assert [tuple(c["val"] for c in run["config"]) for run in plan] == expected
+    assert plan[5]["id"] == 6 and plan[-1]["id"] == 24
+    assert plan[5]["folder"] == "Run_6_v0_0_v1_2_v2_1"
+
+
+def test_deleted_rows_keep_the_other_run_ids():
+    plan = plan_of(10, 10)
+    plan.delete_range(10, 20)       # runs 11-20
+    plan.delete_range(0, 1)         # run 1
+    plan.delete_raw([50, 51, 99])   # runs 51, 52, 100
+    ids = [run["id"] for run in plan]
+    assert len(plan) == len(ids) == 86
+    assert ids[:3] == [2, 3, 4] and ids[9] == 21 and 52 not in ids and ids[-1] == 99
+    assert [plan[i]["id"] for i in range(len(plan))] == ids
+    assert plan.is_deleted(15) and not plan.is_deleted(20)
+
+
+def test_dict_round_trip():
+    plan = plan_of(3, 5)
+    plan.delete_range(2, 6)
+    copy = SweepPlan.from_dict(plan.to_dict())
+    assert [run["id"] for run in copy] == [run["id"] for run in plan]
+    assert copy[0]["config"][0]["key"] == (0, "c1", "v0")
+
+
+def test_file_variables_show_the_file_name():
+    plan = SweepPlan([variable("tape", ["/data/u235.endf", "/data/pu239.endf"], is_file_input=True)])
+    assert [run["desc"] for run in plan] == ["tape=u235.endf", "tape=pu239.endf"]
+    assert plan[1]["folder"] == "Run_2_tape_pu239pendf"
@@ -0,0 +1,51 @@
+from tape_diff import TapeDiff, compare_lines, split_sections, SAME, CLOSE, CHANGED, REMOVED, ADDED
+
+
+def record(values, mat, mf, mt, ns=1):
+    return "".join(f"{v:>11}" for v in values).ljust(66) + f"{mat:>4}{mf:>2}{mt:>3}{ns:>5}"
+
+
+def tape(sections):
+    """Lines of a tape: {(mat, mf, mt): [[fields], ...]} with their SEND records."""
+    lines = ["tape id".ljust(66) + "   1 0  0    0"]
+    for (mat, mf, mt), rows in sections.items():
+        lines += [record(row, mat, mf, mt, ns) for ns, row in enumerate(rows, start=1)]
+        lines.append(record([], mat, mf, 0, 99999))
+    return lines
+
+
+BASE = {(9228, 3, 1): [["1.000000-5", "2.000000+1"], ["2.000000+7", "1.500000+0"]],
+        (9228, 3, 2): [["1.000000-5", "1.000000+1"]],
+        (9228, 3, 102): [["1.000000-5", "3.000000+2"]]}
+
+
+def test_compare_lines_uses_the_tolerances():
+    a, b = record(["1.000000+0", "2.000000+0"], 9228, 3, 1), record(["1.0000001+0", "2.000000+0"], 9228, 3, 1)
+    ok, dev, rel = compare_lines(a, b, rel_tol=1e-6)
+    assert ok and abs(dev - 1e-7) < 1e-15 and abs(rel - 1e-7) < 1e-12
+    assert not compare_lines(a, b, rel_tol=1e-8)[0]
+    assert compare_lines(a, b, rel_tol=0.0, abs_tol=1e-6)[0]
+    assert not compare_lines(a, record(["1.000000+0", "2.000000+0"], 9228, 3, 2))[0]  # other MT
+
+
+def test_sections_keep_their_send_record():
+    """The TPID record (MAT 1, MF/MT 0) is a section of its own, SEND records close theirs."""
+    keys = [key[:3] for key, _, _ in split_sections(tape(BASE))]
+    assert keys == [(1, 0, 0), (9228, 3, 1), (9228, 3, 2), (9228, 3, 102)]
+
+
+def test_section_statuses_and_rows():
+    other = dict(BASE)
+    other[(9228, 3, 1)] = [["1.000000-5", "2.000001+1"], ["2.000000+7", "1.500000+0"]]  # 5e-8 relative
+    other[(9228, 3, 2)] = [["1.000000-5", "1.100000+1"]]
+    del other[(9228, 3, 102)]
+    other[(9228, 3, 107)] = [["1.000000-5", "4.000000-2"]]
+    diff = TapeDiff(tape(BASE), tape(other), rel_tol=1e-6)
+
+    status = {(s.mat, s.mf, s.mt): s.status for s in diff.sections}
+    assert status == {(1, 0, 0): SAME, (9228, 3, 1): CLOSE, (9228, 3, 2): CHANGED,
+                      (9228, 3, 102): REMOVED, (9228, 3, 107): ADDED}
+    assert len(diff.left) == len(diff.right) == len(diff.status)
+    assert [diff.status[r] for r in range(diff.hunks()[0][0], diff.hunks()[0][1])] == [CHANGED]
+    assert len(diff.differing()) == 3
+    assert diff.describe().startswith("5 sections")
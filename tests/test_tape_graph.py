@@ -0,0 +1,58 @@
+import os
+from conftest import make_module
+from engine.stage_plan import dirty_modules, shared_prefix_length, read_units
+from engine.tape_graph import tape_sources, split_branches, build_branch_jobs, last_writers, run_branches
+
+
+def heatr_chain():
+    """MODER 20->-21, RECONR -21->-22, BROADR (-21,-22)->-23, HEATR (-21,-23)->-24."""
+    return [make_module("MODER", 20, -21), make_module("RECONR", -21, -22),
+            make_module("BROADR", -21, -22, -23), make_module("HEATR", -21, -23, -24)]
+
+
+def test_every_file_input_is_a_dependency():
+    modules = heatr_chain()
+    assert read_units(modules[3]) == {21, 23}
+    assert tape_sources(modules) == [{}, {21: 0}, {21: 0, 22: 1}, {21: 0, 23: 2}]
+
+
+def test_branches_stage_every_tape_they_read(tmp_path):
+    (tmp_path / "tape20").write_text("endf")
+    modules = heatr_chain()
+    jobs = build_branch_jobs(modules, str(tmp_path / "out"), {20: str(tmp_path / "tape20")})
+    heatr = jobs[-1]
+    assert sorted(heatr["tapes"]) == [20, 21, 23]
+    assert heatr["tapes"][21] == os.path.join(jobs[0]["job_dir"], "tape21")
+    assert heatr["requires"] == ["B1", "B3"]
+
+
+def test_stage_plan_follows_the_written_tapes():
+    modules = heatr_chain()
+    # Editing RECONR changes tape22, hence BROADR, hence HEATR
+    assert dirty_modules(modules, [{"key": (1, "c2", "err")}]) == {1, 2, 3}
+    assert shared_prefix_length(modules, [{"key": (1, "c2", "err")}]) == 1
+    # A swept ENDF tape, also read through nendf by a module before the owner
+    modules = [make_module("MODER", 30, -31), make_module("BROADR", 21, -31, -32), make_module("RECONR", 21, -22)]
+    swept = [{"key": (2, "c1", "nendf"), "is_file_input": True, "base_unit": 21}]
+    assert dirty_modules(modules, swept) == {1, 2}
+    assert shared_prefix_length(modules, swept) == 1
+
+
+def rewritten_chain():
+    """tape22 is written by MODER (module 1) and rewritten by RECONR (module 3, same branch as module 0)."""
+    return [make_module("MODER", 20, -21), make_module("MODER", 30, -22),
+            make_module("MODER", 40, -23), make_module("RECONR", -21, -22)]
+
+
+def test_hand_off_keeps_the_last_writer_in_module_order(tmp_path, fake_njoy):
+    for unit in (20, 30, 40): (tmp_path / f"tape{unit}").write_text("endf")
+    modules = rewritten_chain()
+    assert [b["modules"] for b in split_branches(modules)] == [[0, 3], [1], [2]]
+    assert last_writers(modules) == {21: 0, 22: 3, 23: 2}
+
+    out_dir = tmp_path / "out"
+    user_tapes = {u: str(tmp_path / f"tape{u}") for u in (20, 30, 40)}
+    success, jobs, _ = run_branches(modules, str(out_dir), user_tapes, fake_njoy, staging="copy")
+    assert success
+    assert (out_dir / "tape22").read_text() == "reconr in B1_moder_reconr"
+    assert (out_dir / "tape23").read_text() == "moder in B3_moder"
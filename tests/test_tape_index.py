@@ -0,0 +1,37 @@
+import os
+
+from endf_tools.tape_index import index_tape
+
+TAPE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output_exemple", "tape20")
+
+
+def keys_by_scan(path):
+    """(MAT, MF, MT, data lines) of every section, read line by line."""
+    sections = []
+    with open(path) as f:
+        for line in list(f)[1:]:
+            mat, mf, mt = int(line[66:70]), int(line[70:72]), int(line[72:75])
+            if mat <= 0 or mf == 0 or mt == 0: continue
+            if sections and sections[-1][:3] == [mat, mf, mt]: sections[-1][3] += 1
+            else: sections.append([mat, mf, mt, 1])
+    return [tuple(s) for s in sections]
+
+
+def test_index_matches_a_line_scan():
+    index = index_tape(TAPE)
+    assert [(s.mat, s.mf, s.mt, s.lines) for s in index.sections] == keys_by_scan(TAPE)
+    assert index.mats() == [6328] and index.kind == "ENDF"
+    assert index.materials[0].za == 63152.0
+    mf3 = index.find(6328, 3, 1)[0]
+    text = index.read_section(mf3)
+    assert len(text.splitlines()) == mf3.lines and text.splitlines()[0][66:75] == "6328 3  1"
+
+
+def test_irregular_records_give_the_same_index(tmp_path):
+    # Trailing blanks stripped and no line numbers: the galloping search cannot be used
+    with open(TAPE) as f: lines = [line.rstrip("\n")[:75].rstrip() for line in f]
+    path = tmp_path / "tape20"
+    path.write_text("\n".join(lines) + "\n")
+    regular, irregular = index_tape(TAPE), index_tape(str(path))
+    assert [s[:3] + (s.lines,) for s in irregular.sections] == [s[:3] + (s.lines,) for s in regular.sections]
+
@@ -0,0 +1,72 @@
+import os
+import pytest
+
+from engine import tape_staging
+from engine.parallel_runner import ParallelJobRunner
+from engine.tape_staging import stage_tape
+
+
+@pytest.fixture
+def staging(monkeypatch, tmp_path):
+    """No reflinks (as on most test filesystems), a fresh support cache, and a log of the attempts."""
+    attempts = []
+    monkeypatch.setattr(tape_staging, "_support", {})
+    for name, impl in list(tape_staging._IMPLEMENTATIONS.items()):
+        def logged(src, dst, name=name, impl=impl):
+            attempts.append(name)
+            if name == "reflink": raise OSError("no reflink here")
+            impl(src, dst)
+        monkeypatch.setitem(tape_staging._IMPLEMENTATIONS, name, logged)
+    src = tmp_path / "library.endf"
+    src.write_text("library")
+    return attempts, src
+
+
+def test_read_only_tapes_fall_back_to_the_cheapest_link(staging, tmp_path):
+    attempts, src = staging
+    assert stage_tape(str(src), str(tmp_path / "tape20")) == "hardlink"
+    assert os.path.samefile(src, tmp_path / "tape20")
+    assert attempts == ["reflink", "hardlink"]
+    assert stage_tape(str(src), str(tmp_path / "tape21")) == "hardlink"
+    assert attempts == ["reflink", "hardlink", "hardlink"]  # the failed reflink is remembered
+
+
+def test_symlink_when_hardlinks_fail(staging, tmp_path, monkeypatch):
+    attempts, src = staging
+    def no_hardlink(src, dst):
+        attempts.append("hardlink")
+        raise OSError("cross-device link")
+    monkeypatch.setitem(tape_staging._IMPLEMENTATIONS, "hardlink", no_hardlink)
+    assert stage_tape(str(src), str(tmp_path / "tape20")) == "symlink"
+    assert os.path.islink(tmp_path / "tape20") and attempts == ["reflink", "hardlink", "symlink"]
+
+
+@pytest.mark.parametrize("strategy", ["auto", "hardlink", "symlink", "copy"])
+def test_writable_tapes_are_never_linked(staging, tmp_path, strategy):
+    attempts, src = staging
+    dst = tmp_path / "tape21"
+    os.link(src, dst)  # left over by an earlier run: must not be written through
+    assert stage_tape(str(src), str(dst), strategy, writable=True) == "copy"
+    assert "hardlink" not in attempts and "symlink" not in attempts
+    dst.write_text("written by NJOY")
+    assert src.read_text() == "library"
+
+
+def test_unknown_strategy(staging, tmp_path):
+    _, src = staging
+    with pytest.raises(ValueError):
+        stage_tape(str(src), str(tmp_path / "tape20"), "teleport")
+
+
+def test_staging_error_fails_the_job_without_running_njoy(tmp_path, fake_njoy):
+    (tmp_path / "not_a_tape").mkdir()
+    runner = ParallelJobRunner(fake_njoy, 1)
+    job_dir = tmp_path / "job"
+    runner.submit({"id": 1, "job_dir": str(job_dir), "content": "moder\n20 -21/\nstop\n",
+                   "tapes": {20: str(tmp_path / "not_a_tape")}, "staging": "copy"})
+    while True:
+        event = runner.events.get(timeout=10)
+        if event[0] == "finished": break
+    runner.shutdown(wait=True)
+    assert not event[2] and event[3].startswith("Staging error: tape20")
+    assert not os.path.exists(job_dir / "output.out")
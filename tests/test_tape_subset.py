@@ -0,0 +1,53 @@
+import os
+
+from endf_tools.tape_index import index_tape
+from endf_tools.tape_subset import write_subset
+from engine.tape_staging import stage_subset
+
+TAPE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output_exemple", "tape20")
+
+
+def renamed(lines, mat):
+    return [line[:66] + f"{mat:4d}" + line[70:] if line[66:70] == "6328" else line for line in lines]
+
+
+def two_material_tape(path):
+    """tape20 followed by a copy of its material renumbered 9228."""
+    with open(TAPE) as f: lines = f.readlines()
+    tpid, block, tend = lines[0], lines[1:-1], lines[-1]
+    path.write_text("".join([tpid] + block + renamed(block, 9228) + [tend]))
+    return tpid, block, tend
+
+
+def test_subset_keeps_tpid_tend_and_the_requested_material(tmp_path):
+    tpid, block, tend = two_material_tape(tmp_path / "tape20")
+    index = index_tape(str(tmp_path / "tape20"))
+    assert index.mats() == [6328, 9228]
+
+    assert write_subset(index, str(tmp_path / "only9228"), [9228]) == [9228]
+    lines = (tmp_path / "only9228").read_text().splitlines(keepends=True)
+    assert lines[0] == tpid and lines[-1] == tend
+    assert lines[1:-1] == renamed(block, 9228)
+    assert index_tape(str(tmp_path / "only9228")).mats() == [9228]
+
+    assert write_subset(index, str(tmp_path / "both"), [9228, 6328, 1234]) == [6328, 9228]
+    assert (tmp_path / "both").read_text() == (tmp_path / "tape20").read_text()
+
+
+def test_single_material_subset_is_the_whole_tape(tmp_path):
+    write_subset(index_tape(TAPE), str(tmp_path / "tape20"), [6328])
+    with open(TAPE, "rb") as f: assert (tmp_path / "tape20").read_bytes() == f.read()
+
+
+def test_stage_subset_reports_why_the_whole_tape_was_staged(tmp_path):
+    two_material_tape(tmp_path / "tape20")
+    assert stage_subset(str(tmp_path / "tape20"), str(tmp_path / "a"), [9228], "copy") == ("subset", None)
+    assert index_tape(str(tmp_path / "a")).mats() == [9228]
+
+    strategy, reason = stage_subset(str(tmp_path / "tape20"), str(tmp_path / "b"), [9228, 125], "copy")
+    assert strategy == "copy" and reason == "tape20 staged whole (MAT 125 not on the tape)"
+    assert (tmp_path / "b").read_text() == (tmp_path / "tape20").read_text()
+
+    (tmp_path / "notes").write_text("not a tape\n")
+    strategy, reason = stage_subset(str(tmp_path / "notes"), str(tmp_path / "c"), [9228], "copy")
+    assert strategy == "copy" and reason == "notes staged whole (no ENDF sections)"